@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+import argparse
+from time import perf_counter
+from tempfile import NamedTemporaryFile
+from os import remove
+from typing import Dict, List
+
+from rml.io.sources import LogicalSource, MIMEType
+from rml.io.maps import TriplesMap, SubjectMap, PredicateMap, ObjectMap, \
+                        PredicateObjectMap, ReferenceType
+from rml.io.targets import FileLogicalTarget
+
+DEFAULT_SIZES = [10000, 20000, 40000, 80000]
+
+
+class GeneratedLogicalSource(LogicalSource):
+    """
+    Logical Source which generates a fixed number of records.
+    """
+    def __init__(self, size: int) -> None:
+        super().__init__()
+        self._size: int = size
+        self._index: int = 0
+
+    def __next__(self) -> Dict:
+        if self._index >= self._size:
+            raise StopIteration
+        self._index += 1
+        return {'id': str(self._index), 'name': f'Name {self._index}'}
+
+    @property
+    def mime_type(self) -> MIMEType:
+        return MIMEType.CSV
+
+
+def create_triples_maps(size: int) -> List[TriplesMap]:
+    ls = GeneratedLogicalSource(size)
+    sm = SubjectMap('http://example.com/{id}', ReferenceType.TEMPLATE,
+                    MIMEType.CSV, None)
+    pm = PredicateMap('http://xmlns.com/foaf/0.1/name',
+                      ReferenceType.CONSTANT, MIMEType.CSV)
+    om = ObjectMap('name', ReferenceType.REFERENCE, MIMEType.CSV)
+    return [TriplesMap(ls, sm, [PredicateObjectMap(pm, om)])]
+
+
+def benchmark(size: int, format: MIMEType) -> float:
+    """
+    Writes size triples to a temporary file and returns the elapsed time.
+    """
+    with NamedTemporaryFile(delete=False) as f:
+        path = f.name
+    try:
+        target = FileLogicalTarget(create_triples_maps(size), path, format)
+        start = perf_counter()
+        target.write_all()
+        return perf_counter() - start
+    finally:
+        remove(path)
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Benchmarks the FileLogicalTarget'
+                                ' for an increasing number of triples')
+    p.add_argument('sizes', type=int, nargs='*', default=DEFAULT_SIZES,
+                   help='Number of triples to write')
+    p.add_argument('--format', type=str, default=MIMEType.NTRIPLES.value,
+                   help='Serialization format (MIME type value)')
+    args = p.parse_args()
+
+    # Cost per triple must stay constant if writing is linear
+    print(f'{"triples":>10} {"seconds":>10} {"us/triple":>10}')
+    for size in args.sizes:
+        elapsed = benchmark(size, MIMEType(args.format))
+        print(f'{size:>10} {elapsed:>10.3f} {elapsed / size * 1e6:>10.2f}')
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+import argparse
+from time import perf_counter
+from tempfile import NamedTemporaryFile
+from os import remove, cpu_count
+from typing import List
+
+from rml.io.sources import MIMEType
+from rml.io.maps import TriplesMap
+from rml.io.targets import FileLogicalTarget
+from benchmarks.file_target import create_triples_maps
+
+DEFAULT_TRIPLES_MAPS = 40
+DEFAULT_SIZE = 10000
+
+
+def benchmark(triples_maps: int, size: int, workers: int) -> float:
+    """
+    Executes independent TriplesMaps with the given number of workers and
+    returns the elapsed time.
+    """
+    tms: List[TriplesMap] = []
+    for i in range(triples_maps):
+        tms += create_triples_maps(size)
+
+    with NamedTemporaryFile(delete=False) as f:
+        path = f.name
+    try:
+        target = FileLogicalTarget(tms, path, MIMEType.NTRIPLES)
+        start = perf_counter()
+        target.write_all(workers=workers)
+        return perf_counter() - start
+    finally:
+        remove(path)
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Benchmarks the parallel '
+                                'execution of independent TriplesMaps for an '
+                                'increasing number of workers')
+    p.add_argument('workers', type=int, nargs='*',
+                   default=[1, 2, 4, 8, 16, 32],
+                   help='Number of worker processes')
+    p.add_argument('--triples-maps', type=int, default=DEFAULT_TRIPLES_MAPS,
+                   help='Number of independent TriplesMaps')
+    p.add_argument('--size', type=int, default=DEFAULT_SIZE,
+                   help='Number of records per TriplesMap')
+    args = p.parse_args()
+
+    # Speedup must be close to the number of workers if execution scales
+    print(f'CPUs: {cpu_count()}')
+    print(f'{"workers":>10} {"seconds":>10} {"speedup":>10}')
+    baseline = None
+    for workers in args.workers:
+        elapsed = benchmark(args.triples_maps, args.size, workers)
+        baseline = baseline or elapsed
+        print(f'{workers:>10} {elapsed:>10.3f} {baseline / elapsed:>10.2f}')
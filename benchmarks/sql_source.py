@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+import argparse
+import sqlite3
+from multiprocessing import get_context
+from resource import getrusage, RUSAGE_SELF
+from time import perf_counter
+from tempfile import NamedTemporaryFile
+from os import remove
+from typing import Tuple
+
+from rml.io.sources import SQLLogicalSource
+
+DEFAULT_SIZE = 1000000
+DEFAULT_BATCH_SIZE = 10000
+QUERY = 'SELECT id, name, city, age FROM people;'
+
+
+def create_database(path: str, size: int) -> None:
+    """
+    Generates an SQLite database with a table of the given number of rows.
+    """
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE people (id INTEGER PRIMARY KEY, '
+                       'name TEXT, city TEXT, age INTEGER);')
+    connection.executemany('INSERT INTO people VALUES (?, ?, ?, ?);',
+                           ((i, f'Person {i}', f'City {i % 100}', i % 90)
+                            for i in range(size)))
+    connection.commit()
+    connection.close()
+
+
+def benchmark(path: str, streaming: bool, batch_size: int) \
+        -> Tuple[float, int]:
+    """
+    Iterates over all rows and returns the elapsed time and the peak memory
+    usage in KiB of the process.
+    """
+    start = perf_counter()
+    source = SQLLogicalSource(f'sqlite:///{path}', QUERY,
+                              streaming=streaming, batch_size=batch_size)
+    while True:
+        try:
+            next(source)
+        except StopIteration:
+            break
+    return perf_counter() - start, getrusage(RUSAGE_SELF).ru_maxrss
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Benchmarks iterating over a '
+                                'generated SQLite table with and without '
+                                'streaming')
+    p.add_argument('--size', type=int, default=DEFAULT_SIZE,
+                   help='Number of rows in the generated table')
+    p.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                   help='Number of rows fetched at once when streaming')
+    args = p.parse_args()
+
+    with NamedTemporaryFile(suffix='.db', delete=False) as f:
+        path = f.name
+    try:
+        create_database(path, args.size)
+        print(f'{"streaming":>10} {"seconds":>10} {"peak KiB":>10}')
+        # Each run in a fresh process to measure its own peak memory usage
+        ctx = get_context('spawn')
+        for streaming in [False, True]:
+            with ctx.Pool(1) as pool:
+                elapsed, memory = pool.apply(benchmark, (path, streaming,
+                                                         args.batch_size))
+            print(f'{str(streaming):>10} {elapsed:>10.3f} {memory:>10}')
+    finally:
+        remove(path)
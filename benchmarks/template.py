@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+import argparse
+from logging import debug
+from time import perf_counter
+from urllib.parse import quote
+from typing import Callable, Dict, List
+
+from rml.io.sources import MIMEType
+from rml.io.maps import SubjectMap, ReferenceType, URITEMPLATE_PATTERN
+
+DEFAULT_SIZE = 100000
+DEFAULT_TEMPLATE = 'http://example.com/{country}/{city}/{id}'
+
+
+def legacy_resolve_template(sm: SubjectMap, data: Dict) -> str:
+    """
+    Template resolution before templates were precompiled: the template is
+    parsed for every record and rebuilt with str.replace.
+    """
+    term: str = sm._term
+    variables: List[str] = URITEMPLATE_PATTERN.findall(sm._term)
+
+    if variables:
+        debug(f'Variables: {variables} from {sm._term}')
+        for v in variables:
+            var: str = str(v)
+            resolved_var: str = sm._resolve_reference(var, data)
+            var = '{' + var + '}'
+
+            if sm._term.startswith('http://') or \
+                    sm._term.startswith('https://'):
+                resolved_var = quote(resolved_var)
+
+            term = term.replace(var, resolved_var)
+            debug(f'Replaced {var} with {resolved_var}')
+    else:
+        raise NameError(f'Template is empty: {sm._term}')
+
+    debug(f'Resolved template: {term}')
+    return term
+
+
+def create_records(size: int) -> List[Dict]:
+    return [{'id': str(i), 'country': 'Belgium', 'city': f'City {i % 100}'}
+            for i in range(size)]
+
+
+def benchmark(resolve: Callable[[Dict], str], records: List[Dict]) -> float:
+    """
+    Resolves the template for each record and returns the elapsed time.
+    """
+    start = perf_counter()
+    for r in records:
+        resolve(r)
+    return perf_counter() - start
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Benchmarks precompiled '
+                                'templates against the legacy template '
+                                'resolution')
+    p.add_argument('--size', type=int, default=DEFAULT_SIZE,
+                   help='Number of records to resolve')
+    p.add_argument('--template', type=str, default=DEFAULT_TEMPLATE,
+                   help='rr:template to resolve')
+    args = p.parse_args()
+
+    sm = SubjectMap(args.template, ReferenceType.TEMPLATE, MIMEType.CSV,
+                    None)
+    records = create_records(args.size)
+    for r in records[:100]:
+        assert sm._resolve_template(r) == legacy_resolve_template(sm, r)
+
+    legacy = benchmark(lambda r: legacy_resolve_template(sm, r), records)
+    compiled = benchmark(sm._resolve_template, records)
+    print(f'{"engine":>10} {"seconds":>10} {"us/record":>10}')
+    print(f'{"legacy":>10} {legacy:>10.3f} '
+          f'{legacy / args.size * 1e6:>10.2f}')
+    print(f'{"compiled":>10} {compiled:>10.3f} '
+          f'{compiled / args.size * 1e6:>10.2f}')
+    print(f'Speedup: {legacy / compiled:.2f}x')
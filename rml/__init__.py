@@ -1,3 +1,6 @@
+# Processor version, part of the key of cached mapping rules
+__version__: str = '0.1.0'
+
 import rml.io.maps
 import rml.io
 import rml.io.sources
@@ -4,22 +4,42 @@ import re
 import sys
 import datetime
 import argparse
+import pickle
+from hashlib import sha256
 from logging import debug, info, warning, critical
-from os import path
+from os import path, makedirs, replace
+from tempfile import NamedTemporaryFile
+from time import time
 from rdflib import Graph
 from rdflib.term import URIRef, BNode, Literal
 from rdflib.plugins.serializers.turtle import TurtleSerializer
 from rdflib import plugin
-from typing import IO, Optional, List, Dict, Any, Union
-from sqlalchemy import create_engine, inspect
+from typing import IO, Optional, List, Dict, Any, Union, Set, Tuple
+from sqlalchemy import inspect, literal, literal_column, cast, String, \
+                       Integer, select, text
 from sqlalchemy.engine.reflection import Inspector
-from sqlalchemy.exc import OperationalError, ArgumentError
+from sqlalchemy.exc import OperationalError, ArgumentError, DBAPIError
+from sqlalchemy.sql.expression import Select
 
 from rml.namespace import XSD, RDF, R2RML, RML, D2RQ
 from rml.io.maps import TriplesMap, SubjectMap, PredicateMap, ObjectMap, \
                         PredicateObjectMap
+from rml.io.sources import get_engine
+from rml.io.sources.sql_source import SIMPLE_QUERY_PATTERN, \
+                                      SQL_IDENTIFIER_QUOTES
 
 URITEMPLATE_PATTERN = re.compile(r'\{(.*?)\}')
+# Templates are resolved by the processor by default
+DEFAULT_TEMPLATE_PUSHDOWN: bool = False
+# Column alias of a template resolved by the database
+TEMPLATE_COLUMN_PREFIX: str = 'rml_template_'
+# Aliases of the child and parent query in a joint SQL query
+JOIN_CHILD_ALIAS: str = 'rml_child'
+JOIN_PARENT_ALIAS: str = 'rml_parent'
+# Column alias of a parent column in a joint SQL query
+JOIN_PARENT_COLUMN_PREFIX: str = 'rml_parent_'
+# Seconds a persisted schema of a SQL table is used before inspecting again
+DEFAULT_SCHEMA_TTL: float = 24 * 60 * 60
 
 
 class TurtleWithPrefixes(TurtleSerializer):
@@ -31,8 +51,30 @@ class TurtleWithPrefixes(TurtleSerializer):
 
 
 class MappingCompiler():
-    def __init__(self) -> None:
+    def __init__(self,
+                 template_pushdown: bool = DEFAULT_TEMPLATE_PUSHDOWN,
+                 schema_cache: Optional[str] = None,
+                 schema_ttl: float = DEFAULT_SCHEMA_TTL) -> None:
+        """
+        Creates a MappingCompiler.
+
+        :param bool template_pushdown: Let the database resolve rr:templates
+        over SQL columns as part of the rml:query.
+        :param str schema_cache: File to persist the inspected schemas of
+        SQL tables in across runs.
+        :param float schema_ttl: Seconds a persisted schema of a SQL table is
+        used before the table is inspected again.
+        """
         super().__init__()
+        self._template_pushdown: bool = template_pushdown
+        self._schema_cache: Optional[str] = schema_cache
+        self._schema_ttl: float = schema_ttl
+        # Columns of SQL tables with their time of inspection, by hash of
+        # the DSN and table to not persist credentials of the DSN
+        self._schemas: Dict[Tuple[str, str],
+                            Tuple[float, List[Dict[str, Any]]]] = {}
+        self._schemas_changed: bool = False
+        self._read_schema_cache()
         # Register TurtleWithPrefixes serializer as 'tortoise' format
         plugin.register('tortoise',
                         plugin.Serializer,
@@ -61,6 +103,12 @@ class MappingCompiler():
         info('Rewritten rr:graphMap OK')
         rules = self._rewrite_rr_class(rules)
         info('Rewritten rr:class OK')
+        if self._template_pushdown:
+            rules = self._push_down_templates(rules)
+            info('Pushed down rr:templates OK')
+        rules = self._rewrite_sql_joins(rules)
+        info('Rewritten SQL joins OK')
+        self._write_schema_cache()
         return rules
 
     def _expand_shortcuts(self, rules: Graph) -> Graph:
@@ -153,7 +201,10 @@ class MappingCompiler():
 
         1. The table name and column names referenced in the mapping rules are
            retrieved.
-        2. The retrieved table and columns names are used to create a SQL
+        2. The column names of TriplesMaps over the same table of the same
+           database are merged, these TriplesMaps get the same SQL query.
+           The MappingReader shares a single scan of the table between them.
+        3. The retrieved table and columns names are used to create a SQL
            query. rr:tableName is replaced by the new SQL query as rml:query.
         """
         tm_list: Dict[str, Any] = {}
@@ -193,10 +244,8 @@ class MappingCompiler():
             # Get all possible column names
             d2rq_jdbc = str(rules.value(rml_source, D2RQ.jdbcDSN))
             tm_list[tm_id]['jdbc'] = d2rq_jdbc
-            engine = create_engine(tm_list[tm_id]['jdbc'])
-            inspector = inspect(engine)
             column_list = [c['name'] for c in
-                           inspector.get_columns(rr_table_name)]
+                           self._get_columns(d2rq_jdbc, str(rr_table_name))]
             debug(f'Column names {column_list} for table {rr_table_name}')
 
             # Find column names for rr:SubjectMap, rr:PredicateMap and
@@ -212,7 +261,34 @@ class MappingCompiler():
             tm_list[tm_id]['columns'] = list(set(tm_list[tm_id]['columns']))
             debug(f'Referenced column names: {tm_list[tm_id]["columns"]}')
 
-        # 2. Build SQL query and replace rr:tableName with rml:query
+        # Join conditions refer to columns of the child and parent TriplesMap
+        for t in rules.triples((None, R2RML.joinCondition, None)):
+            om, _, jc = t
+            pom = rules.value(predicate=R2RML.objectMap, object=om)
+            child_tm = str(rules.value(predicate=R2RML.predicateObjectMap,
+                                       object=pom))
+            parent_tm = str(rules.value(om, R2RML.parentTriplesMap))
+            if child_tm in tm_list:
+                tm_list[child_tm]['columns'].append(
+                    str(rules.value(jc, R2RML.child)))
+            if parent_tm in tm_list:
+                tm_list[parent_tm]['columns'].append(
+                    str(rules.value(jc, R2RML.parent)))
+
+        # 2. Merge the column names of TriplesMaps over the same table of the
+        # same database, the table is scanned only once for all of them
+        table_columns: Dict[Tuple[str, str], Set[str]] = {}
+        for tm_id in tm_list:
+            source = tm_list[tm_id]['source']
+            if rules.value(source, RML.query) is not None:
+                continue
+            table = (tm_list[tm_id]['jdbc'],
+                     str(rules.value(source, R2RML.tableName)))
+            table_columns.setdefault(table, set())
+            table_columns[table].update(tm_list[tm_id]['columns'])
+        debug(f'Referenced column names per table: {table_columns}')
+
+        # 3. Build SQL query and replace rr:tableName with rml:query
         for tm in tm_list:
             tm_id = str(tm)
             rml_query = rules.value(tm_list[tm_id]['source'], RML.query)
@@ -226,12 +302,14 @@ class MappingCompiler():
             query: str = 'SELECT '
             rr_table_name = rules.value(tm_list[tm_id]['source'],
                                         R2RML.tableName)
-            if tm_list[tm_id]['columns']:
-                for c in tm_list[tm_id]['columns']:
+            columns: List[str] = sorted(table_columns[(tm_list[tm_id]['jdbc'],
+                                                       str(rr_table_name))])
+            if columns:
+                for c in columns:
                     c.replace(' ', '\\ ')  # Escape spaces in column names
                     query += c
                     # No comma for the last column name
-                    if c == tm_list[tm_id]['columns'][-1]:
+                    if c == columns[-1]:
                         query += ' '
                     else:
                         query += ', '
@@ -322,6 +400,288 @@ class MappingCompiler():
 
         return rules
 
+    def _push_down_templates(self, rules: Graph) -> Graph:
+        """
+        Rewrite rr:template over SQL columns as rml:reference to a column
+        which is resolved by the database as part of the rml:query.
+        The database concatenates the template, the processor only reads the
+        resulting column and less data is transferred.
+
+        1. The term maps with a rr:template are collected for each SQL query
+           generated from rr:tableName. Logical Sources with the same query
+           get the same columns to keep sharing a single scan.
+        2. Templates are only pushed down if the database produces exactly
+           the same value as the processor. IRI templates (http:// and
+           https://) are percent-encoded by the processor, which SQL cannot
+           do portably for UTF-8 text: they are only pushed down when all
+           their columns are integers. Other templates may also use text
+           columns.
+        3. The concatenation is added to the SQL query and the rr:template is
+           replaced by a rml:reference to it.
+        """
+        # 1. Collect the term maps with a rr:template per SQL query
+        queries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for tm in rules.subjects(RDF.type, R2RML.TriplesMap):
+            ls = rules.value(tm, RML.logicalSource)
+            rml_source = rules.value(ls, RML.source)
+            if rules.value(rml_source, RDF.type) != D2RQ.Database:
+                continue
+            d2rq_jdbc = str(rules.value(rml_source, D2RQ.jdbcDSN))
+            rml_query = rules.value(ls, RML.query)
+            if rml_query is None or \
+                    SIMPLE_QUERY_PATTERN.match(str(rml_query)) is None:
+                debug(f'Skipping rr:template pushdown for {ls}')
+                continue
+
+            key = (d2rq_jdbc, str(rml_query))
+            if key not in queries:
+                queries[key] = {'sources': [], 'term_maps': []}
+            queries[key]['sources'].append(ls)
+
+            term_maps: List[Tuple[Any, bool]] = []
+            for sm in rules.objects(tm, R2RML.subjectMap):
+                term_maps.append((sm, False))
+            for pom in rules.objects(tm, R2RML.predicateObjectMap):
+                for pm in rules.objects(pom, R2RML.predicateMap):
+                    term_maps.append((pm, False))
+                for om in rules.objects(pom, R2RML.objectMap):
+                    term_maps.append((om, True))
+            for term_map, is_object_map in term_maps:
+                rr_template = rules.value(term_map, R2RML.template)
+                if rr_template is not None:
+                    queries[key]['term_maps'].append((term_map,
+                                                      is_object_map,
+                                                      str(rr_template)))
+
+        for (d2rq_jdbc, query), q in queries.items():
+            # 2. Build the SQL expression of each supported template
+            match = SIMPLE_QUERY_PATTERN.match(query)
+            assert match is not None
+            table: str = match.group('table')
+            engine = get_engine(d2rq_jdbc)
+            try:
+                column_types: Dict[str, Any] = \
+                    {c['name']: c['type'] for c in
+                     self._get_columns(d2rq_jdbc,
+                                       table.strip(SQL_IDENTIFIER_QUOTES))}
+            except (OperationalError, ArgumentError) as e:
+                msg = f'Unable to inspect SQL table {table}: {e}'
+                critical(msg)
+                raise ValueError(msg)
+
+            aliases: Dict[str, str] = {}
+            expressions: List[str] = []
+            for template in sorted(set([t for _, _, t in q['term_maps']])):
+                alias: str = f'{TEMPLATE_COLUMN_PREFIX}{len(aliases)}'
+                expression = self._get_template_expression(template,
+                                                           column_types)
+                if expression is None:
+                    continue
+                aliases[template] = alias
+                sql: str = str(expression.compile(
+                    dialect=engine.dialect,
+                    compile_kwargs={'literal_binds': True}))
+                expressions.append(f'{sql} AS {alias}')
+            if not expressions:
+                continue
+            debug(f'Pushed down rr:templates {aliases}')
+
+            # 3. Add the expressions to the query and refer to them
+            query = query[:match.end('columns')] + ', ' + \
+                ', '.join(expressions) + query[match.end('columns'):]
+            debug(f'Query with rr:templates: {query}')
+            for ls in q['sources']:
+                rules.set((ls, RML.query, Literal(query)))
+
+            for term_map, is_object_map, template in q['term_maps']:
+                if template not in aliases:
+                    continue
+                # Object Maps with rml:reference are Literals by default
+                if is_object_map and \
+                        rules.value(term_map, R2RML.termType) is None and \
+                        rules.value(term_map, R2RML.language) is None and \
+                        rules.value(term_map, R2RML.datatype) is None:
+                    rules.add((term_map, R2RML.termType, R2RML.IRI))
+                rules.remove((term_map, R2RML.template, None))
+                rules.add((term_map, RML.reference,
+                           Literal(aliases[template])))
+
+        return rules
+
+    def _rewrite_sql_joins(self, rules: Graph) -> Graph:
+        """
+        Rewrite Referencing Object Maps with rr:joinCondition between
+        TriplesMaps on the same SQL database as a TriplesMap over the joint
+        SQL query of section 8 of the R2RML specification. The database
+        executes the join with its indexes instead of the processor.
+
+        1. Find Referencing Object Maps with rr:joinCondition of which the
+           child and parent Logical Source are SQL queries on the same
+           database.
+        2. Build the joint SQL query. The columns of the parent Subject Map
+           are renamed to avoid conflicts with the columns of the child.
+           Joins with columns that cannot be renamed are skipped.
+        3. Create a TriplesMap over the joint SQL query with a copy of the
+           child Subject Map without rr:class and a PredicateObjectMap with
+           the parent Subject Map as Object Map.
+        4. Remove the Referencing Object Map from the child TriplesMap.
+        """
+        for t in list(rules.triples((None, R2RML.parentTriplesMap, None))):
+            om, _, parent_tm = t
+
+            # 1. Find joins on the same database
+            join_conditions = list(rules.objects(om, R2RML.joinCondition))
+            if not join_conditions:
+                continue
+            pom = rules.value(predicate=R2RML.objectMap, object=om)
+            child_tm = rules.value(predicate=R2RML.predicateObjectMap,
+                                   object=pom)
+            child_ls = rules.value(child_tm, RML.logicalSource)
+            parent_ls = rules.value(parent_tm, RML.logicalSource)
+            child_source = rules.value(child_ls, RML.source)
+            parent_source = rules.value(parent_ls, RML.source)
+            if rules.value(child_source, RDF.type) != D2RQ.Database or \
+                    rules.value(parent_source, RDF.type) != D2RQ.Database:
+                continue
+            if rules.value(child_source, D2RQ.jdbcDSN) != \
+                    rules.value(parent_source, D2RQ.jdbcDSN):
+                debug(f'Join {om} between different databases, skipping')
+                continue
+            child_query = rules.value(child_ls, RML.query)
+            parent_query = rules.value(parent_ls, RML.query)
+            if child_query is None or parent_query is None:
+                warning(f'No rml:query for join {om}, skipping')
+                continue
+
+            # Object Maps cannot generate blank nodes yet
+            parent_sm = rules.value(parent_tm, R2RML.subjectMap)
+            rr_term_type = rules.value(parent_sm, R2RML.termType)
+            if rr_term_type == R2RML.BlankNode:
+                warning(f'Blank node parent of join {om}, skipping')
+                continue
+
+            # 2. Build the joint SQL query
+            aliases: Dict[str, str] = {}
+            for c in self._get_column_names(rules, parent_sm):
+                if c not in aliases:
+                    aliases[c] = f'{JOIN_PARENT_COLUMN_PREFIX}{len(aliases)}'
+            # Parent Subject Map columns without an alias cannot be renamed
+            rr_template = rules.value(parent_sm, R2RML.template)
+            rml_reference = rules.value(parent_sm, RML.reference)
+            rr_constant = rules.value(parent_sm, R2RML.constant)
+            parent_columns: List[str] = []
+            if rr_template is not None:
+                parent_columns = URITEMPLATE_PATTERN.findall(str(rr_template))
+            elif rml_reference is not None:
+                parent_columns = [str(rml_reference)]
+            unknown: List[str] = [c for c in parent_columns
+                                  if c not in aliases]
+            if unknown:
+                warning(f'Unknown columns {unknown} in parent Subject Map '
+                        f'of join {om}, skipping')
+                continue
+            columns: str = ''.join([f', {JOIN_PARENT_ALIAS}.{c} AS {a}'
+                                    for c, a in aliases.items()])
+            conditions: str = ' AND '.join(
+                [f'{JOIN_CHILD_ALIAS}.{rules.value(jc, R2RML.child)} = '
+                 f'{JOIN_PARENT_ALIAS}.{rules.value(jc, R2RML.parent)}'
+                 for jc in join_conditions])
+            query: str = f'SELECT {JOIN_CHILD_ALIAS}.*{columns} ' \
+                         f'FROM ({str(child_query).strip().rstrip(";")}) ' \
+                         f'AS {JOIN_CHILD_ALIAS} ' \
+                         f'JOIN ({str(parent_query).strip().rstrip(";")}) ' \
+                         f'AS {JOIN_PARENT_ALIAS} ON {conditions}'
+            debug(f'Joint SQL query for {om}: {query}')
+
+            # 3. Create TriplesMap over the joint SQL query
+            join_tm = BNode()
+            join_ls = BNode()
+            join_pom = BNode()
+            join_om = BNode()
+            rules.add((join_tm, RDF.type, R2RML.TriplesMap))
+            rules.add((join_tm, RML.logicalSource, join_ls))
+            for p, o in rules.predicate_objects(child_ls):
+                if p != RML.query:
+                    rules.add((join_ls, p, o))
+            rules.add((join_ls, RML.query, Literal(query)))
+            # Copy of the child Subject Map without rr:class, the child
+            # TriplesMap already generates the rdf:type triples
+            join_sm = BNode()
+            child_sm = rules.value(child_tm, R2RML.subjectMap)
+            for p, o in rules.predicate_objects(child_sm):
+                if p != R2RML['class']:  # keyword
+                    rules.add((join_sm, p, o))
+            rules.add((join_tm, R2RML.subjectMap, join_sm))
+            rules.add((join_tm, R2RML.predicateObjectMap, join_pom))
+            for pm in rules.objects(pom, R2RML.predicateMap):
+                rules.add((join_pom, R2RML.predicateMap, pm))
+            for gm in rules.objects(pom, R2RML.graphMap):
+                rules.add((join_pom, R2RML.graphMap, gm))
+            rules.add((join_pom, R2RML.objectMap, join_om))
+
+            # Parent Subject Map as Object Map over the renamed columns
+            if rr_template is not None:
+                template: str = URITEMPLATE_PATTERN.sub(
+                    lambda m: '{' + aliases[m.group(1)] + '}',
+                    str(rr_template))
+                rules.add((join_om, R2RML.template, Literal(template)))
+            elif rml_reference is not None:
+                rules.add((join_om, RML.reference,
+                           Literal(aliases[str(rml_reference)])))
+            else:
+                rules.add((join_om, R2RML.constant, rr_constant))
+            rules.add((join_om, R2RML.termType, R2RML.IRI))
+
+            # 4. Remove Referencing Object Map from the child TriplesMap
+            rules.remove((pom, R2RML.objectMap, om))
+            rules.remove((om, None, None))
+            for jc in join_conditions:
+                rules.remove((jc, None, None))
+            if rules.value(pom, R2RML.objectMap) is None:
+                rules.remove((child_tm, R2RML.predicateObjectMap, pom))
+            debug(f'Rewritten join {om} as TriplesMap {join_tm}')
+
+        return rules
+
+    def _get_template_expression(self, template: str,
+                                 column_types: Dict[str, Any]) -> Any:
+        """
+        Converts a rr:template into an SQL concatenation expression.
+        Returns None if the database cannot resolve the template exactly like
+        the processor does: IRI templates over other than integer columns
+        and templates over other than integer or text columns.
+        """
+        is_iri: bool = template.startswith('http://') or \
+            template.startswith('https://')
+        segments: List[str] = URITEMPLATE_PATTERN.split(template)
+        if len(segments) < 2:
+            return None
+
+        expression: Any = None
+        for i, segment in enumerate(segments):
+            part: Any
+            # Variable
+            if i % 2 == 1:
+                column_type = column_types.get(
+                    segment.strip(SQL_IDENTIFIER_QUOTES))
+                if isinstance(column_type, Integer):
+                    part = cast(literal_column(segment), String)
+                # Percent-encoding of text is not available in SQL
+                elif isinstance(column_type, String) and not is_iri:
+                    part = literal_column(segment, String)
+                else:
+                    debug(f'Unable to push down rr:template {template}: '
+                          f'column {segment} is {column_type}')
+                    return None
+            # Literal segment
+            elif segment:
+                part = literal(segment, String)
+            else:
+                continue
+            expression = part if expression is None else expression + part
+
+        return expression
+
     def _add_natural_sql_datatypes(self, rules: Graph) -> Graph:
         """
         Add the natural SQL datatypes to the mapping rules.
@@ -329,7 +689,8 @@ class MappingCompiler():
         datatypes to the XSD namespace as explained in section 10.2.
 
         1. The referenced column names are inspected to retrieve the datatype
-           of each column.
+           of each column. A single row is sampled once per SQL query, all
+           ObjectMaps of the query share the sample.
         2. The SQL datatype is translated into a datatype of the XSD
            namespace.
         3. For each one, rr:datatype is added to the ObjectMap.
@@ -338,6 +699,7 @@ class MappingCompiler():
         Note: rr:object doesn't need to be handled since rr:object can never
         refer to a SQL column since it only can contain an rr:constant value
         """
+        samples: Dict[Tuple[str, str], Optional[Dict]] = {}
 
         for t in rules.triples((None, R2RML.objectMap, None)):
             pom, _, om = t
@@ -372,21 +734,24 @@ class MappingCompiler():
             column = _columns[0]
 
             # Access database to find datatype
+            key = (str(d2rq_jdbc), str(query))
+            if key not in samples:
+                samples[key] = self._sample_sql_query(*key)
+            result = samples[key]
+            if result is None:
+                warning(f'{query} returned 0 rows, skipping')
+                continue
+            # Column names of the limited query may differ in case from the
+            # column names of the query itself, e.g. in SQLite
+            if column not in result:
+                matches = [c for c in result if c.lower() == column.lower()]
+                if len(matches) == 1:
+                    column = matches[0]
             try:
-                with create_engine(d2rq_jdbc).connect() as connection:
-                    result = connection.execute(query).first()
-                    if result is None:
-                        warning(f'{query} returned 0 rows, skipping')
-                        continue
-                    result = dict(result)
-                    datatype = self._get_xsd_datatype(result[column])
+                datatype = self._get_xsd_datatype(result[column])
             except KeyError as e:
                 warning(f'Column doesn\'t exist: {e}')
                 continue
-            except (OperationalError, ArgumentError) as e:
-                msg = f'Unable to execute SQL query: {e}'
-                critical(msg)
-                raise ValueError(msg)
 
             # Add datatypes when not provided
             overide = rules.value(om, R2RML.datatype)
@@ -399,6 +764,97 @@ class MappingCompiler():
 
         return rules
 
+    def _sample_sql_query(self, d2rq_jdbc: str, query: str) -> Optional[Dict]:
+        """
+        Fetches only the first row of a SQL query.
+        The query is limited to a single row to not execute the whole query
+        at compile time. Queries which cannot be used as a subquery are
+        executed as is through a server-side cursor.
+        Returns None if the query has no results.
+        """
+        sample: Select = select([literal_column('*')]) \
+            .select_from(text(f'({query.strip().rstrip(";")}) '
+                              'AS rml_sample')) \
+            .limit(1)
+        try:
+            with get_engine(d2rq_jdbc).connect() as connection:
+                try:
+                    result = connection.execute(sample).first()
+                except DBAPIError as e:
+                    debug(f'Unable to limit {query}, sampling it as is: {e}')
+                    result = connection \
+                        .execution_options(stream_results=True) \
+                        .execute(query).first()
+        except (OperationalError, ArgumentError) as e:
+            msg = f'Unable to execute SQL query: {e}'
+            critical(msg)
+            raise ValueError(msg)
+        debug(f'Sampled {query}: {result}')
+        return dict(result) if result is not None else None
+
+    def _get_columns(self, d2rq_jdbc: str, table: str) \
+            -> List[Dict[str, Any]]:
+        """
+        Returns the columns of a SQL table as inspected by SQLAlchemy.
+        Each table is only inspected once, expired persisted schemas are
+        dropped when the cache is read.
+        """
+        key = (sha256(d2rq_jdbc.encode()).hexdigest(), table)
+        columns: List[Dict[str, Any]]
+        if key in self._schemas:
+            debug(f'Cached schema of {table}')
+            _, columns = self._schemas[key]
+            return columns
+
+        inspector: Inspector = inspect(get_engine(d2rq_jdbc))
+        columns = inspector.get_columns(table)
+        self._schemas[key] = (time(), columns)
+        self._schemas_changed = True
+        debug(f'Inspected schema of {table}')
+        return columns
+
+    def _read_schema_cache(self) -> None:
+        """
+        Reads the persisted schemas of SQL tables, expired schemas are
+        dropped.
+        """
+        if self._schema_cache is None:
+            return
+
+        try:
+            with open(self._schema_cache, 'rb') as f:
+                schemas = pickle.load(f)
+        except FileNotFoundError:
+            debug(f'No cached schemas at {self._schema_cache}')
+            return
+        except Exception as e:
+            warning(f'Unable to read cached schemas {self._schema_cache}: '
+                    f'{e}')
+            return
+
+        now = time()
+        self._schemas = {k: v for k, v in schemas.items()
+                         if now - v[0] < self._schema_ttl}
+        info(f'Read {len(self._schemas)} cached schemas from '
+             f'{self._schema_cache}')
+
+    def _write_schema_cache(self) -> None:
+        """
+        Persists the schemas of SQL tables if tables were inspected.
+        The cache file is replaced atomically to support concurrent runs.
+        """
+        if self._schema_cache is None or not self._schemas_changed:
+            return
+
+        directory = path.dirname(path.abspath(self._schema_cache))
+        makedirs(directory, exist_ok=True)
+        with NamedTemporaryFile(mode='wb', dir=directory,
+                                delete=False) as f:
+            pickle.dump(self._schemas, f, protocol=pickle.HIGHEST_PROTOCOL)
+        replace(f.name, self._schema_cache)
+        self._schemas_changed = False
+        info(f'Cached schemas at {self._schema_cache}')
+
     def _get_column_names(self, rules: Graph, subject: Union[URIRef, BNode],
                           no_iri: bool = False) -> List[str]:
         columns: List[str] = []
@@ -1,36 +1,181 @@
+import pickle
+from hashlib import sha256
 from logging import debug, info, warning, error, critical
 from itertools import product
+from os import makedirs, replace
+from os.path import join
+from tempfile import NamedTemporaryFile
 from rdflib import Graph
 from rdflib.term import URIRef, Literal, BNode, Identifier
-from typing import List, Optional, Union, Dict
+from typing import Any, Callable, List, Optional, Union, Dict, Tuple
 
 from rml.io.sources import LogicalSource, CSVLogicalSource, \
                            JSONLogicalSource, XMLLogicalSource, \
                            RDFLogicalSource, DCATLogicalSource, \
                            SQLLogicalSource, SPARQLXMLLogicalSource, \
                            SPARQLJSONLogicalSource, MIMEType, CSVColumn, \
-                           CSVWTrimMode
+                           CSVWTrimMode, SharedScan
+from rml.io.sources.sql_source import DEFAULT_PARTITIONS, DEFAULT_TUPLES
+from rml.io.sources.rdf_source import DEFAULT_PROCESSES
+from rml.io.sources.sparql_source import DEFAULT_WORKERS
 from rml.io.targets import LogicalTarget
 from rml.io.maps import TriplesMap, PredicateObjectMap, SubjectMap, \
-                        ObjectMap, PredicateMap, ReferenceType
+                        ObjectMap, PredicateMap, ReferenceType, RefObjectMap
 from rml.namespace import RML, R2RML, RDF, QL, D2RQ, SD, CSVW, DCAT, HYDRA, \
                           FORMATS
 from rml.io import MappingValidator, MappingCompiler
 from rml.io import RML_RULES_SHAPE
+from rml.io.mapping_compiler import DEFAULT_TEMPLATE_PUSHDOWN
+from rml import __version__
 
 
 class MappingReader:
-    def __init__(self, path: str) -> None:
+    def __init__(self, path: str, streaming: bool = False,
+                 cache_dir: Optional[str] = None,
+                 partitions: int = DEFAULT_PARTITIONS,
+                 template_pushdown: bool = DEFAULT_TEMPLATE_PUSHDOWN,
+                 page_size: Optional[int] = None,
+                 checkpoint_dir: Optional[str] = None,
+                 schema_cache: Optional[str] = None,
+                 tuples: bool = DEFAULT_TUPLES,
+                 rdf_store_dir: Optional[str] = None,
+                 rdf_processes: int = DEFAULT_PROCESSES,
+                 sparql_page_size: Optional[int] = None,
+                 sparql_workers: int = DEFAULT_WORKERS) -> None:
         """
         Creates a MappingReader to read RML rules
+
+        :param str path: The file path to the RML rules.
+        :param bool streaming: Read the data of the Logical Sources
+        incrementally when the Logical Source supports it.
+        :param str cache_dir: Directory to cache the validated and compiled
+        RML rules in. Repeated reads of unchanged RML rules skip parsing,
+        validation and compilation. The compiler inspects SQL databases, the
+        cache must be cleared when their schema changes.
+        :param int partitions: The number of key ranges SQL Logical Sources
+        are split into and read concurrently. Queries are split on the
+        integer primary key of the table they read, queries over multiple
+        tables are read without partitions. Use SQLLogicalSource directly to
+        split on another column. The partitions of a Logical Source are
+        mapped by its single TriplesMap: only the database reads overlap,
+        use the workers of the Logical Target to map TriplesMaps in
+        parallel.
+        :param bool template_pushdown: Let the database resolve rr:templates
+        over SQL columns.
+        :param int page_size: Read SQL Logical Sources in pages of this
+        number of rows with keyset pagination.
+        :param str checkpoint_dir: Directory to record the last page of
+        each SQL Logical Source of which the triples are written in, to
+        resume failed runs. A resumed run skips the pages written before the
+        failure, write its triples to the file of the failed run with
+        FileLogicalTarget(append=True). Logical Sources shared by TriplesMaps
+        executed in parallel are not checkpointed.
+        :param str schema_cache: File to persist the schemas of SQL tables
+        inspected by the compiler in across runs.
+        :param bool tuples: Read the rows of SQL Logical Sources as tuples,
+        Term Maps resolve their references to column indices once.
+        :param str rdf_store_dir: Directory to keep the parsed RDF data of
+        local RDF files in, later runs query the stored RDF data instead of
+        parsing the files again.
+        :param int rdf_processes: The number of processes streaming
+        N-Triples and N-Quads files.
+        :param int sparql_page_size: Read the results of SPARQL endpoints in
+        pages of this number of solutions.
+        :param int sparql_workers: The number of pages of a SPARQL endpoint
+        fetched concurrently.
         """
         self._graph: Graph = Graph()
         self._path: str = path
-        self._validator: MappingValidator = MappingValidator(RML_RULES_SHAPE)
-        self._compiler: MappingCompiler = MappingCompiler()
+        self._streaming: bool = streaming
+        self._partitions: int = partitions
+        self._template_pushdown: bool = template_pushdown
+        self._page_size: Optional[int] = page_size
+        self._checkpoint_dir: Optional[str] = checkpoint_dir
+        self._tuples: bool = tuples
+        self._rdf_store_dir: Optional[str] = rdf_store_dir
+        self._rdf_processes: int = rdf_processes
+        self._sparql_page_size: Optional[int] = sparql_page_size
+        self._sparql_workers: int = sparql_workers
+        self._cache_dir: Optional[str] = cache_dir
+        self._cache_path: Optional[str] = None
+        # Shared scans of Logical Sources, by source type, source and
+        # iterator or query
+        self._scans: Dict[Tuple[Any, ...], SharedScan] = {}
+        # Parsed JSON and XML files shared between Logical Sources, by path
+        self._json_documents: Dict[str, Any] = {}
+        self._xml_documents: Dict[str, Any] = {}
+
+        if self._cache_dir is not None:
+            self._cache_path = join(self._cache_dir,
+                                    f'{self._cache_key()}.pickle')
+            if self._read_cache():
+                return
+
+        validator: MappingValidator = MappingValidator(RML_RULES_SHAPE)
+        compiler: MappingCompiler = MappingCompiler(template_pushdown,
+                                                    schema_cache)
         self._read()
-        self._validator.validate(self.rules)
-        self._compiler.compile(self.rules)
+        validator.validate(self.rules)
+        compiler.compile(self.rules)
+        self._write_cache()
+
+    def _cache_key(self) -> str:
+        """
+        Hashes the RML rules, the RML rules shape, the processor version and
+        the compiler options.
+        """
+        key = sha256()
+        for path in [self._path, RML_RULES_SHAPE]:
+            try:
+                with open(path, 'rb') as f:
+                    key.update(f.read())
+            except FileNotFoundError:
+                msg = f'Unable to open {path}'
+                critical(msg)
+                raise FileNotFoundError(msg)
+        key.update(__version__.encode())
+        key.update(str(self._template_pushdown).encode())
+        return key.hexdigest()
+
+    def _read_cache(self) -> bool:
+        """
+        Reads the compiled RML rules from the cache.
+        Returns False if the RML rules are not cached.
+        """
+        if self._cache_path is None:
+            return False
+
+        try:
+            with open(self._cache_path, 'rb') as f:
+                for triple in pickle.load(f):
+                    self._graph.add(triple)
+        except FileNotFoundError:
+            debug(f'No cached RML rules at {self._cache_path}')
+            return False
+        except Exception as e:
+            warning(f'Unable to read cached RML rules {self._cache_path}: '
+                    f'{e}')
+            self._graph = Graph()
+            return False
+
+        info(f'Read cached RML rules from {self._cache_path}')
+        return True
+
+    def _write_cache(self) -> None:
+        """
+        Writes the compiled RML rules to the cache.
+        The cache file is replaced atomically to support concurrent runs.
+        """
+        if self._cache_dir is None or self._cache_path is None:
+            return
+
+        makedirs(self._cache_dir, exist_ok=True)
+        with NamedTemporaryFile(mode='wb', dir=self._cache_dir,
+                                delete=False) as f:
+            pickle.dump(list(self._graph), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        replace(f.name, self._cache_path)
+        info(f'Cached RML rules at {self._cache_path}')
 
     def _read(self) -> None:
         """
@@ -60,6 +205,10 @@ class MappingReader:
                                        object=R2RML.TriplesMap):
             tm_list.append(self._resolve_triples_map(tm))
             info(f'Resolved TriplesMap: {tm}')
+
+        # Parsed files are only kept by the Logical Sources iterating them
+        self._json_documents.clear()
+        self._xml_documents.clear()
         return tm_list
 
     def _resolve_triples_map(self, tm: URIRef) -> TriplesMap:
@@ -91,7 +240,15 @@ class MappingReader:
 
         return resolved_tm
 
-    def _resolve_logical_source(self, ls: URIRef) -> LogicalSource:
+    def _resolve_logical_source(self, ls: URIRef, shared: bool = True) \
+            -> LogicalSource:
+        """
+        Resolves a Logical Source.
+        Logical Sources with the same source, reference formulation and
+        iterator or query share a single scan if shared is True. Other
+        Logical Sources over the same JSON or XML file share the parsed
+        file when it is not streamed.
+        """
         info(f'Logical Source: {ls}')
 
         rml_source_type: URIRef = None
@@ -274,15 +431,32 @@ class MappingReader:
                 info(f'CSVW header & dialect configuration: {config}')
 
                 # Expand config dictionary to arguments
-                return CSVLogicalSource(rml_source, **config)
-            # JSON file
+                return self._share((_rml_source, rml_reference_formulation),
+                                   lambda: CSVLogicalSource(rml_source,
+                                                            **config),
+                                   shared)
+            # JSON file, streamed records are read once per TriplesMap: a
+            # shared scan would buffer the whole file for lagging consumers
+            # and streamed XML elements are cleared after they are read
             elif rml_reference_formulation == QL.JSONPath:
                 debug('Local JSON file')
-                return JSONLogicalSource(rml_iterator, rml_source)
+                return self._share((_rml_source, rml_reference_formulation,
+                                    rml_iterator),
+                                   lambda: JSONLogicalSource(
+                                       rml_iterator, rml_source,
+                                       streaming=self._streaming,
+                                       documents=self._json_documents),
+                                   shared and not self._streaming)
             # XML file
             elif rml_reference_formulation == QL.XPath:
                 debug('Local XML file')
-                return XMLLogicalSource(rml_iterator, rml_source)
+                return self._share((_rml_source, rml_reference_formulation,
+                                    rml_iterator),
+                                   lambda: XMLLogicalSource(
+                                       rml_iterator, rml_source,
+                                       streaming=self._streaming,
+                                       documents=self._xml_documents),
+                                   shared and not self._streaming)
             # Unknown local file
             else:  # pragma: no cover
                 msg = 'Unknown RML reference formulation: '
@@ -320,7 +494,23 @@ class MappingReader:
 
             # Mapping validator enforces rr:tableName or rml:query
             # Mapping compiler translates rr:tableName to rml:query
-            return SQLLogicalSource(d2rq_jdbc_DSN, query=rml_query.toPython())
+            query: str = rml_query.toPython()
+            checkpoint: Optional[str] = None
+            if self._checkpoint_dir is not None:
+                makedirs(self._checkpoint_dir, exist_ok=True)
+                key = sha256(f'{d2rq_jdbc_DSN} {query}'.encode()).hexdigest()
+                checkpoint = join(self._checkpoint_dir, f'{key}.json')
+
+            def create_sql_source() -> LogicalSource:
+                return SQLLogicalSource(d2rq_jdbc_DSN, query=query,
+                                        streaming=self._streaming,
+                                        partitions=self._partitions,
+                                        page_size=self._page_size,
+                                        checkpoint=checkpoint,
+                                        tuples=self._tuples)
+
+            return self._share((rml_source_type, d2rq_jdbc_DSN, query),
+                               create_sql_source, shared)
 
         # SPARQL endpoint
         elif rml_source_type == SD.Service:
@@ -342,11 +532,16 @@ class MappingReader:
             if sd_result_format == FORMATS.SPARQL_Results_JSON:
                 return SPARQLJSONLogicalSource(rml_iterator,
                                                sd_endpoint,
-                                               rml_query.toPython())
+                                               rml_query.toPython(),
+                                               self._sparql_page_size,
+                                               self._sparql_workers,
+                                               self._streaming)
             elif sd_result_format == FORMATS.SPARQL_Results_XML:
                 return SPARQLXMLLogicalSource(rml_iterator,
                                               sd_endpoint,
-                                              rml_query.toPython())
+                                              rml_query.toPython(),
+                                              self._sparql_page_size,
+                                              self._sparql_workers)
             else:  # pragma: no cover
                 msg = 'SPARQL results format not implemented, see Gitlab '
                 'issue #31'
@@ -378,8 +573,15 @@ class MappingReader:
             # iterating over RDF sources
             if rml_iterator == '':
                 rml_iterator = rml_query
-            return DCATLogicalSource(dcat_download_url, dcat_media_type,
-                                     rml_iterator)
+            return self._share((rml_source_type, dcat_download_url,
+                                dcat_media_type, rml_iterator),
+                               lambda: DCATLogicalSource(
+                                   dcat_download_url, dcat_media_type,
+                                   rml_iterator,
+                                   store_dir=self._rdf_store_dir,
+                                   streaming=self._streaming,
+                                   processes=self._rdf_processes),
+                               shared)
         else:  # pragma: no cover
             msg = f'Unknown Logical Source description: {ls}. This '
             'should be catched by the shape validation! Report this as an '
@@ -387,6 +589,23 @@ class MappingReader:
             critical(msg)
             raise ValueError(msg)
 
+    def _share(self, key: Tuple[Any, ...],
+               factory: Callable[[], LogicalSource],
+               shared: bool) -> LogicalSource:
+        """
+        Returns a consumer of the shared scan of the Logical Source with the
+        given key, the scan is created with the factory on first use.
+        Returns a Logical Source of its own if shared is False.
+        """
+        if not shared:
+            return factory()
+
+        scan: Optional[SharedScan] = self._scans.get(key)
+        if scan is None:
+            scan = SharedScan(factory)
+            self._scans[key] = scan
+        return scan.view()
+
     def _resolve_predicate_object_map(self, pom: URIRef, mime_type: MIMEType) \
             -> List[PredicateObjectMap]:
         debug(f'Predicate Object Map: {pom}')
@@ -441,8 +660,13 @@ class MappingReader:
             raise ValueError(msg)
 
     def _resolve_object_map(self, om: URIRef, mime_type: MIMEType) \
-            -> ObjectMap:
+            -> Union[ObjectMap, RefObjectMap]:
         debug(f'\tObject Map: {om}')
+        rr_parent_triples_map = self._graph.value(om, R2RML.parentTriplesMap)
+        if rr_parent_triples_map is not None:
+            return self._resolve_ref_object_map(om, rr_parent_triples_map,
+                                                mime_type)
+
         rr_template = self._graph.value(om, R2RML.template)
         rml_reference = self._graph.value(om, RML.reference)
         rr_constant = self._graph.value(om, R2RML.constant)
@@ -513,6 +737,36 @@ class MappingReader:
             critical(msg)
             raise ValueError(msg)
 
+    def _resolve_ref_object_map(self, om: URIRef, parent_tm: URIRef,
+                                mime_type: MIMEType) -> RefObjectMap:
+        debug(f'\tReferencing Object Map: {om}')
+        debug(f'\t\tParent Triples Map: {parent_tm}')
+        parent_ls: URIRef = self._graph.value(parent_tm, RML.logicalSource)
+        parent_sm: URIRef = self._graph.value(parent_tm, R2RML.subjectMap)
+
+        join_conditions: List[Tuple[str, str]] = []
+        for jc in self._graph.objects(om, R2RML.joinCondition):
+            rr_child: str = self._graph.value(jc, R2RML.child).toPython()
+            rr_parent: str = self._graph.value(jc, R2RML.parent).toPython()
+            join_conditions.append((rr_child, rr_parent))
+        debug(f'\t\tJoin conditions: {join_conditions}')
+
+        # Without join conditions, the parent Subject Map is resolved with the
+        # records of the child Logical Source
+        if not join_conditions:
+            return RefObjectMap(self._resolve_subject_map(parent_sm,
+                                                          mime_type),
+                                mime_type)
+
+        # The parent Logical Source is read separately to build the join index,
+        # a shared scan would buffer the whole parent Logical Source
+        parent_source: LogicalSource = \
+            self._resolve_logical_source(parent_ls, shared=False)
+        parent_subject_map: SubjectMap = \
+            self._resolve_subject_map(parent_sm, parent_source.mime_type)
+        return RefObjectMap(parent_subject_map, mime_type, parent_source,
+                            join_conditions)
+
     def _resolve_predicate_map(self, pm: URIRef, mime_type: MIMEType) \
             -> PredicateMap:
         debug(f'\tPredicate Map: {pm}')
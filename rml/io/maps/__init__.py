@@ -1,14 +1,15 @@
 import re
+from functools import lru_cache
 from logging import debug, warning, critical
 from urllib.parse import quote
 from abc import ABC, abstractmethod
 from enum import Enum, unique
 from rdflib.term import Identifier
 from jsonpath_ng import parse, JSONPath
-from jsonpath_ng.parser import JsonPathParser
 from lxml import etree
 from lxml.etree import Element
-from typing import List, Union, Dict, Optional, cast
+from typing import List, Union, Dict, Optional, Any, Callable, Tuple, \
+                   cast
 
 from rml.namespace import R2RML, RML
 from rml.namespace.xmls import SPARQL_RESULTS_PREFIX, SPARQL_RESULTS_NS
@@ -16,9 +17,41 @@ from rml.io.sources import MIMEType
 
 JSONPATH_SPLIT_PATTERN = re.compile(r'\$|\.|\[|\]|\(|\)|\@|\*')
 URITEMPLATE_PATTERN = re.compile(r'\{(.*?)\}')
+# Trivial references resolved without JSONPath/XPath: name, $.a.b, ./name
+SIMPLE_JSONPATH_PATTERN = re.compile(r'^(\$\.)?[A-Za-z_][A-Za-z0-9_\-]*'
+                                     r'(\.[A-Za-z_][A-Za-z0-9_\-]*)*$')
+SIMPLE_XPATH_PATTERN = re.compile(r'^(\./)?[A-Za-z_][A-Za-z0-9_\-]*$')
+JSONPATH_RESERVED_WORDS = ('where',)
+XML_MIME_TYPES = (MIMEType.APPLICATION_XML, MIMEType.TEXT_XML)
+# Key-Value reference formulations, tabular data has fixed columns
+KEY_VALUE_MIME_TYPES = (MIMEType.CSV, MIMEType.TSV, MIMEType.SQL,
+                        MIMEType.JSON_LD, MIMEType.N3, MIMEType.NQUADS,
+                        MIMEType.NTRIPLES, MIMEType.RDF_XML, MIMEType.TRIG,
+                        MIMEType.TRIX, MIMEType.TURTLE)
+TABULAR_MIME_TYPES = (MIMEType.CSV, MIMEType.TSV, MIMEType.SQL)
 NS = {SPARQL_RESULTS_PREFIX: SPARQL_RESULTS_NS}
 
 
+@lru_cache(maxsize=None)
+def compile_jsonpath(reference: str) -> JSONPath:
+    """
+    Compiles a JSONPath reference once, the compiled JSONPath expression is
+    shared between all Term Maps.
+    """
+    debug(f'Compiling JSONPath: {reference}')
+    return parse(reference)
+
+
+@lru_cache(maxsize=None)
+def compile_xpath(reference: str) -> etree.XPath:
+    """
+    Compiles an XPath reference once, the compiled XPath expression is shared
+    between all Term Maps.
+    """
+    debug(f'Compiling XPath: {reference}')
+    return etree.XPath(reference, namespaces=NS)
+
+
 @unique
 class ReferenceType(Enum):
     CONSTANT = R2RML.constant
@@ -36,153 +69,319 @@ class TermMap(ABC):
         self._term: str = term
         self._reference_type: ReferenceType = reference_type
         self._mime_type: MIMEType = reference_formulation
+        # Resolver and normalized references are selected once
+        self._resolver: Callable[[str, Any], str] = self._select_resolver()
+        self._reference: str = self._term
+        if self._reference_type == ReferenceType.REFERENCE:
+            self._reference = self._normalize_reference(self._term)
+        # Templates are parsed once into literal segments and variables
+        self._template: List[str] = []
+        self._template_is_iri: bool = False
+        if self._reference_type == ReferenceType.TEMPLATE:
+            self._compile_template()
+        # Trivial references are resolved with plain dict or child access
+        self._simple_references: Dict[str, Union[List[str], str]] = {}
+        self._compile_simple_references()
+        # Column index of each reference when resolving tuple records
+        self._column_indices: Dict[str, int] = {}
         debug(f'Term: {self._term}')
         debug(f'Term type: {self._reference_type}')
         debug(f'MIME type: {self._mime_type}')  # Gitlab bug
         debug(f'Term Map initialization complete')
 
     @abstractmethod
-    def resolve(self, data: Union[Element, Dict]) -> Identifier:
+    def resolve(self, data: Union[Element, Dict, Tuple]) -> Identifier:
         """
         Resolve the given term as RDF IRI or RDF Literal.
         """
 
-    def _resolve_template(self, data: Union[Element, Dict]) -> str:
+    def bind_columns(self, columns: List[str]) -> None:
         """
-        Resolves a string template.
+        Resolves the references of this Term Map to the indices of the given
+        columns once, records are resolved as tuples afterwards.
         """
-        term: str = self._term
-        variables: List[str] = URITEMPLATE_PATTERN.findall(self._term)
+        references: List[str] = []
+        if self._reference_type == ReferenceType.REFERENCE:
+            references = [self._reference]
+        elif self._reference_type == ReferenceType.TEMPLATE:
+            references = self._template[1::2]
 
-        if variables:
-            debug(f'Variables: {variables} from {self._term}')
-            for v in variables:
-                var: str = str(v)
-                resolved_var: str = self._resolve_reference(var, data)
-                var = '{' + var + '}'
+        # Unknown columns are reported when resolving a record
+        self._column_indices = {r: columns.index(r) for r in references
+                                if r in columns}
+        self._resolver = self._resolve_column
+        debug(f'Column indices: {self._column_indices}')
 
-                # Precent encoding of each term if rr:termType is rr:IRI
-                if self._term.startswith('http://') or \
-                        self._term.startswith('https://'):
-                    resolved_var = quote(resolved_var)
+    def resolve_value(self, data: Union[Element, Dict, Tuple]) -> str:
+        """
+        Resolves the given term as string without creating an RDF term.
+        """
+        if self._reference_type == ReferenceType.TEMPLATE:
+            return self._resolve_template(data)
+        elif self._reference_type == ReferenceType.REFERENCE:
+            return self._resolver(self._reference, data)
+        return str(self._term)
 
-                term = term.replace(var, resolved_var)
-                debug(f'Replaced {var} with {resolved_var}')
-        else:
+    def _compile_template(self) -> None:
+        """
+        Splits a string template into literal segments and variables.
+        Literal segments are at the even indices, variables at the odd
+        indices: 'http://ex.com/{id}/{name}' becomes
+        ['http://ex.com/', 'id', '/', 'name', ''].
+        """
+        self._template = URITEMPLATE_PATTERN.split(self._term)
+        for i in range(1, len(self._template), 2):
+            self._template[i] = self._normalize_reference(self._template[i])
+        # Precent encoding of each variable if rr:termType is rr:IRI
+        self._template_is_iri = self._term.startswith('http://') or \
+            self._term.startswith('https://')
+        debug(f'Template: {self._template}')
+
+    def _compile_simple_references(self) -> None:
+        """
+        Detects the references of this Term Map which do not need the
+        JSONPath or XPath engine: dotted JSON field names such as
+        'address.city' or '$.id' and XML child element names such as 'name'.
+        """
+        references: List[str] = []
+        if self._reference_type == ReferenceType.REFERENCE:
+            references = [self._reference]
+        elif self._reference_type == ReferenceType.TEMPLATE:
+            references = self._template[1::2]
+
+        for reference in references:
+            if self._mime_type == MIMEType.JSON and \
+                    SIMPLE_JSONPATH_PATTERN.match(reference):
+                path: str = reference[2:] if reference.startswith('$.') \
+                    else reference
+                keys: List[str] = path.split('.')
+                if not any(k in JSONPATH_RESERVED_WORDS for k in keys):
+                    self._simple_references[reference] = keys
+            elif (self._mime_type == MIMEType.APPLICATION_XML or
+                  self._mime_type == MIMEType.TEXT_XML) and \
+                    SIMPLE_XPATH_PATTERN.match(reference):
+                self._simple_references[reference] = \
+                    reference[2:] if reference.startswith('./') else reference
+        debug(f'Simple references: {self._simple_references}')
+
+    def _resolve_template(self, data: Union[Element, Dict, Tuple]) -> str:
+        """
+        Resolves a string template.
+        """
+        if len(self._template) < 2:
             msg = f'Template is empty: {self._term}'
             critical(msg)
             raise NameError(msg)
 
+        resolver = self._resolver
+        segments: List[str] = self._template.copy()
+        for i in range(1, len(segments), 2):
+            resolved_var: str = resolver(segments[i], data)
+            if self._template_is_iri:
+                resolved_var = quote(resolved_var)
+            segments[i] = resolved_var
+
+        term: str = ''.join(segments)
         debug(f'Resolved template: {term}')
         return term
 
     def _resolve_reference(self, reference: str,
-                           data: Union[Element, Dict]) -> str:
+                           data: Union[Element, Dict, Tuple]) -> str:
         """
         Resolves a reference.
         """
-        # XPath reference (XML)
-        if self._mime_type == MIMEType.APPLICATION_XML or \
-           self._mime_type == MIMEType.TEXT_XML:
-            xml: str
-            try:
-                xml_ref: Element = cast(Element, data).xpath(reference,
-                                                             namespaces=NS)[0]
-                value_xml: str = str(xml_ref.text)
-                # No result: empty string
-                if not value_xml.strip():
-                    xml = etree.tostring(cast(Element, data),
-                                         pretty_print=True)
-                    msg = f'Reference {reference} not found in {xml}'
-                    warning(msg)
-                    raise ResourceWarning(msg)
-                return value_xml
-            # Avoid catching ResourceWarning as Exception below
-            except ResourceWarning as w:
-                raise w
-            # No result: reference 0 results
-            except IndexError:
-                xml = etree.tostring(cast(Element, data), pretty_print=True)
+        return self._resolver(self._normalize_reference(reference), data)
+
+    def _select_resolver(self) -> Callable[[str, Any], str]:
+        """
+        Selects the reference resolver for the MIME type of this Term Map.
+        """
+        if self._mime_type in XML_MIME_TYPES:
+            return self._resolve_xpath
+        elif self._mime_type == MIMEType.JSON:
+            return self._resolve_jsonpath
+        elif self._mime_type in KEY_VALUE_MIME_TYPES:
+            return self._resolve_key_value
+        return self._resolve_unknown
+
+    def _normalize_reference(self, reference: str) -> str:
+        """
+        Normalizes a reference for the resolver of this Term Map.
+        """
+        # Strip quoting SQL dialects
+        if self._mime_type in KEY_VALUE_MIME_TYPES:
+            reference = reference.strip('\"')  # PostgreSQL
+            reference = reference.strip('`')  # MySQL
+            reference = reference.strip('[').strip(']')  # MSSQL
+        return reference
+
+    def _resolve_xpath(self, reference: str, data: Element) -> str:
+        """
+        Resolves an XPath reference (XML).
+        """
+        xml: str
+        if reference in self._simple_references:
+            return self._resolve_simple_xpath(
+                reference, cast(str, self._simple_references[reference]),
+                data)
+        try:
+            xpath: etree.XPath = compile_xpath(reference)
+            xml_ref: Element = xpath(data)[0]
+            value_xml: str = str(xml_ref.text)
+            # No result: empty string
+            if not value_xml.strip():
+                xml = etree.tostring(data, pretty_print=True)
                 msg = f'Reference {reference} not found in {xml}'
                 warning(msg)
                 raise ResourceWarning(msg)
-            # Syntax error in XPath
-            except Exception as e:
-                msg = f'Reference {reference} invalid XPath: {e}'
-                raise NameError(msg)
-        # JSONPath reference (JSON)
-        elif self._mime_type == MIMEType.JSON:
-            try:
-                # JSONPath module cannot deal with spaces without escaping them
-                reference = self._escape_spaces_jsonpath(reference)
-                jsonpath: JsonPathParser = parse(reference)
-                json_ref: JSONPath = jsonpath.find(cast(Dict, data))
-                json_ref = json_ref[0]
-                value_json = json_ref.value
-                # No result: value is None
-                if value_json is None:
-                    msg = f'Reference {reference} is None in {data}'
-                    warning(msg)
-                    raise ResourceWarning(msg)
-                return str(value_json)
-            # Avoid catching ResourceWarning as Exception below
-            except ResourceWarning as w:
-                raise w
-            # No result: reference 0 results
-            except IndexError:
-                msg = f'Reference {reference} not found in {data}'
+            return value_xml
+        # Avoid catching ResourceWarning as Exception below
+        except ResourceWarning as w:
+            raise w
+        # No result: reference 0 results
+        except IndexError:
+            xml = etree.tostring(data, pretty_print=True)
+            msg = f'Reference {reference} not found in {xml}'
+            warning(msg)
+            raise ResourceWarning(msg)
+        # Syntax error in XPath
+        except Exception as e:
+            msg = f'Reference {reference} invalid XPath: {e}'
+            raise NameError(msg)
+
+    def _resolve_jsonpath(self, reference: str, data: Dict) -> str:
+        """
+        Resolves a JSONPath reference (JSON).
+        """
+        if reference in self._simple_references:
+            return self._resolve_simple_jsonpath(
+                reference, cast(List[str], self._simple_references[reference]),
+                data)
+        try:
+            # JSONPath module cannot deal with spaces without escaping them
+            reference = self._escape_spaces_jsonpath(reference)
+            jsonpath: JSONPath = compile_jsonpath(reference)
+            json_ref: JSONPath = jsonpath.find(data)
+            json_ref = json_ref[0]
+            value_json = json_ref.value
+            # No result: value is None
+            if value_json is None:
+                msg = f'Reference {reference} is None in {data}'
                 warning(msg)
                 raise ResourceWarning(msg)
-            # Syntax error in JSONPath
-            except Exception as e:
-                msg = f'Reference {reference} invalid JSONPath: {e}'
+            return str(value_json)
+        # Avoid catching ResourceWarning as Exception below
+        except ResourceWarning as w:
+            raise w
+        # No result: reference 0 results
+        except IndexError:
+            msg = f'Reference {reference} not found in {data}'
+            warning(msg)
+            raise ResourceWarning(msg)
+        # Syntax error in JSONPath
+        except Exception as e:
+            msg = f'Reference {reference} invalid JSONPath: {e}'
+            critical(msg)
+            raise NameError(msg)
+
+    def _resolve_key_value(self, reference: str, data: Dict) -> str:
+        """
+        Resolves a normalized Key-Value reference (CSV, TSV, SQL, RDF,
+        SPARQL, Hydra, ...).
+        """
+        try:
+            value_kv = data[reference]
+            # No result: value is None
+            if value_kv is None:
+                msg = f'Reference {reference} is None in {data}'
+                warning(msg)
+                raise ResourceWarning(msg)
+            return str(value_kv)
+        # No result: column not in row
+        except KeyError as e:
+            # Tabular data: fixed columns. Column not available, raise
+            # error to stop the execution
+            if self._mime_type in TABULAR_MIME_TYPES:
+                msg = f'Reference {reference} not found in {data}'
                 critical(msg)
                 raise NameError(msg)
+            # Other data: unfixed data schema. Reference not available,
+            # raise warning to ignore the triple
+            else:
+                msg = f'Reference {reference} not found in {data}'
+                warning(msg)
+                raise ResourceWarning(msg)
 
-        # Key-Value reference (CSV, TSV, SQL, RDF, SPARQL, Hydra, ...)
-        elif self._mime_type == MIMEType.CSV or \
-                self._mime_type == MIMEType.TSV or \
-                self._mime_type == MIMEType.SQL or \
-                self._mime_type == MIMEType.JSON_LD or \
-                self._mime_type == MIMEType.N3 or \
-                self._mime_type == MIMEType.NQUADS or \
-                self._mime_type == MIMEType.NTRIPLES or \
-                self._mime_type == MIMEType.RDF_XML or \
-                self._mime_type == MIMEType.TRIG or \
-                self._mime_type == MIMEType.TRIX or \
-                self._mime_type == MIMEType.TURTLE:
-            try:
-                # Strip quoting SQL dialects
-                reference = reference.strip('\"')  # PostgreSQL
-                reference = reference.strip('`')  # MySQL
-                reference = reference.strip('[').strip(']')  # MSSQL
-                value_kv = cast(Dict, data)[reference]
-                # No result: value is None
-                if value_kv is None:
-                    msg = f'Reference {reference} is None in {data}'
-                    warning(msg)
-                    raise ResourceWarning(msg)
-                return str(value_kv)
-            # No result: column not in row
-            except KeyError as e:
-                # Tabular data: fixed columns. Column not available, raise
-                # error to stop the execution
-                if self._mime_type == MIMEType.CSV or \
-                        self._mime_type == MIMEType.TSV or \
-                        self._mime_type == MIMEType.SQL:
-                    msg = f'Reference {reference} not found in {data}'
-                    critical(msg)
-                    raise NameError(msg)
-                # Other data: unfixed data schema. Reference not available,
-                # raise warning to ignore the triple
-                else:
-                    msg = f'Reference {reference} not found in {data}'
-                    warning(msg)
-                    raise ResourceWarning(msg)
-        else:
-            msg = f'Unknown MIMEType: {self._mime_type}'
+    def _resolve_column(self, reference: str, data: Tuple) -> str:
+        """
+        Resolves a normalized reference to a column of a tuple record (SQL).
+        """
+        index: Optional[int] = self._column_indices.get(reference)
+        # No result: column not in row, tabular data has fixed columns
+        if index is None:
+            msg = f'Reference {reference} not found in {data}'
             critical(msg)
-            raise ValueError(msg)
+            raise NameError(msg)
+
+        value = data[index]
+        # No result: value is None
+        if value is None:
+            msg = f'Reference {reference} is None in {data}'
+            warning(msg)
+            raise ResourceWarning(msg)
+        return str(value)
+
+    def _resolve_unknown(self, reference: str,
+                         data: Union[Element, Dict, Tuple]) -> str:
+        """
+        Raises a ValueError, the MIME type of this Term Map is unknown.
+        """
+        msg = f'Unknown MIMEType: {self._mime_type}'
+        critical(msg)
+        raise ValueError(msg)
+
+    def _resolve_simple_xpath(self, reference: str, tag: str,
+                              data: Element) -> str:
+        """
+        Resolves a reference to a child element without XPath.
+        """
+        xml_ref: Optional[Element] = next(data.iterchildren(tag), None)
+        # No result: reference 0 results
+        if xml_ref is None:
+            xml = etree.tostring(data, pretty_print=True)
+            msg = f'Reference {reference} not found in {xml}'
+            warning(msg)
+            raise ResourceWarning(msg)
+
+        value_xml: str = str(xml_ref.text)
+        # No result: empty string
+        if not value_xml.strip():
+            xml = etree.tostring(data, pretty_print=True)
+            msg = f'Reference {reference} not found in {xml}'
+            warning(msg)
+            raise ResourceWarning(msg)
+        return value_xml
+
+    def _resolve_simple_jsonpath(self, reference: str, keys: List[str],
+                                 data: Dict) -> str:
+        """
+        Resolves a reference to a (nested) JSON field without JSONPath.
+        """
+        value_json: Any = data
+        for key in keys:
+            # No result: reference 0 results
+            if not isinstance(value_json, dict) or key not in value_json:
+                msg = f'Reference {reference} not found in {data}'
+                warning(msg)
+                raise ResourceWarning(msg)
+            value_json = value_json[key]
+
+        # No result: value is None
+        if value_json is None:
+            msg = f'Reference {reference} is None in {data}'
+            warning(msg)
+            raise ResourceWarning(msg)
+        return str(value_json)
 
     def _escape_spaces_jsonpath(self, path: str) -> str:
         if ' ' in path:
@@ -195,5 +394,6 @@ class TermMap(ABC):
 from rml.io.maps.subject_map import SubjectMap  # nopep8
 from rml.io.maps.predicate_map import PredicateMap  # nopep8
 from rml.io.maps.object_map import ObjectMap  # nopep8
+from rml.io.maps.ref_object_map import RefObjectMap  # nopep8
 from rml.io.maps.predicate_object_map import PredicateObjectMap  # nopep8
 from rml.io.maps.triples_map import TriplesMap  # nopep8
@@ -2,7 +2,7 @@ from logging import debug, critical
 from rdflib import Namespace
 from rdflib.term import URIRef, Literal, Identifier
 from jsonpath_ng import parse
-from typing import Union, Dict, Optional
+from typing import Union, Dict, Optional, Tuple
 from lxml.etree import Element
 
 from . import TermMap, ReferenceType
@@ -27,7 +27,7 @@ class ObjectMap(TermMap):
         debug(f'Is IRI?: {self._is_iri}')
         debug('ObjectMap initialization complete')
 
-    def resolve(self, data: Union[Element, Dict]) -> Identifier:
+    def resolve(self, data: Union[Element, Dict, Tuple]) -> Identifier:
         """
         Resolves an object into an RDF Identifier.
         """
@@ -40,7 +40,7 @@ class ObjectMap(TermMap):
             return self._handle_literal(resolved_term)
         # RML reference
         elif self._reference_type == ReferenceType.REFERENCE:
-            resolved_term = super()._resolve_reference(self._term, data)
+            resolved_term = self._resolver(self._reference, data)
             if self._is_iri:
                 return URIRef(resolved_term)
             return self._handle_literal(resolved_term)
@@ -1,7 +1,7 @@
 from logging import debug, critical
 from rdflib.term import URIRef, Identifier
 from jsonpath_ng import parse
-from typing import Union, Dict
+from typing import Union, Dict, Tuple
 from lxml.etree import Element
 
 from . import TermMap, ReferenceType
@@ -17,14 +17,14 @@ class PredicateMap(TermMap):
         super().__init__(term, reference_type, mime_type)
         debug('PredicateMap initialization complete')
 
-    def resolve(self, data: Union[Element, Dict]) -> Identifier:
+    def resolve(self, data: Union[Element, Dict, Tuple]) -> Identifier:
         """
         Resolves a predicate into an RDF Identifier.
         """
         if self._reference_type == ReferenceType.TEMPLATE:
             return URIRef(super()._resolve_template(data))
         elif self._reference_type == ReferenceType.REFERENCE:
-            return URIRef(super()._resolve_reference(self._term, data))
+            return URIRef(self._resolver(self._reference, data))
         elif self._reference_type == ReferenceType.CONSTANT:
             return URIRef(self._term)
         else:
@@ -1,13 +1,14 @@
 from logging import debug
-from typing import Union, Dict, Optional
+from typing import Union, Dict, Optional, List, Tuple, cast
 from lxml.etree import Element
 from rdflib.term import Identifier, URIRef
 
-from rml.io.maps import PredicateMap, ObjectMap
+from rml.io.maps import PredicateMap, ObjectMap, RefObjectMap
 
 
 class PredicateObjectMap:
-    def __init__(self, predicate_map: PredicateMap, object_map: ObjectMap,
+    def __init__(self, predicate_map: PredicateMap,
+                 object_map: Union[ObjectMap, RefObjectMap],
                  rr_graph: Optional[URIRef] = None) -> None:
         """
         Creates a PredicateObjectMap
@@ -15,12 +16,13 @@ class PredicateObjectMap:
         self._predicate_map = predicate_map
         self._object_map = object_map
         self._rr_graph = rr_graph
+        self._is_join: bool = isinstance(object_map, RefObjectMap)
         debug(f'PredicateMap: {self._predicate_map}')
         debug(f'ObjectMap: {self._object_map}')
         debug(f'Named graph: {self._rr_graph}')
         debug('PredicateObjectMap initialization complete')
 
-    def resolve(self, data: Union[Element, Dict]) \
+    def resolve(self, data: Union[Element, Dict, Tuple]) \
             -> Union[Identifier, Identifier, URIRef]:
         """
         Resolves the predicate and object maps with the given data record.
@@ -28,3 +30,28 @@ class PredicateObjectMap:
         pred = self._predicate_map.resolve(data)
         obj = self._object_map.resolve(data)
         return pred, obj, self._rr_graph
+
+    def bind_columns(self, columns: List[str]) -> None:
+        """
+        Resolves the references of the predicate and object maps to the
+        indices of the given columns of tuple records.
+        """
+        self._predicate_map.bind_columns(columns)
+        self._object_map.bind_columns(columns)
+
+    @property
+    def is_join(self) -> bool:
+        """
+        Returns True if the objects are the subjects of a parent TriplesMap.
+        """
+        return self._is_join
+
+    def resolve_join(self, data: Union[Element, Dict, Tuple]) \
+            -> List[Tuple[Identifier, Identifier, URIRef]]:
+        """
+        Resolves the predicate and the Referencing Object Map with the given
+        data record, an object is resolved for each joined parent subject.
+        """
+        pred = self._predicate_map.resolve(data)
+        objs = cast(RefObjectMap, self._object_map).resolve(data)
+        return [(pred, obj, self._rr_graph) for obj in objs]
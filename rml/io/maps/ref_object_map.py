@@ -0,0 +1,192 @@
+import json
+import sqlite3
+from logging import debug, info, warning, critical
+from rdflib.term import URIRef, BNode, Identifier
+from typing import Union, Dict, List, Tuple, Optional
+from lxml.etree import Element
+
+from . import ReferenceType
+from rml.io.maps.subject_map import SubjectMap
+from rml.io.maps.object_map import ObjectMap
+from rml.io.sources import LogicalSource, MIMEType
+
+# Number of parent subjects kept in memory before the join index is spilled
+# to a temporary database on disk
+DEFAULT_MEMORY_LIMIT: int = 1000000
+# Number of parent subjects written at once to the temporary database
+SPILL_BATCH_SIZE: int = 10000
+
+
+class RefObjectMap:
+    def __init__(self, parent_subject_map: SubjectMap, mime_type: MIMEType,
+                 parent_logical_source: Optional[LogicalSource] = None,
+                 join_conditions: Optional[List[Tuple[str, str]]] = None,
+                 memory_limit: int = DEFAULT_MEMORY_LIMIT) -> None:
+        """
+        Creates a Referencing Object Map which uses the subjects of a parent
+        Triples Map as objects.
+        Without join conditions, the parent Subject Map is resolved with the
+        child record. Otherwise, a hash index of the parent subjects on the
+        parent join values is built once from the parent Logical Source and
+        probed with the child join values of each record.
+
+        :param SubjectMap parent_subject_map: The Subject Map of the parent
+        Triples Map.
+        :param MIMEType mime_type: The MIME type of the child Logical Source.
+        :param LogicalSource parent_logical_source: The Logical Source of the
+        parent Triples Map, required for join conditions.
+        :param list join_conditions: The (rr:child, rr:parent) references of
+        each rr:joinCondition.
+        :param int memory_limit: The number of parent subjects kept in memory
+        before spilling the join index to disk.
+        """
+        self._parent_subject_map: SubjectMap = parent_subject_map
+        self._parent_logical_source: Optional[LogicalSource] = \
+            parent_logical_source
+        self._join_conditions: List[Tuple[str, str]] = \
+            join_conditions if join_conditions is not None else []
+        self._memory_limit: int = memory_limit
+        self._child_maps: List[ObjectMap] = []
+        self._parent_maps: List[ObjectMap] = []
+        self._index: Optional[Dict[Tuple[str, ...], List[Identifier]]] = None
+        self._index_size: int = 0
+        self._database: Optional[sqlite3.Connection] = None
+        debug(f'Parent Subject Map: {self._parent_subject_map}')
+        debug(f'Parent Logical Source: {self._parent_logical_source}')
+        debug(f'Join conditions: {self._join_conditions}')
+
+        if self._join_conditions:
+            if self._parent_logical_source is None:
+                msg = 'Join conditions require the parent Logical Source'
+                critical(msg)
+                raise ValueError(msg)
+            parent_mime_type = self._parent_logical_source.mime_type
+            for child, parent in self._join_conditions:
+                self._child_maps.append(ObjectMap(child,
+                                                  ReferenceType.REFERENCE,
+                                                  mime_type))
+                self._parent_maps.append(ObjectMap(parent,
+                                                   ReferenceType.REFERENCE,
+                                                   parent_mime_type))
+
+            # Parent records are tuples
+            parent_columns: Optional[List[str]] = \
+                self._parent_logical_source.columns
+            if parent_columns is not None:
+                self._parent_subject_map.bind_columns(parent_columns)
+                for m in self._parent_maps:
+                    m.bind_columns(parent_columns)
+        debug('RefObjectMap initialization complete')
+
+    def bind_columns(self, columns: List[str]) -> None:
+        """
+        Resolves the child references to the indices of the given columns of
+        tuple records.
+        """
+        # Without join conditions, the parent Subject Map resolves the child
+        # records
+        if not self._join_conditions:
+            self._parent_subject_map.bind_columns(columns)
+        for m in self._child_maps:
+            m.bind_columns(columns)
+
+    def resolve(self, data: Union[Element, Dict, Tuple]) -> List[Identifier]:
+        """
+        Resolves the subjects of the parent Triples Map which join with the
+        given child record.
+        """
+        # No join conditions: same Logical Source as the parent
+        if not self._join_conditions:
+            return [self._parent_subject_map.resolve(data)[0]]
+
+        if self._index is None:
+            self._build_index()
+        assert self._index is not None
+
+        # Records without join values do not join
+        try:
+            key: Tuple[str, ...] = tuple([m.resolve_value(data)
+                                          for m in self._child_maps])
+        except ResourceWarning:
+            debug('Child join values missing')
+            return []
+
+        if self._database is not None:
+            return self._lookup_database(key)
+        return self._index.get(key, [])
+
+    def _build_index(self) -> None:
+        """
+        Builds the hash index of the parent subjects on the parent join
+        values. The index is moved to a temporary database when it exceeds
+        the memory limit.
+        """
+        assert self._parent_logical_source is not None
+        self._index = {}
+        buffered: int = 0
+        while True:
+            try:
+                record = next(self._parent_logical_source)
+            except StopIteration:
+                break
+
+            # Parent records without join values or subject do not join
+            try:
+                key: Tuple[str, ...] = tuple([m.resolve_value(record)
+                                              for m in self._parent_maps])
+                subject: Identifier = \
+                    self._parent_subject_map.resolve(record)[0]
+            except ResourceWarning:
+                debug('Parent join values or subject missing')
+                continue
+
+            self._index.setdefault(key, []).append(subject)
+            self._index_size += 1
+            buffered += 1
+            # Spill when exceeding the memory limit, afterwards in batches
+            spill: bool
+            if self._database is None:
+                spill = buffered > self._memory_limit
+            else:
+                spill = buffered >= SPILL_BATCH_SIZE
+            if spill:
+                self._spill()
+                buffered = 0
+
+        if self._database is not None:
+            self._spill()
+            self._database.execute('CREATE INDEX join_key '
+                                   'ON join_index (key)')
+        info(f'Join index built with {self._index_size} parent subjects')
+
+    def _spill(self) -> None:
+        """
+        Moves the in-memory join index to a temporary database on disk.
+        """
+        assert self._index is not None
+        if self._database is None:
+            warning(f'Join index exceeds {self._memory_limit} parent '
+                    'subjects, spilling to disk')
+            # An empty path creates a temporary database on disk which is
+            # removed when the connection is closed
+            self._database = sqlite3.connect('')
+            self._database.execute('CREATE TABLE join_index (key TEXT, '
+                                   'is_bnode INTEGER, subject TEXT)')
+        self._database.executemany('INSERT INTO join_index VALUES (?, ?, ?)',
+                                   [(json.dumps(key), isinstance(s, BNode),
+                                     str(s))
+                                    for key, subjects in self._index.items()
+                                    for s in subjects])
+        self._index.clear()
+        debug('Join index spilled to disk')
+
+    def _lookup_database(self, key: Tuple[str, ...]) -> List[Identifier]:
+        """
+        Looks up the parent subjects for the given join values in the
+        temporary database.
+        """
+        assert self._database is not None
+        rows = self._database.execute('SELECT is_bnode, subject FROM '
+                                      'join_index WHERE key = ?',
+                                      (json.dumps(key),))
+        return [BNode(s) if is_bnode else URIRef(s) for is_bnode, s in rows]
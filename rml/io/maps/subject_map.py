@@ -26,7 +26,7 @@ class SubjectMap(TermMap):
         debug('Named graph: {self._rr_graph}')
         debug('SubjectMap initialization complete')
 
-    def resolve(self, data: Union[Element, Dict]) \
+    def resolve(self, data: Union[Element, Dict, Tuple]) \
             -> Tuple[Identifier, URIRef, URIRef]:
         """
         Resolves a subject into an RDF Identifier.
@@ -37,7 +37,7 @@ class SubjectMap(TermMap):
                 return BNode(value=value), self._rr_class, self._rr_graph
             return URIRef(value), self._rr_class, self._rr_graph
         elif self._reference_type == ReferenceType.REFERENCE:
-            value = super()._resolve_reference(self._term, data)
+            value = self._resolver(self._reference, data)
             if self._rr_reference_type == R2RML.BlankNode:
                 return BNode(value=value), self._rr_class, self._rr_graph
             return URIRef(value), self._rr_class, self._rr_graph
@@ -1,5 +1,5 @@
 from logging import debug, warning
-from typing import List, Iterator, Tuple
+from typing import Any, List, Iterator, Optional, Tuple
 from rdflib.term import URIRef, Identifier
 
 from . import SubjectMap, PredicateObjectMap
@@ -13,6 +13,12 @@ class TriplesMap:
         self._logical_source = logical_source
         self._subject_map = subject_map
         self._predicate_object_maps = predicate_object_maps
+        # Records are tuples, resolve references to column indices once
+        columns = self._logical_source.columns
+        if columns is not None:
+            self._subject_map.bind_columns(columns)
+            for po in self._predicate_object_maps:
+                po.bind_columns(columns)
         debug(f'Logical Source: {self._logical_source}')
         debug(f'Subject Map: {self._subject_map}')
         debug(f'Predicate Object Maps: {self._predicate_object_maps}')
@@ -46,6 +52,15 @@ class TriplesMap:
 
         # Generate predicate and objects
         for po in self._predicate_object_maps:
+            # Referencing Object Map: a triple for each joined parent subject
+            if po.is_join:
+                try:
+                    for pred, obj, po_graph in po.resolve_join(data):
+                        triples.append((subj, pred, obj, po_graph))
+                except ResourceWarning:
+                    warning(f'Unable to resolve {po}: missing data')
+                continue
+
             try:
                 pred, obj, po_graph = po.resolve(data)
                 debug(f'Resolved PredicateObjectMap: {pred}, {obj}, '
@@ -57,3 +72,10 @@ class TriplesMap:
             triples.append(t)
 
         return triples
+
+    def pop_checkpoint(self) -> Optional[Tuple[str, Any]]:
+        """
+        Returns the checkpoint of the Logical Source for the records of which
+        the triples are generated, if any.
+        """
+        return self._logical_source.pop_checkpoint()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 
 from logging import debug
-from typing import Iterator, Dict
+from typing import Any, Iterator, Dict, List, Optional, Tuple, Union
 from abc import ABC, abstractmethod
 from enum import Enum, unique
 
@@ -37,7 +37,7 @@ class LogicalSource(ABC):
         return self
 
     @abstractmethod
-    def __next__(self) -> Dict:
+    def __next__(self) -> Union[Dict, Tuple]:
         """
         __next__() method must be implemented by every subclass.
         This methods provides the next value of the iterator
@@ -50,14 +50,34 @@ class LogicalSource(ABC):
         The MIME type of the data access by this Logical Source.
         """
 
+    @property
+    def columns(self) -> Optional[List[str]]:
+        """
+        The column names of the records if this Logical Source returns tuples
+        instead of dicts, otherwise None.
+        """
+        return None
+
+    def pop_checkpoint(self) -> Optional[Tuple[str, Any]]:
+        """
+        The checkpoint file and key of the records returned since the previous
+        call, if this Logical Source can resume from a checkpoint, otherwise
+        None. The Logical Target writes the checkpoint once the triples of
+        these records are flushed, see write_checkpoint().
+        """
+        return None
+
 
 # Expose classes at module level
 from rml.io.sources.rdf_source import RDFLogicalSource  # nopep8
 from rml.io.sources.json_source import JSONLogicalSource  # nopep8
 from rml.io.sources.csv_source import CSVLogicalSource, CSVWTrimMode, \
                                       CSVColumn  # nopep8
-from rml.io.sources.sql_source import SQLLogicalSource  # nopep8
+from rml.io.sources.sql_source import SQLLogicalSource, get_engine, \
+                                      write_checkpoint  # nopep8
 from rml.io.sources.xml_source import XMLLogicalSource  # nopep8
 from rml.io.sources.sparql_source import SPARQLJSONLogicalSource, \
                                          SPARQLXMLLogicalSource  # nopep8
 from rml.io.sources.dcat_source import DCATLogicalSource  # nopep8
+from rml.io.sources.shared_source import SharedScan, \
+                                         SharedLogicalSource  # nopep8
@@ -5,12 +5,15 @@ from requests_file import FileAdapter
 from csv import DictReader, Sniffer
 from os import remove
 from os.path import basename
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 from lxml.etree import Element
-from typing import Dict, Union
+from typing import Dict, Optional, Union
 from tempfile import NamedTemporaryFile
 
 from rml.io.sources import LogicalSource, MIMEType, JSONLogicalSource, \
                            XMLLogicalSource, CSVLogicalSource, RDFLogicalSource
+from rml.io.sources.rdf_source import DEFAULT_STREAMING, DEFAULT_PROCESSES
 
 ITER_BYTES = 1024
 
@@ -18,16 +21,28 @@ ITER_BYTES = 1024
 class DCATLogicalSource(LogicalSource):
     def __init__(self, url: str, mime_type: MIMEType,
                  rml_iterator: str = '',
-                 delimiter: str = ',') -> None:
+                 delimiter: str = ',',
+                 store_dir: Optional[str] = None,
+                 streaming: bool = DEFAULT_STREAMING,
+                 processes: int = DEFAULT_PROCESSES) -> None:
         """
         A DCAT Logical Source to retrieve data from the Web and iterate over
         it.
         The RML iterator is not used for row-based iterators,
         but is used for XML (XPath) or JSON (JSONPath) data.
+
+        :param str store_dir: Directory to keep parsed RDF data of local
+        files in, see RDFLogicalSource.
+        :param bool streaming: Stream line-based RDF data, see
+        RDFLogicalSource.
+        :param int processes: The number of processes streaming RDF data.
         """
         super().__init__(rml_iterator)
         self._url: str = url
         self._delimiter: str = delimiter
+        self._store_dir: Optional[str] = store_dir
+        self._streaming: bool = streaming
+        self._processes: int = processes
         self._mime_type: MIMEType = mime_type
         self._source: LogicalSource
         self._tmp_file: str
@@ -76,9 +91,19 @@ class DCATLogicalSource(LogicalSource):
                 f == MIMEType.TRIX.value or \
                 f == MIMEType.TURTLE.value:
             debug(f'RDF source detected: {self._mime_type}')
-            self._source = RDFLogicalSource(self._tmp_file,
-                                            self._rml_iterator,
-                                            self._mime_type)
+            # Downloaded files differ every run, only local files are stored
+            if self._store_dir is not None and \
+                    urlparse(self._url).scheme == 'file':
+                self._source = RDFLogicalSource(
+                    url2pathname(urlparse(self._url).path),
+                    self._rml_iterator, self._mime_type, self._store_dir,
+                    self._streaming, self._processes)
+            else:
+                self._source = RDFLogicalSource(self._tmp_file,
+                                                self._rml_iterator,
+                                                self._mime_type,
+                                                streaming=self._streaming,
+                                                processes=self._processes)
         else:
             msg = f'Unsupported MIME type: {self._mime_type}'
             critical(msg)
@@ -1,17 +1,210 @@
 import json
-from logging import debug, critical
-from jsonpath_ng import parse
+from json.decoder import JSONDecodeError
+from logging import debug, info, critical
+from jsonpath_ng import parse, Root, Child, Fields, Slice
 from jsonpath_ng.parser import JsonPathParser
-from typing import Iterator, Dict
+from typing import Iterator, Dict, List, Optional, IO, Any
 
 from rml.io.sources import LogicalSource, MIMEType
 
+# Streaming is disabled by default, the JSON file is loaded at once
+DEFAULT_STREAMING: bool = False
+# Number of characters read at once from the JSON file when streaming
+CHUNK_SIZE: int = 64 * 1024
+JSON_WHITESPACE: str = ' \t\n\r'
+JSON_VALUE_END: str = JSON_WHITESPACE + ',:]}'
+
+
+def get_streaming_keys(json_path: JsonPathParser) -> Optional[List[str]]:
+    """
+    Returns the object keys to follow to the JSON array if the JSONPath
+    expression can be streamed, otherwise None.
+    Only the shape $.key1.key2[*] is supported.
+    """
+    # Last step must select all array elements: [*]
+    if not isinstance(json_path, Child) or \
+            not isinstance(json_path.right, Slice) or \
+            json_path.right.start is not None or \
+            json_path.right.end is not None or \
+            json_path.right.step is not None:
+        return None
+
+    # Other steps must be single fields, starting from the root
+    keys: List[str] = []
+    node = json_path.left
+    while isinstance(node, Child):
+        if not isinstance(node.right, Fields) or \
+                len(node.right.fields) != 1 or \
+                node.right.fields[0] == '*':
+            return None
+        keys.insert(0, node.right.fields[0])
+        node = node.left
+
+    if not isinstance(node, Root):
+        return None
+
+    debug(f'Streaming JSON array at keys: {keys}')
+    return keys
+
+
+class JSONStream:
+    """
+    Incremental JSON parser which yields the elements of a JSON array one at
+    a time while the JSON document is read.
+    The array is found by following the given object keys from the root of
+    the JSON document, e.g. ['students'] for '$.students[*]'.
+    """
+    def __init__(self, file: IO, keys: List[str],
+                 chunk_size: int = CHUNK_SIZE) -> None:
+        """
+        Creates a JSONStream.
+
+        :param IO file: The text stream to read the JSON document from.
+        :param list keys: The object keys to follow to the JSON array.
+        :param int chunk_size: The number of characters to read at once.
+        """
+        self._file: IO = file
+        self._keys: List[str] = keys
+        self._chunk_size: int = chunk_size
+        self._decoder: json.JSONDecoder = json.JSONDecoder()
+        self._buffer: str = ''
+        self._position: int = 0
+        self._eof: bool = False
+
+    def __iter__(self) -> Iterator:
+        return self._records()
+
+    def _records(self) -> Iterator:
+        """
+        Generator which yields each element of the JSON array.
+        """
+        # Find the JSON array, no results if a key is missing
+        for key in self._keys:
+            if not self._find_key(key):
+                debug(f'Key {key} not found')
+                return
+
+        # Not an array, let JSONPath handle the value like when not streaming
+        if self._peek() != '[':
+            for match in Slice().find(self._decode()):
+                yield match.value
+            return
+
+        # Yield each element of the array
+        self._position += 1
+        if self._peek() == ']':
+            self._position += 1
+            return
+        while True:
+            yield self._decode()
+            if self._next_delimiter(']') == ']':
+                return
+
+    def _find_key(self, key: str) -> bool:
+        """
+        Moves the stream to the value of the given key in the current JSON
+        object. Values of other keys are skipped.
+        """
+        # JSONPath field on anything else than an object has no results
+        if self._peek() != '{':
+            return False
+        self._position += 1
+        if self._peek() == '}':
+            return False
+
+        while True:
+            name = self._decode()
+            if self._peek() != ':':
+                raise JSONDecodeError('Expecting \':\' delimiter',
+                                      self._buffer, self._position)
+            self._position += 1
+            if name == key:
+                return True
+            self._decode()
+            if self._next_delimiter('}') == '}':
+                return False
+
+    def _next_delimiter(self, end: str) -> str:
+        """
+        Consumes and returns a ',' or the given end character.
+        """
+        c = self._peek()
+        if c != ',' and c != end:
+            raise JSONDecodeError(f'Expecting \',\' or \'{end}\' delimiter',
+                                  self._buffer, self._position)
+        self._position += 1
+        return c
+
+    def _peek(self) -> str:
+        """
+        Skips whitespace and returns the next character without consuming it.
+        An empty string is returned when the stream is exhausted.
+        """
+        while True:
+            while self._position < len(self._buffer):
+                c = self._buffer[self._position]
+                if c not in JSON_WHITESPACE:
+                    return c
+                self._position += 1
+            if not self._read(self._chunk_size):
+                return ''
+
+    def _decode(self) -> Any:
+        """
+        Decodes the next JSON value, reading more data when the value is not
+        complete yet.
+        """
+        size = self._chunk_size
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer,
+                                                      self._position)
+                # A number might continue in the next chunk, a complete value
+                # is always followed by whitespace or a delimiter
+                if self._eof or (end < len(self._buffer) and
+                                 self._buffer[end] in JSON_VALUE_END):
+                    self._position = end
+                    return value
+            except JSONDecodeError as e:
+                if self._eof:
+                    raise e
+            # Value is incomplete, read increasingly larger chunks to avoid
+            # decoding large values over and over again
+            self._read(size)
+            size *= 2
+
+    def _read(self, size: int) -> bool:
+        """
+        Appends the next chunk to the buffer and drops the consumed data.
+        Returns False when the stream is exhausted.
+        """
+        chunk = self._file.read(size)
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        if not chunk:
+            self._eof = True
+            return False
+        return True
+
 
 class JSONLogicalSource(LogicalSource):
-    def __init__(self, rml_iterator: str, path: str):
+    def __init__(self, rml_iterator: str, path: str,
+                 streaming: bool = DEFAULT_STREAMING,
+                 documents: Optional[Dict[str, Any]] = None):
         """
         A JSONPath Logical Source to iterate over JSON data.
         The RML iterator specifies the JSONPath expression to use.
+
+        :param str rml_iterator: The JSONPath expression to iterate over.
+        :param str path: The file path to the JSON file.
+        :param bool streaming: Parse the JSON file incrementally if the RML
+        iterator selects all elements of an array such as '$[*]' or
+        '$.items[*]'. Other JSONPath expressions fall back to loading the
+        whole JSON file.
+        :param dict documents: Loaded JSON files by path, shared between
+        Logical Sources. A file loaded at once is added to or taken from the
+        documents, each file is only loaded once.
         """
         super().__init__(rml_iterator)
         try:
@@ -22,21 +215,50 @@ class JSONLogicalSource(LogicalSource):
             raise ValueError(msg)
         self._path: str = path
         self._data: Dict = {}
-        debug('Path: {self._path}')
+        self._file: Optional[IO] = None
+        self._iterator: Iterator
+        debug(f'Path: {self._path}')
+        debug(f'Streaming: {streaming}')
 
-        # Read JSON file
-        with open(self._path) as f:
-            self._data = json.load(f)
-            self._iterator: Iterator = iter(json_path.find(self._data))
+        keys: Optional[List[str]] = None
+        if streaming:
+            keys = get_streaming_keys(json_path)
+            if keys is None:
+                info(f'JSONPath {self._rml_iterator} cannot be streamed, '
+                     'falling back to loading the whole JSON file')
+
+        # Read JSON file incrementally
+        if keys is not None:
+            self._file = open(self._path)
+            self._iterator = iter(JSONStream(self._file, keys))
+        # Read JSON file at once, unless it is already loaded
+        else:
+            if documents is not None and self._path in documents:
+                debug(f'Shared loaded JSON file {self._path}')
+                self._data = documents[self._path]
+            else:
+                with open(self._path) as f:
+                    self._data = json.load(f)
+                if documents is not None:
+                    documents[self._path] = self._data
+            self._iterator = iter([m.value for m in
+                                   json_path.find(self._data)])
         debug('Source initialization complete')
 
     def __next__(self) -> Dict:
         """
         Returns a result from the JSONPath iterator.
         """
-        result: Dict = next(self._iterator).value
-        debug(f'Iterator: {result}')
-        return result
+        try:
+            result: Dict = next(self._iterator)
+            debug(f'Iterator: {result}')
+            return result
+        # Iterator exhausted
+        except StopIteration:
+            if self._file is not None:
+                self._file.close()
+                debug('File closed')
+            raise StopIteration
 
     @property
     def mime_type(self) -> MIMEType:
@@ -1,27 +1,206 @@
-from logging import debug, critical
+from glob import glob
+from hashlib import sha256
+from logging import debug, info, warning, critical
+from math import ceil
+from multiprocessing import get_context, current_process
+from multiprocessing.queues import Queue
+from os import makedirs, remove, replace, stat
+from os.path import abspath, join, getsize
+from pathlib import Path
+from tempfile import NamedTemporaryFile
 from rdflib import ConjunctiveGraph, Graph
+from rdflib.store import VALID_STORE
+from rdflib.term import URIRef, BNode, Identifier, Variable
+from rdflib.plugins.parsers.ntriples import NTriplesParser, ParseError, \
+                                           r_nodeid, r_wspace, r_tail
 from rdflib.plugins.sparql import prepareQuery
 from rdflib.plugins.sparql.sparql import Query
-from typing import Dict, Iterator
+from typing import Dict, Iterator, List, Optional, Type, Tuple, Union
 
 from rml.io.sources import LogicalSource, MIMEType
+from rml.io.sources.rdf_store import SQLiteStore
+
+# Streaming is disabled by default, the RDF file is parsed into a graph
+DEFAULT_STREAMING: bool = False
+# Streamed RDF files are read by a single process by default
+DEFAULT_PROCESSES: int = 1
+# Line-based RDF formats which can be streamed
+STREAMING_MIME_TYPES = (MIMEType.NTRIPLES, MIMEType.NQUADS)
+# Number of results sent at once from a process reading a byte range
+BATCH_SIZE: int = 1000
+# Maximum number of batches waiting to be returned by the Logical Source
+QUEUE_SIZE: int = 16
+
+TriplePattern = Tuple[Identifier, Identifier, Identifier]
+
+
+class LineParser(NTriplesParser):
+    """
+    Parses single N-Triples or N-Quads lines. The graph name of N-Quads is
+    skipped, the lines are matched against the union of all graphs.
+    Blank node labels are kept as identifiers, each process reading a byte
+    range resolves the same label to the same blank node.
+    """
+    def __init__(self, quads: bool) -> None:
+        super().__init__()
+        self._quads: bool = quads
+
+    def nodeid(self) -> Union[BNode, bool]:
+        if self.peek('_'):
+            return BNode(self.eat(r_nodeid).group(1))
+        return False
+
+    def parse_line(self, line: str) -> Optional[TriplePattern]:
+        """
+        Returns the triple of the line or None for empty and comment lines.
+        """
+        self.line = line
+        self.eat(r_wspace)
+        if not self.line or self.line.startswith('#'):
+            return None
+
+        subject = self.subject()
+        self.eat(r_wspace)
+        predicate = self.predicate()
+        self.eat(r_wspace)
+        obj = self.object()
+        self.eat(r_wspace)
+        if self._quads:
+            self.uriref() or self.nodeid()
+        self.eat(r_tail)
+        if self.line:
+            raise ParseError('Trailing garbage')
+        return subject, predicate, obj
+
+
+def _match(pattern: TriplePattern, variables: List[str],
+           triple: TriplePattern) -> Optional[Dict]:
+    """
+    Matches a triple against a triple pattern and returns the bindings of
+    the projected variables, or None if the triple does not match.
+    Blank nodes in the pattern are variables which are never projected.
+    """
+    bindings: Dict[str, Identifier] = {}
+    for term, value in zip(pattern, triple):
+        if isinstance(term, (Variable, BNode)):
+            name: str = str(term) if isinstance(term, Variable) \
+                else f'_:{term}'
+            bound: Optional[Identifier] = bindings.get(name)
+            if bound is not None and bound != value:
+                return None
+            bindings[name] = value
+        elif term != value:
+            return None
+    return {v: bindings[v] for v in variables if v in bindings}
+
+
+def _match_lines(path: str, start: int, end: Optional[int], quads: bool,
+                 pattern: TriplePattern, variables: List[str]) \
+        -> Iterator[Dict]:
+    """
+    Generator which parses the lines starting in a byte range of an
+    N-Triples or N-Quads file and yields the results matching the pattern.
+    """
+    parser = LineParser(quads)
+    with open(path, 'rb') as f:
+        # The line crossing the start of the range belongs to the previous
+        # range
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()
+
+        while end is None or f.tell() < end:
+            line: bytes = f.readline()
+            if not line:
+                break
+            try:
+                triple = parser.parse_line(line.decode('utf-8')
+                                           .rstrip('\r\n'))
+            except ParseError as e:
+                msg = f'Unable to parse {path}: {e} in {line!r}'
+                critical(msg)
+                raise ValueError(msg)
+            if triple is None:
+                continue
+            result: Optional[Dict] = _match(pattern, variables, triple)
+            if result is not None:
+                yield result
+
+
+def _read_range(path: str, start: int, end: int, quads: bool,
+                pattern: TriplePattern, variables: List[str],
+                queue: Queue) -> None:
+    """
+    Reads a byte range of an N-Triples or N-Quads file in a worker process
+    and sends the results in batches, followed by None. An exception is sent
+    when reading fails.
+    """
+    batch: List[Dict] = []
+    try:
+        for result in _match_lines(path, start, end, quads, pattern,
+                                   variables):
+            batch.append(result)
+            if len(batch) >= BATCH_SIZE:
+                queue.put(batch)
+                batch = []
+        if batch:
+            queue.put(batch)
+        queue.put(None)
+    except Exception as e:
+        queue.put(e)
 
 
 class RDFLogicalSource(LogicalSource):
-    def __init__(self, path: str, query: str, mime_type: MIMEType) -> None:
+    def __init__(self, path: str, query: str, mime_type: MIMEType,
+                 store_dir: Optional[str] = None,
+                 streaming: bool = DEFAULT_STREAMING,
+                 processes: int = DEFAULT_PROCESSES) -> None:
         """
         An RDF Logical Source to iterate over triples.
         The RML iterator is not used for row based results.
         The query is a SPARQL query to select triples.
+
+        :param str store_dir: Directory to keep the parsed RDF data in an
+        SQLite store on disk instead of in memory. The store is keyed by the
+        path, size and modification time of the file, later runs and other
+        Logical Sources over the same file query the store without parsing
+        the file again.
+        :param bool streaming: Parse N-Triples and N-Quads files line by line
+        if the query is a SELECT query of a single triple pattern such as
+        'SELECT ?s ?o WHERE { ?s <p> ?o }'. The matching triples are returned
+        in file order without building a graph, duplicate triples are
+        returned for each occurrence. Other queries and formats fall back to
+        parsing the whole RDF file.
+        :param int processes: The number of processes streaming byte ranges
+        of the file concurrently.
         """
         super().__init__()
         self._path: str = path
         self._query: Query = prepareQuery(query)
         self._mime_type: MIMEType = mime_type
-        self._graph: Graph
+        self._store_dir: Optional[str] = store_dir
+        self._processes: int = processes
+        self._graph: Optional[Graph] = None
         debug(f'Path: {self._path}')
         debug(f'Query: {self._query}')
         debug(f'MIME type: {self._mime_type}')
+        debug(f'Store directory: {self._store_dir}')
+        debug(f'Streaming: {streaming}')
+        debug(f'Processes: {self._processes}')
+
+        # Stream line-based RDF files
+        if streaming:
+            streaming_pattern = self._get_streaming_pattern()
+            if streaming_pattern is not None:
+                if not Path(self._path).is_file():
+                    msg = f'Unable to open {self._path}'
+                    critical(msg)
+                    raise FileNotFoundError(msg)
+                self._iterator: Iterator = self._stream(*streaming_pattern)
+                debug(f'Source initialization complete')
+                return
+            info(f'Query over {self._mime_type} cannot be streamed, falling '
+                 'back to parsing the whole RDF file')
 
         # Create a context-aware graph for specific mime_types
         # https://github.com/RDFLib/rdflib-jsonld/issues/40 JSON-LD requires
@@ -32,13 +211,13 @@ class RDFLogicalSource(LogicalSource):
                 f == MIMEType.TRIG.value or \
                 f == MIMEType.TRIX.value:
             debug('Context-aware graph enabled')
-            self._graph = ConjunctiveGraph()
+            graph_type: Type[Graph] = ConjunctiveGraph
         # Create a normal graph for other RDF mime_types
         elif f == MIMEType.RDF_XML.value or \
                 f == MIMEType.N3.value or \
                 f == MIMEType.TURTLE.value or \
                 f == MIMEType.NTRIPLES.value:
-            self._graph = Graph()
+            graph_type = Graph
         # Raise ValueError when MIME type is not supported
         else:
             msg = f'Unknown RDF MIME type: {self._mime_type}'
@@ -46,8 +225,13 @@ class RDFLogicalSource(LogicalSource):
             raise ValueError(msg)
 
         # Parse RDF data
+        graph: Graph
         try:
-            self._graph.parse(path, format=f)
+            if self._store_dir is not None:
+                graph = self._open_store(graph_type)
+            else:
+                graph = graph_type()
+                graph.parse(path, format=f)
         except FileNotFoundError as e:
             msg = f'Unable to open {self._path}: {e}'
             critical(msg)
@@ -58,7 +242,8 @@ class RDFLogicalSource(LogicalSource):
             raise ValueError(msg)
 
         # Execute SPARQL query and return results iterator
-        self._iterator: Iterator = iter(self._graph.query(self._query))
+        self._graph = graph
+        self._iterator = (r.asdict() for r in graph.query(self._query))
 
         debug(f'Source initialization complete')
 
@@ -67,14 +252,134 @@ class RDFLogicalSource(LogicalSource):
         Returns a result from the RDF iterator.
         raises StopIteration when exhausted.
         """
-        result: Dict = next(self._iterator).asdict()
+        result: Dict = next(self._iterator)
         debug('Result: {result}')
         return result
 
+    def _open_store(self, graph_type: Type[Graph]) -> Graph:
+        """
+        Opens the SQLite store of the file, the file is parsed into a new
+        store if the file is not stored yet or changed since.
+        The store is created under a temporary name and moved in place
+        atomically to support concurrent runs. Stores of older versions of
+        the file are removed.
+        """
+        assert self._store_dir is not None
+        path: str = abspath(self._path)
+        status = stat(path)
+        file_key = sha256(f'{path} {self._mime_type.value}'.encode()) \
+            .hexdigest()
+        version_key = sha256(f'{status.st_size} {status.st_mtime_ns}'
+                             .encode()).hexdigest()
+        store_path: str = join(self._store_dir,
+                               f'{file_key}-{version_key}.sqlite')
+        # Stored graphs need a fixed identifier to find their triples again
+        identifier: URIRef = URIRef(Path(path).as_uri())
+        graph: Graph = graph_type(SQLiteStore(), identifier=identifier)
+
+        if graph.open(store_path) == VALID_STORE:
+            info(f'Opened stored {self._path} from {store_path}')
+            return graph
+
+        makedirs(self._store_dir, exist_ok=True)
+        with NamedTemporaryFile(dir=self._store_dir, suffix='.sqlite',
+                                delete=False) as tmp_file:
+            tmp_path: str = tmp_file.name
+        try:
+            graph.open(tmp_path, create=True)
+            graph.parse(path, format=self._mime_type.value)
+            graph.close(commit_pending_transaction=True)
+            replace(tmp_path, store_path)
+        except Exception:
+            graph.close()
+            remove(tmp_path)
+            raise
+        info(f'Stored {self._path} in {store_path}')
+
+        for old_path in glob(join(self._store_dir, f'{file_key}-*.sqlite')):
+            if old_path != store_path:
+                remove(old_path)
+                debug(f'Removed store {old_path} of an older version')
+
+        graph.open(store_path)
+        return graph
+
+    def _get_streaming_pattern(self) \
+            -> Optional[Tuple[TriplePattern, List[str]]]:
+        """
+        Returns the triple pattern and the projected variables if the query
+        over this file can be streamed, otherwise None.
+        """
+        if self._mime_type not in STREAMING_MIME_TYPES:
+            return None
+
+        algebra = self._query.algebra
+        if algebra.name != 'SelectQuery' or algebra.datasetClause is not None:
+            return None
+        project = algebra.p
+        if project.name != 'Project' or project.p.name != 'BGP' or \
+                len(project.p.triples) != 1:
+            return None
+        debug(f'Streaming triple pattern: {project.p.triples[0]}')
+        return project.p.triples[0], [str(v) for v in project.PV]
+
+    def _stream(self, pattern: TriplePattern, variables: List[str]) \
+            -> Iterator[Dict]:
+        """
+        Generator which streams the results of the triple pattern.
+        The file is split into byte ranges which are read by concurrent
+        processes if multiple processes are requested. The processes are
+        started on the first result to support forking the Logical Source to
+        a worker process.
+        """
+        quads: bool = self._mime_type == MIMEType.NQUADS
+        processes: int = self._processes
+        # Worker processes of a Logical Target cannot start processes
+        if processes > 1 and current_process().daemon:
+            warning(f'Unable to stream {self._path} with {processes} '
+                    'processes in a worker process, streaming with 1 '
+                    'process')
+            processes = 1
+        if processes <= 1:
+            yield from _match_lines(self._path, 0, None, quads, pattern,
+                                    variables)
+            return
+
+        size: int = getsize(self._path)
+        step: int = max(ceil(size / processes), 1)
+        context = get_context('fork')
+        queue: Queue = context.Queue(QUEUE_SIZE)
+        readers = [context.Process(target=_read_range,
+                                   args=(self._path, start,
+                                         min(start + step, size), quads,
+                                         pattern, variables, queue),
+                                   daemon=True)
+                   for start in range(0, size, step)]
+        debug(f'Streaming {self._path} with {len(readers)} processes')
+        for r in readers:
+            r.start()
+
+        try:
+            running: int = len(readers)
+            while running > 0:
+                batch: Union[List[Dict], Exception, None] = queue.get()
+                # Byte range completely read
+                if batch is None:
+                    running -= 1
+                elif isinstance(batch, Exception):
+                    raise batch
+                else:
+                    yield from batch
+        finally:
+            for r in readers:
+                if r.is_alive():
+                    r.terminate()
+                r.join()
+
     @property
-    def graph(self) -> Graph:
+    def graph(self) -> Optional[Graph]:
         """
-        Returns the knowledge graph.
+        Returns the knowledge graph, None when streaming.
         """
         return self._graph
 
@@ -0,0 +1,296 @@
+import json
+import sqlite3
+from logging import debug, critical
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from rdflib import Graph
+from rdflib.store import Store, VALID_STORE, NO_STORE
+from rdflib.term import Identifier, URIRef, BNode, Literal
+from os.path import exists
+
+# Triples are stored once per context, the indexes cover the access patterns
+# of SPARQL basic graph patterns. The context is the last column of each
+# index: a store holds a single or a few contexts, an index on the context
+# alone would be picked for every pattern and scan the whole store.
+SCHEMA: str = '''
+CREATE TABLE IF NOT EXISTS triples (s TEXT, p TEXT, o TEXT, c TEXT,
+                                    UNIQUE (s, p, o, c));
+CREATE INDEX IF NOT EXISTS triples_poc ON triples (p, o, c);
+CREATE INDEX IF NOT EXISTS triples_oc ON triples (o, c);
+CREATE TABLE IF NOT EXISTS namespaces (prefix TEXT PRIMARY KEY,
+                                       namespace TEXT);
+'''
+# Prefixes of the encoded terms
+IRI_PREFIX: str = 'U'
+BNODE_PREFIX: str = 'B'
+LITERAL_PREFIX: str = 'L'
+
+
+def encode_term(term: Optional[Identifier]) -> str:
+    """
+    Encodes an RDF term as a string which is equal for equal terms.
+    The default context of a store without context is encoded as ''.
+    """
+    if term is None:
+        return ''
+    elif isinstance(term, Literal):
+        datatype = str(term.datatype) if term.datatype is not None else None
+        return LITERAL_PREFIX + json.dumps([str(term), datatype,
+                                            term.language])
+    elif isinstance(term, BNode):
+        return BNODE_PREFIX + str(term)
+    return IRI_PREFIX + str(term)
+
+
+def decode_term(value: str) -> Optional[Identifier]:
+    """
+    Decodes an RDF term encoded by encode_term.
+    """
+    if not value:
+        return None
+    elif value[0] == LITERAL_PREFIX:
+        lexical, datatype, language = json.loads(value[1:])
+        return Literal(lexical, lang=language, datatype=datatype)
+    elif value[0] == BNODE_PREFIX:
+        return BNode(value[1:])
+    return URIRef(value[1:])
+
+
+class SQLiteStore(Store):
+    """
+    A context-aware rdflib store which keeps the triples in an SQLite
+    database on disk. Graphs over the store are queried out of core and can
+    be opened again in later runs without parsing the RDF data.
+    """
+    context_aware = True
+    # Required by the Turtle, TriG and N3 parsers, formulas are refused
+    formula_aware = True
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, configuration: Optional[str] = None,
+                 identifier: Optional[Identifier] = None) -> None:
+        self._connection: Optional[sqlite3.Connection] = None
+        # Graphs of the contexts, created once per context
+        self._contexts: Dict[str, Graph] = {}
+        super().__init__(configuration, identifier)
+
+    def open(self, configuration: str, create: bool = False) -> int:
+        """
+        Opens the SQLite database at the given path.
+        Returns NO_STORE if the database does not exist and create is False.
+        A created database collects the added triples in a single
+        transaction, existing databases are opened in autocommit mode to not
+        lock them for other readers.
+        """
+        if not create and not exists(configuration):
+            return int(NO_STORE)
+
+        if create:
+            self._connection = sqlite3.connect(configuration)
+        else:
+            self._connection = sqlite3.connect(configuration,
+                                               isolation_level=None)
+        self._connection.executescript(SCHEMA)
+        debug(f'Opened SQLite store {configuration}')
+        return int(VALID_STORE)
+
+    def close(self, commit_pending_transaction: bool = False) -> None:
+        """
+        Closes the SQLite database, uncommitted triples are discarded unless
+        commit_pending_transaction is True.
+        """
+        if self._connection is None:
+            return
+        if commit_pending_transaction:
+            self._connection.commit()
+        self._connection.close()
+        self._connection = None
+        self._contexts = {}
+        debug('Closed SQLite store')
+
+    def commit(self) -> None:
+        """
+        Commits the added triples to the SQLite database.
+        """
+        assert self._connection is not None
+        self._connection.commit()
+
+    def rollback(self) -> None:
+        """
+        Discards the triples added since the last commit.
+        """
+        assert self._connection is not None
+        self._connection.rollback()
+
+    def add(self, triple: Tuple[Identifier, Identifier, Identifier],
+            context: Optional[Graph], quoted: bool = False) -> None:
+        """
+        Adds a triple to a context.
+        """
+        assert self._connection is not None
+        if quoted:
+            msg = 'N3 formulas are not supported by the SQLite store'
+            critical(msg)
+            raise ValueError(msg)
+        Store.add(self, triple, context, quoted)
+        self._connection.execute('INSERT OR IGNORE INTO triples '
+                                 'VALUES (?, ?, ?, ?)',
+                                 self._encode_quad(triple, context))
+
+    def addN(self, quads: Iterator[Tuple[Identifier, Identifier, Identifier,
+                                         Graph]]) -> None:
+        """
+        Adds the triples of multiple contexts at once.
+        """
+        assert self._connection is not None
+        self._connection.executemany('INSERT OR IGNORE INTO triples '
+                                     'VALUES (?, ?, ?, ?)',
+                                     [self._encode_quad((s, p, o), c)
+                                      for s, p, o, c in quads])
+
+    def remove(self, triple: Tuple[Optional[Identifier],
+                                   Optional[Identifier],
+                                   Optional[Identifier]],
+               context: Optional[Graph] = None) -> None:
+        """
+        Removes the triples matching the pattern from a context or from all
+        contexts.
+        """
+        assert self._connection is not None
+        Store.remove(self, triple, context)
+        where, params = self._where(triple, context)
+        self._connection.execute(f'DELETE FROM triples{where}', params)
+
+    def triples(self, triple_pattern: Tuple[Optional[Identifier],
+                                            Optional[Identifier],
+                                            Optional[Identifier]],
+                context: Optional[Graph] = None) \
+            -> Iterator[Tuple[Tuple[Identifier, Identifier, Identifier],
+                              Iterator[Graph]]]:
+        """
+        Yields the triples matching the pattern with the contexts they are
+        part of. Without context, each triple is yielded once for all
+        contexts.
+        """
+        assert self._connection is not None
+        where, params = self._where(triple_pattern, context)
+        # Triples are unique within a context, no grouping needed
+        if context is not None:
+            for s, p, o in self._connection.execute('SELECT s, p, o FROM '
+                                                    f'triples{where}',
+                                                    params):
+                yield (decode_term(s), decode_term(p), decode_term(o)), \
+                    iter([context])
+            return
+
+        rows = self._connection.execute('SELECT s, p, o, '
+                                        'json_group_array(c) '
+                                        f'FROM triples{where} '
+                                        'GROUP BY s, p, o', params)
+        for s, p, o, c in rows:
+            yield (decode_term(s), decode_term(p), decode_term(o)), \
+                iter([self._context(i) for i in json.loads(c)])
+
+    def __len__(self, context: Optional[Graph] = None) -> int:
+        """
+        Returns the number of triples in a context or in all contexts.
+        """
+        assert self._connection is not None
+        where, params = self._where((None, None, None), context)
+        count: int = self._connection.execute('SELECT COUNT(*) FROM '
+                                              '(SELECT DISTINCT s, p, o '
+                                              f'FROM triples{where})',
+                                              params).fetchone()[0]
+        return count
+
+    def contexts(self, triple: Optional[Tuple[Identifier, Identifier,
+                                              Identifier]] = None) \
+            -> Iterator[Graph]:
+        """
+        Yields the contexts, or the contexts of the given triple.
+        """
+        assert self._connection is not None
+        where, params = self._where(triple or (None, None, None), None)
+        for c, in self._connection.execute('SELECT DISTINCT c FROM '
+                                           f'triples{where}', params):
+            yield self._context(c)
+
+    def bind(self, prefix: str, namespace: URIRef) -> None:
+        """
+        Binds a prefix to a namespace.
+        """
+        assert self._connection is not None
+        self._connection.execute('DELETE FROM namespaces WHERE namespace = ?',
+                                 (str(namespace),))
+        self._connection.execute('INSERT OR REPLACE INTO namespaces '
+                                 'VALUES (?, ?)', (prefix, str(namespace)))
+
+    def namespace(self, prefix: str) -> Optional[URIRef]:
+        """
+        Returns the namespace bound to the prefix.
+        """
+        assert self._connection is not None
+        row = self._connection.execute('SELECT namespace FROM namespaces '
+                                       'WHERE prefix = ?',
+                                       (prefix,)).fetchone()
+        return URIRef(row[0]) if row is not None else None
+
+    def prefix(self, namespace: URIRef) -> Optional[str]:
+        """
+        Returns the prefix bound to the namespace.
+        """
+        assert self._connection is not None
+        row = self._connection.execute('SELECT prefix FROM namespaces '
+                                       'WHERE namespace = ?',
+                                       (str(namespace),)).fetchone()
+        return str(row[0]) if row is not None else None
+
+    def namespaces(self) -> Iterator[Tuple[str, URIRef]]:
+        """
+        Yields the bound prefixes and namespaces.
+        """
+        assert self._connection is not None
+        rows = self._connection.execute('SELECT prefix, namespace FROM '
+                                        'namespaces').fetchall()
+        for prefix, namespace in rows:
+            yield prefix, URIRef(namespace)
+
+    def _context(self, value: str) -> Graph:
+        """
+        Returns the graph of an encoded context.
+        """
+        graph: Optional[Graph] = self._contexts.get(value)
+        if graph is None:
+            graph = Graph(store=self, identifier=decode_term(value))
+            self._contexts[value] = graph
+        return graph
+
+    def _encode_quad(self, triple: Tuple[Identifier, Identifier, Identifier],
+                     context: Optional[Graph]) -> List[str]:
+        """
+        Encodes a triple and its context as a row of the triples table.
+        """
+        c: Optional[Identifier] = context.identifier \
+            if context is not None else None
+        return [encode_term(t) for t in triple] + [encode_term(c)]
+
+    def _where(self, triple: Tuple[Optional[Identifier],
+                                   Optional[Identifier],
+                                   Optional[Identifier]],
+               context: Optional[Graph]) -> Tuple[str, List[Any]]:
+        """
+        Creates the WHERE clause matching a triple pattern in a context.
+        """
+        conditions: List[str] = []
+        params: List[Any] = []
+        for column, term in zip(['s', 'p', 'o'], triple):
+            if term is not None:
+                conditions.append(f'{column} = ?')
+                params.append(encode_term(term))
+        if context is not None:
+            conditions.append('c = ?')
+            params.append(encode_term(context.identifier))
+
+        if not conditions:
+            return '', params
+        return ' WHERE ' + ' AND '.join(conditions), params
@@ -0,0 +1,141 @@
+from collections import deque
+from logging import debug
+from os import getpid
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from rml.io.sources import LogicalSource, MIMEType
+
+
+class SharedScan:
+    def __init__(self, factory: Callable[[], LogicalSource]) -> None:
+        """
+        A single scan of a Logical Source shared by multiple consumers.
+        Each record is read once and fanned out to every SharedLogicalSource
+        of the scan. Records are buffered per consumer until it reads them,
+        consumers reading in lockstep keep the buffers small.
+
+        :param Callable factory: Creates the Logical Source to scan.
+        Consumers in a forked worker process cannot share the scan of the
+        parent process, they scan their own Logical Source instead.
+        """
+        self._factory: Callable[[], LogicalSource] = factory
+        self._source: LogicalSource = self._factory()
+        self._pid: int = getpid()
+        self._views: List['SharedLogicalSource'] = []
+        self._exhausted: bool = False
+        self._read_count: int = 0
+        # Checkpoints of the Logical Source with the number of records read
+        # before them
+        self._checkpoints: Deque[Tuple[int, Tuple[str, Any]]] = deque()
+        debug('Shared scan initialization complete')
+
+    def view(self) -> 'SharedLogicalSource':
+        """
+        Returns a new consumer of the scan.
+        """
+        view = SharedLogicalSource(self)
+        self._views.append(view)
+        debug(f'{len(self._views)} consumers of shared scan')
+        return view
+
+    def _read(self) -> Optional[Union[Dict, Tuple]]:
+        """
+        Reads the next record and adds it to the buffer of every consumer.
+        Returns None when the Logical Source is exhausted.
+        """
+        if self._exhausted:
+            return None
+
+        try:
+            record: Union[Dict, Tuple] = next(self._source)
+        except StopIteration:
+            self._exhausted = True
+            return None
+        finally:
+            # Also kept when reading the next record fails
+            checkpoint: Optional[Tuple[str, Any]] = \
+                self._source.pop_checkpoint()
+            if checkpoint is not None:
+                self._checkpoints.append((self._read_count, checkpoint))
+        self._read_count += 1
+
+        for v in self._views:
+            v._buffer.append(record)
+        return record
+
+    def _pop_checkpoint(self) -> Optional[Tuple[str, Any]]:
+        """
+        Returns the last checkpoint of the Logical Source of which every
+        consumer read all records before it, otherwise None.
+        """
+        read: int = min([self._read_count - len(v._buffer)
+                         for v in self._views])
+        checkpoint: Optional[Tuple[str, Any]] = None
+        while self._checkpoints and self._checkpoints[0][0] <= read:
+            checkpoint = self._checkpoints.popleft()[1]
+        return checkpoint
+
+    @property
+    def mime_type(self) -> MIMEType:
+        """
+        Returns the MIME type of the scanned Logical Source.
+        """
+        return self._source.mime_type
+
+    @property
+    def columns(self) -> Optional[List[str]]:
+        """
+        Returns the column names of the scanned Logical Source.
+        """
+        return self._source.columns
+
+
+class SharedLogicalSource(LogicalSource):
+    def __init__(self, scan: SharedScan) -> None:
+        """
+        A consumer of a shared scan of a Logical Source.
+        Created by SharedScan.view().
+        """
+        super().__init__()
+        self._scan: SharedScan = scan
+        self._buffer: Deque[Union[Dict, Tuple]] = deque()
+        self._source: Optional[LogicalSource] = None
+
+    def __next__(self) -> Union[Dict, Tuple]:
+        """
+        Returns the next record of the shared scan.
+        """
+        # Forked worker process, scan a Logical Source of its own
+        if self._scan._pid != getpid():
+            if self._source is None:
+                debug('Shared scan forked, creating a new Logical Source')
+                self._source = self._scan._factory()
+            return next(self._source)
+
+        if not self._buffer and self._scan._read() is None:
+            raise StopIteration
+        return self._buffer.popleft()
+
+    def pop_checkpoint(self) -> Optional[Tuple[str, Any]]:
+        """
+        Returns the checkpoint of the shared scan once every consumer read
+        all records before it. Consumers in a forked worker process do not
+        return checkpoints: their Logical Sources share the checkpoint file.
+        """
+        if self._scan._pid != getpid():
+            return None
+        return self._scan._pop_checkpoint()
+
+    @property
+    def mime_type(self) -> MIMEType:
+        """
+        Returns the MIME type of the scanned Logical Source.
+        """
+        return self._scan.mime_type
+
+    @property
+    def columns(self) -> Optional[List[str]]:
+        """
+        Returns the column names of the scanned Logical Source.
+        """
+        return self._scan.columns
@@ -1,36 +1,58 @@
 import re
-from logging import debug, critical
+import json
+from logging import debug, info, warning, critical
 from enum import Enum
 from abc import ABC, abstractmethod
-from io import StringIO
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import StringIO, TextIOWrapper
 from SPARQLWrapper import SPARQLWrapper, JSON, XML
 from SPARQLWrapper.SPARQLExceptions import EndPointNotFound
-from jsonpath_ng import parse
+from jsonpath_ng import parse, JSONPath, Child, Fields, Slice, Index
 from lxml import etree
 from lxml.etree import XPathEvalError, Element
-from requests import get, HTTPError
-from typing import Union, Dict, List
+from requests import get, HTTPError, Session
+from requests.adapters import HTTPAdapter
+from typing import Union, Dict, List, Deque, Iterator, Optional, Tuple, \
+                   IO, Any
 from xml.dom.minidom import Document
 
 from rml.io.sources import LogicalSource, MIMEType
+from rml.io.sources.json_source import JSONStream, get_streaming_keys, \
+                                       DEFAULT_STREAMING
 from rml.namespace.xmls import SPARQL_RESULTS_PREFIX, SPARQL_RESULTS_NS
 
 NS = {SPARQL_RESULTS_PREFIX: SPARQL_RESULTS_NS}
 SPARQL_SELECT_PATTERN = re.compile(r'SELECT.+WHERE')
 SPARQL_VARIABLE_PATTERN = re.compile(r'(\?\w+)')
+SPARQL_LIMIT_OFFSET_PATTERN = re.compile(r'(LIMIT|OFFSET)\s+\d+\s*$',
+                                         re.IGNORECASE)
+SPARQL_ORDER_BY_PATTERN = re.compile(r'ORDER\s+BY', re.IGNORECASE)
+# Number of pages fetched concurrently from a SPARQL endpoint
+DEFAULT_WORKERS: int = 4
 
 
 class SPARQLLogicalSource(LogicalSource, ABC):
-    def __init__(self, rml_iterator: str, endpoint: str, query: str):
+    def __init__(self, rml_iterator: str, endpoint: str, query: str,
+                 page_size: Optional[int] = None,
+                 workers: int = DEFAULT_WORKERS):
         """
         An SPARQL Logical Source to iterate over RDF data.
         The RML iterator is used to select the JSON results or XML
         results depending on return_format.
+
+        :param int page_size: Read the results in pages of this number of
+        solutions by adding LIMIT and OFFSET to the query. Queries with a
+        LIMIT or OFFSET are read at once.
+        :param int workers: The number of pages fetched concurrently over a
+        single keep-alive HTTP session.
         """
         super().__init__(rml_iterator)
         self._query = query
         self._endpoint = endpoint
         self._return_format: str
+        self._page_size: Optional[int] = page_size
+        self._workers: int = workers
         debug(f'Query: {self._query}')
         debug(f'SPARQL endpoint: {self._endpoint}')
 
@@ -50,6 +72,21 @@ class SPARQLLogicalSource(LogicalSource, ABC):
             critical(msg)
             raise ValueError(msg)
 
+        if self._page_size is not None:
+            if self._page_size < 1 or self._workers < 1:
+                msg = 'Page size and workers must be positive: ' + \
+                      f'{self._page_size}, {self._workers}'
+                critical(msg)
+                raise ValueError(msg)
+            if SPARQL_LIMIT_OFFSET_PATTERN.search(q):
+                warning('SPARQL query has a LIMIT or OFFSET, reading results '
+                        'at once')
+                self._page_size = None
+            elif not SPARQL_ORDER_BY_PATTERN.search(q):
+                warning('SPARQL query without ORDER BY, pages may overlap if '
+                        'the endpoint does not return results in a stable '
+                        'order')
+
         debug('Source initialization complete')
 
     def _execute_query(self) -> None:
@@ -57,6 +94,75 @@ class SPARQLLogicalSource(LogicalSource, ABC):
                                      returnFormat=self._return_format)
         self._engine.setQuery(self._query)
 
+    def _read_pages(self) -> Iterator[Union[Dict, Element]]:
+        """
+        Fetches pages of results concurrently and yields their records in
+        order as soon as a page and all pages before it have arrived.
+        Fetching starts when the first record is read to not share the HTTP
+        session and its threads with forked processes. Stops at the first
+        page with less solutions than the page size.
+        """
+        assert self._page_size is not None
+        with Session() as session, \
+                ThreadPoolExecutor(self._workers) as executor:
+            # Keep a connection alive for each worker
+            adapter = HTTPAdapter(pool_maxsize=self._workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            pages: Deque[Future] = deque()
+            offset: int = 0
+            for _ in range(self._workers):
+                pages.append(executor.submit(self._read_page, session,
+                                             offset))
+                offset += self._page_size
+
+            while pages:
+                solutions, records = pages.popleft().result()
+                debug(f'Page with {solutions} solutions')
+                yield from records
+
+                if solutions < self._page_size:
+                    for p in pages:
+                        p.cancel()
+                    break
+                pages.append(executor.submit(self._read_page, session,
+                                             offset))
+                offset += self._page_size
+
+    def _read_page(self, session: Session, offset: int) \
+            -> Tuple[int, List[Union[Dict, Element]]]:
+        """
+        Fetches the page of results at the offset.
+        Returns the number of solutions and the records of the page.
+        """
+        query: str = f'{self._query}\nLIMIT {self._page_size} OFFSET {offset}'
+        try:
+            response = session.get(self._endpoint, params={'query': query},
+                                   headers={'Accept': self._accept})
+            response.raise_for_status()
+        except HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                msg = f'Endpoint {self._endpoint} not found: {e}'
+                critical(msg)
+                raise FileNotFoundError(msg)
+            raise
+        return self._parse_page(response.content)
+
+    @property
+    @abstractmethod
+    def _accept(self) -> str:
+        """
+        The media type of the SPARQL results requested when paging.
+        """
+
+    @abstractmethod
+    def _parse_page(self, content: bytes) \
+            -> Tuple[int, List[Union[Dict, Element]]]:
+        """
+        Parse a page of SPARQL results, returns the number of solutions and
+        the records selected by the RML iterator.
+        """
+
     @abstractmethod
     def _parse_results(self) -> None:
         """
@@ -78,13 +184,24 @@ class SPARQLLogicalSource(LogicalSource, ABC):
 
 
 class SPARQLJSONLogicalSource(SPARQLLogicalSource):
-    def __init__(self, rml_iterator: str, endpoint: str, query: str):
+    def __init__(self, rml_iterator: str, endpoint: str, query: str,
+                 page_size: Optional[int] = None,
+                 workers: int = DEFAULT_WORKERS,
+                 streaming: bool = DEFAULT_STREAMING):
         """
         An SPARQL JSON Logical Source to iterate over RDF data with results
         returned as JSON.
+
+        :param bool streaming: Parse the results incrementally while they
+        are read from the endpoint if the RML iterator selects all elements
+        of an array such as '$.results.bindings[*]', optionally followed by
+        fields like '$.results.bindings[*].actor'. Other JSONPath
+        expressions and pages fall back to loading the whole results.
         """
-        super().__init__(rml_iterator, endpoint, query)
+        super().__init__(rml_iterator, endpoint, query, page_size, workers)
         self._return_format = JSON
+        self._streaming: bool = streaming
+        self._response: Optional[IO] = None
         self._execute_query()
         self._parse_results()
         debug(f'SPARQL results format: {self._return_format}')
@@ -100,6 +217,20 @@ class SPARQLJSONLogicalSource(SPARQLLogicalSource):
             msg = f'Invalid JSONPath: {self._rml_iterator}: {e}'
             critical(msg)
             raise ValueError(msg)
+        self._path = self._iterator
+
+        if self._page_size is not None:
+            self._iterator = self._read_pages()
+            return
+
+        # Parse SPARQL JSON results incrementally
+        if self._streaming:
+            split = self._get_streaming_split(self._path)
+            if split is not None:
+                self._iterator = self._stream_results(*split)
+                return
+            info(f'JSONPath {self._rml_iterator} cannot be streamed, '
+                 'falling back to loading the whole SPARQL results')
 
         # Parse SPARQL JSON results
         try:
@@ -110,15 +241,86 @@ class SPARQLJSONLogicalSource(SPARQLLogicalSource):
             raise FileNotFoundError(msg)
 
         # Find JSONPath results
-        self._iterator = iter(self._iterator.find(results))
+        self._iterator = iter([m.value for m in self._path.find(results)])
+
+    def _parse_page(self, content: bytes) -> Tuple[int, List[Dict]]:
+        """
+        Parse a page of SPARQL JSON results using the JSONPath expression
+        """
+        results: Dict = json.loads(content)
+        solutions: int = len(results.get('results', {}).get('bindings', []))
+        return solutions, [m.value for m in self._path.find(results)]
+
+    def _get_streaming_split(self, json_path: JSONPath) \
+            -> Optional[Tuple[List[str], Optional[JSONPath]]]:
+        """
+        Splits the JSONPath expression into the object keys to the streamed
+        array and the JSONPath expression applied to each element of the
+        array, None if there is no such element. Returns None if the
+        JSONPath expression cannot be streamed.
+        Only the shape $.key1.key2[*].field1.field2 is supported.
+        """
+        steps: List[JSONPath] = []
+        node: JSONPath = json_path
+        while isinstance(node, Child):
+            keys: Optional[List[str]] = get_streaming_keys(node)
+            if keys is not None:
+                remainder: Optional[JSONPath] = None
+                for step in steps:
+                    remainder = step if remainder is None \
+                        else Child(remainder, step)
+                return keys, remainder
+
+            # Steps after the array must not depend on the rest of the JSON
+            if not isinstance(node.right, (Fields, Slice, Index)):
+                return None
+            steps.insert(0, node.right)
+            node = node.left
+        return None
+
+    def _stream_results(self, keys: List[str],
+                        remainder: Optional[JSONPath]) -> Iterator[Any]:
+        """
+        Generator which yields the results of the JSONPath expression for
+        each element of the array as soon as it is read from the endpoint.
+        The response is opened when the first record is read to not share
+        its connection with forked processes.
+        """
+        try:
+            response = self._engine.query().response
+        except EndPointNotFound as e:
+            msg = f'Endpoint {self._endpoint} not found: {e}'
+            critical(msg)
+            raise FileNotFoundError(msg)
+        self._response = TextIOWrapper(response, encoding='utf-8')
+        for element in JSONStream(self._response, keys):
+            if remainder is None:
+                yield element
+            else:
+                for m in remainder.find(element):
+                    yield m.value
+
+    @property
+    def _accept(self) -> str:
+        """
+        Returns the SPARQL JSON results media type.
+        """
+        return 'application/sparql-results+json'
 
     def __next__(self) -> Dict:
         """
         Returns a result from the SPARQL iterator.
         raises StopIteration when exhausted.
         """
-        result: Dict = next(self._iterator).value
-        debug('Result: {result}')
+        try:
+            result: Dict = next(self._iterator)
+        # Iterator exhausted
+        except StopIteration:
+            if self._response is not None:
+                self._response.close()
+                debug('Response closed')
+            raise StopIteration
+        debug(f'Result: {result}')
         return result
 
     @property
@@ -130,12 +332,14 @@ class SPARQLJSONLogicalSource(SPARQLLogicalSource):
 
 
 class SPARQLXMLLogicalSource(SPARQLLogicalSource):
-    def __init__(self, rml_iterator: str, endpoint: str, query: str):
+    def __init__(self, rml_iterator: str, endpoint: str, query: str,
+                 page_size: Optional[int] = None,
+                 workers: int = DEFAULT_WORKERS):
         """
         An SPARQL XML Logical Source to iterate over RDF data with results
         returned as XML.
         """
-        super().__init__(rml_iterator, endpoint, query)
+        super().__init__(rml_iterator, endpoint, query, page_size, workers)
         self._return_format = XML
         self._execute_query()
         self._parse_results()
@@ -145,6 +349,17 @@ class SPARQLXMLLogicalSource(SPARQLLogicalSource):
         """
         Parse SPARQL results as XML using an XPath expression
         """
+        if self._page_size is not None:
+            # Validate the XPath expression before fetching any page
+            try:
+                etree.XPath(self._rml_iterator, namespaces=NS)
+            except etree.XPathSyntaxError as e:
+                msg = f'Invalid XPath: {self._rml_iterator}: {e}'
+                critical(msg)
+                raise ValueError(msg)
+            self._iterator = self._read_pages()
+            return
+
         # Parse SPARQL XML results
         try:
             results: Document = self._engine.queryAndConvert()
@@ -164,13 +379,34 @@ class SPARQLXMLLogicalSource(SPARQLLogicalSource):
             critical(msg)
             raise ValueError(msg)
 
+    def _parse_page(self, content: bytes) -> Tuple[int, List[Element]]:
+        """
+        Parse a page of SPARQL XML results using the XPath expression
+        """
+        tree: Element = etree.fromstring(content)
+        solutions: int = len(tree.xpath('/sr:sparql/sr:results/sr:result',
+                                        namespaces=NS))
+        try:
+            return solutions, tree.xpath(self._rml_iterator, namespaces=NS)
+        except XPathEvalError as e:
+            msg = f'Invalid XPath: {self._rml_iterator}: {e}'
+            critical(msg)
+            raise ValueError(msg)
+
+    @property
+    def _accept(self) -> str:
+        """
+        Returns the SPARQL XML results media type.
+        """
+        return 'application/sparql-results+xml'
+
     def __next__(self) -> Element:
         """
         Returns an XML element from the XML iterator.
         raises StopIteration when exhausted.
         """
         result: Element = next(self._iterator)
-        debug('Result: {etree.tostring(result, pretty_print=True)}')
+        debug(f'Result: {etree.tostring(result, pretty_print=True)}')
         return result
 
     @property
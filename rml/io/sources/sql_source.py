@@ -1,29 +1,197 @@
-from logging import debug, critical, getLogger, DEBUG
-from sqlalchemy import create_engine, inspect
+import re
+import json
+from logging import debug, info, warning, critical, getLogger, DEBUG
+from math import ceil
+from os import remove, replace, register_at_fork
+from os.path import exists, dirname, abspath
+from tempfile import NamedTemporaryFile
+from queue import Queue, Full
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, inspect, select, text, \
+                       literal_column, bindparam
+from sqlalchemy.sql.expression import Select
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.engine.reflection import Inspector
-from typing import Dict
+from sqlalchemy.engine import ResultProxy, Engine
+from sqlalchemy.engine.url import URL, make_url
+from sqlalchemy.pool import Pool, QueuePool
+from sqlalchemy.types import Integer
+from threading import Lock, Event
+from typing import Dict, Iterator, List, Optional, Union, Any, Tuple
 
 from rml.io.sources import LogicalSource, MIMEType
 
+# Streaming is disabled by default, the driver may buffer all rows at once
+DEFAULT_STREAMING: bool = False
+# Number of rows fetched at once from the database when streaming
+DEFAULT_BATCH_SIZE: int = 10000
+# Rows are returned as dicts by default
+DEFAULT_TUPLES: bool = False
+# Partitioning is disabled by default, the query is read by a single thread
+DEFAULT_PARTITIONS: int = 1
+# Maximum number of batches buffered between the partition readers and the
+# Logical Source
+QUEUE_SIZE: int = 16
+# Seconds between checks whether the Logical Source was closed while a
+# partition reader waits for space in the queue
+QUEUE_TIMEOUT: float = 0.1
+# Queries reading (some columns of) a single table, as generated by the
+# compiler from rr:tableName
+SIMPLE_QUERY_PATTERN = re.compile(r'^\s*SELECT\s+(?P<columns>.+?)\s+FROM\s+'
+                                  r'(?P<table>[^\s;,()]+)\s*;?\s*$',
+                                  re.IGNORECASE | re.DOTALL)
+SQL_IDENTIFIER_QUOTES: str = '"`[]'
+# Column alias of the key of a row when reading in pages
+PAGE_KEY_ALIAS: str = 'rml_page_key'
+# Number of attempts to read a page when the connection is lost
+PAGE_RETRIES: int = 3
+
+# Process-wide engines, one per DSN, to share their connection pools
+_engines: Dict[str, Engine] = {}
+_engines_lock: Lock = Lock()
+# Connection pools inherited from the parent process by a forked process
+_inherited_pools: List[Pool] = []
+
+
+def _reset_engines() -> None:
+    """
+    Gives the engines new connection pools in a forked process.
+    The inherited pools are kept but never used: their connections belong
+    to the parent process and closing them would close them for the parent
+    process as well.
+    """
+    global _engines_lock
+    _engines_lock = Lock()
+    for engine in _engines.values():
+        _inherited_pools.append(engine.pool)
+        engine.pool = engine.pool.recreate()
+
+
+register_at_fork(after_in_child=_reset_engines)
+
+
+def get_engine(jdbc: str) -> Engine:
+    """
+    Returns the engine of a database, the engine is only created once per
+    DSN. Connections from the engine are pooled, closing them returns them to
+    the pool. Connections beyond the size of the pool are closed when they
+    are returned.
+
+    :param str jdbc: The DSN of the database.
+    """
+    with _engines_lock:
+        engine = _engines.get(jdbc)
+        if engine is None:
+            # Every Logical Source keeps a connection while it is read and
+            # all Logical Sources are read at the same time: do not limit
+            # the number of connections of a pool to its size.
+            options: Dict[str, Any] = {}
+            url: URL = make_url(jdbc)
+            if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+                options['max_overflow'] = -1
+            # Pass through logging if level is DEBUG
+            engine = create_engine(jdbc, echo=getLogger().isEnabledFor(DEBUG),
+                                   **options)
+            _engines[jdbc] = engine
+            debug(f'Created engine for {jdbc}')
+        return engine
+
+
+def write_checkpoint(path: str, last_key: Any) -> None:
+    """
+    Writes the last key of the completely mapped pages of a Logical Source to
+    its checkpoint file. The checkpoint file is replaced atomically.
+
+    :param str path: The checkpoint file.
+    :param last_key: The key of the last row of the completely mapped pages.
+    The checkpoint file is removed if None: all pages are mapped.
+    """
+    if last_key is None:
+        if exists(path):
+            remove(path)
+        debug(f'Checkpoint {path} removed')
+        return
+
+    with NamedTemporaryFile(mode='w', delete=False,
+                            dir=dirname(abspath(path))) as f:
+        json.dump({'last_key': last_key}, f, default=str)
+    replace(f.name, path)
+    debug(f'Checkpoint {path} at key {last_key}')
+
 
 class SQLLogicalSource(LogicalSource):
-    def __init__(self, jdbc: str, query: str = None, table_name: str = None):
+    def __init__(self, jdbc: str, query: str = None, table_name: str = None,
+                 streaming: bool = DEFAULT_STREAMING,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 partitions: int = DEFAULT_PARTITIONS,
+                 partition_column: Optional[str] = None,
+                 page_size: Optional[int] = None,
+                 key_column: Optional[str] = None,
+                 last_key: Optional[Any] = None,
+                 checkpoint: Optional[str] = None,
+                 tuples: bool = DEFAULT_TUPLES):
         """
         An SQL Logical Source to iterate over RDB data.
         The RML iterator is not used for row-based iterators.
+
+        :param str jdbc: The DSN of the database.
+        :param str query: The SQL query to execute.
+        :param bool streaming: Fetch the rows through a server-side cursor
+        instead of letting the driver buffer the whole result set.
+        :param int batch_size: The number of rows fetched at once when
+        streaming or reading partitions.
+        :param int partitions: The number of key ranges the query is split
+        into. The partitions are read concurrently on pooled connections but
+        their rows are returned by this single Logical Source: only reading
+        the database is parallelized, the rows are mapped by one TriplesMap
+        in one process.
+        :param str partition_column: The integer column to split the query
+        on. If not provided, the integer primary key of the table is used
+        when the query reads a single table.
+        :param int page_size: Read the query in pages of this number of rows
+        with keyset pagination. Each page is read in a short transaction
+        instead of keeping a cursor open for the whole query.
+        :param str key_column: The unique column to order the pages by. If
+        not provided, the primary key of the table is used when the query
+        reads a single table.
+        :param last_key: Resume reading the pages after this key.
+        :param str checkpoint: File to record the last key of the completely
+        mapped pages in, see pop_checkpoint(). A failed run resumes from the
+        checkpoint, the checkpoint is removed when all pages are mapped.
+        :param bool tuples: Return the rows of the driver as they are,
+        indexed in the order of the columns property, instead of copying
+        them into dicts. Term Maps resolve their references to column indices
+        once. Not supported when reading in pages or
+        partitions.
         """
         super().__init__()
         self._jdbc = jdbc
         self._query = query
+        self._streaming: bool = streaming
+        self._batch_size: int = batch_size
+        self._partitions: int = partitions
+        self._partition_column: Optional[str] = partition_column
+        self._page_size: Optional[int] = page_size
+        self._key_column: Optional[str] = key_column
+        self._last_key: Optional[Any] = last_key
+        self._checkpoint: Optional[str] = checkpoint
+        self._pending_checkpoint: Optional[Tuple[str, Any]] = None
+        self._closed: Event = Event()
+        self._columns: Optional[List[str]] = None
         debug(f'JDBC: {self._jdbc}')
         debug(f'Query: {self._query}')
+        debug(f'Streaming: {self._streaming}')
+        debug(f'Batch size: {self._batch_size}')
+        debug(f'Partitions: {self._partitions}')
+        debug(f'Partition column: {self._partition_column}')
+        debug(f'Page size: {self._page_size}')
+        debug(f'Key column: {self._key_column}')
+        debug(f'Checkpoint: {self._checkpoint}')
+        debug(f'Tuples: {tuples}')
 
         # Connect to database
         try:
-            # Pass through logging if level is DEBUG
-            self._engine = create_engine(self._jdbc,
-                                         echo=getLogger().isEnabledFor(DEBUG))
+            self._engine: Engine = get_engine(self._jdbc)
             self._connection = self._engine.connect()
         except OperationalError as e:
             msg = f'Cannot connect to database {self._jdbc}: {e}'
@@ -32,7 +200,39 @@ class SQLLogicalSource(LogicalSource):
 
         # Execute SQL query on database
         try:
-            self._iterator = self._connection.execute(self._query)
+            page_queries: Optional[List[Select]] = None
+            if self._page_size is not None:
+                page_queries = self._get_page_queries()
+            partition_queries: Optional[List[str]] = None
+            if self._partitions > 1 and page_queries is None:
+                partition_queries = self._get_partition_queries()
+
+            if page_queries is not None:
+                first_page, next_page = page_queries
+                # First page is read immediately to report errors
+                if self._last_key is None:
+                    rows = self._read_page(first_page)
+                else:
+                    rows = self._read_page(next_page, last_key=self._last_key)
+                self._iterator = self._read_pages(rows, next_page)
+            elif partition_queries is not None:
+                self._iterator = self._read_partitions(partition_queries)
+            elif self._streaming:
+                connection = \
+                    self._connection.execution_options(stream_results=True)
+                result: ResultProxy = connection.execute(self._query)
+                self._iterator = self._fetch(result)
+            else:
+                result = self._connection.execute(self._query)
+                self._iterator = result
+
+            if tuples and (page_queries is not None or
+                           partition_queries is not None):
+                warning('Tuples are not supported when reading in pages or '
+                        'partitions, returning dicts')
+            elif tuples:
+                self._columns = list(result.keys())
+                debug(f'Columns: {self._columns}')
         except OperationalError as e:
             self._connection.close()
             msg = f'Connection to database lost {self._jdbc}: {e}'
@@ -41,20 +241,299 @@ class SQLLogicalSource(LogicalSource):
 
         debug('Source initialization complete')
 
-    def __next__(self) -> Dict:
+    def __next__(self) -> Union[Dict, Tuple]:
         """
         Returns a result from the SQL iterator.
         raises StopIteration when exhausted.
         """
         try:
-            result = dict(next(self._iterator))
+            result: Union[Dict, Tuple]
+            # Rows are indexed by column like tuples, without copying them
+            if self._columns is not None:
+                result = next(self._iterator)
+            else:
+                result = dict(next(self._iterator))
             debug('Result: {result}')
             return result
         except StopIteration:
-            self._connection.close()
-            debug('SQL connection closed')
+            self._close()
             raise StopIteration
 
+    def _close(self) -> None:
+        """
+        Closes the connection and stops the partition readers.
+        """
+        self._closed.set()
+        self._connection.close()
+        debug('SQL connection closed')
+
+    def _fetch(self, result: ResultProxy) -> Iterator:
+        """
+        Generator which fetches the rows in batches from the cursor.
+        """
+        while True:
+            rows = result.fetchmany(self._batch_size)
+            if not rows:
+                return
+            debug(f'Fetched {len(rows)} rows')
+            for row in rows:
+                yield row
+
+    @property
+    def columns(self) -> Optional[List[str]]:
+        """
+        The column names of the rows when returning tuples, otherwise None.
+        """
+        return self._columns
+
+    @property
+    def last_key(self) -> Optional[Any]:
+        """
+        The key of the last returned row when reading in pages.
+        """
+        return self._last_key
+
+    def _get_page_queries(self) -> Optional[List[Select]]:
+        """
+        Creates the queries for the first and the next pages, ordered by the
+        key column. The key of each row is selected as PAGE_KEY_ALIAS.
+        Returns None if no key column is available.
+        """
+        query: str = self._query.strip().rstrip(';')
+        column: Optional[str] = self._key_column
+        match = SIMPLE_QUERY_PATTERN.match(self._query)
+
+        # Single table: the key column does not need to be selected
+        if match is not None:
+            if column is None:
+                column = self._get_primary_key(match.group('table'))
+            columns: str = match.group('columns')
+            source: str = match.group('table')
+        # Any other query: page its results
+        else:
+            columns = 'page_source.*'
+            source = f'({query}) AS page_source'
+
+        if column is None:
+            warning(f'No key column for query {self._query}, reading '
+                    'without pages')
+            return None
+
+        # Resume from checkpoint
+        if self._checkpoint is not None and self._last_key is None and \
+                exists(self._checkpoint):
+            with open(self._checkpoint) as f:
+                self._last_key = json.load(f)['last_key']
+            info(f'Resuming {self._query} after key {self._last_key}')
+
+        key = literal_column(column)
+        first_page: Select = select([literal_column(columns),
+                                     key.label(PAGE_KEY_ALIAS)]) \
+            .select_from(text(source)) \
+            .order_by(key) \
+            .limit(self._page_size)
+        next_page: Select = first_page.where(key > bindparam('last_key'))
+        debug(f'Page query: {next_page}')
+        return [first_page, next_page]
+
+    def _read_pages(self, rows: List, next_page: Select) -> Iterator:
+        """
+        Generator which yields the rows of the given first page and reads the
+        next pages one by one. The key of a page becomes available as
+        checkpoint when all rows of the page are returned, the Logical Target
+        writes the checkpoint once their triples are flushed.
+        """
+        assert self._page_size is not None
+        while True:
+            for row in rows:
+                record: Dict = dict(row)
+                self._last_key = record.pop(PAGE_KEY_ALIAS)
+                yield record
+
+            # Last page
+            if len(rows) < self._page_size:
+                if self._checkpoint is not None:
+                    self._pending_checkpoint = (self._checkpoint, None)
+                return
+
+            if self._checkpoint is not None:
+                self._pending_checkpoint = (self._checkpoint, self._last_key)
+            rows = self._read_page(next_page, last_key=self._last_key)
+
+    def _read_page(self, query: Select, **params: Any) -> List:
+        """
+        Reads a page in its own transaction. Reading the page is retried on a
+        new connection if the connection is lost.
+        """
+        for attempt in range(1, PAGE_RETRIES + 1):
+            try:
+                with self._engine.connect() as connection:
+                    rows: List = connection.execute(query, **params) \
+                        .fetchall()
+                    debug(f'Read page of {len(rows)} rows after {params}')
+                    return rows
+            except OperationalError as e:
+                if not e.connection_invalidated or attempt == PAGE_RETRIES:
+                    msg = f'Unable to read page from {self._jdbc}: {e}'
+                    critical(msg)
+                    raise ValueError(msg)
+                warning(f'Connection to database lost {self._jdbc}, '
+                        f'retrying page ({attempt}/{PAGE_RETRIES})')
+        return []  # pragma: no cover
+
+    def pop_checkpoint(self) -> Optional[Tuple[str, Any]]:
+        """
+        Returns the checkpoint file and the last key of the pages of which
+        all rows are returned since the previous call, otherwise None.
+        The key is None when all pages are returned.
+        """
+        checkpoint: Optional[Tuple[str, Any]] = self._pending_checkpoint
+        self._pending_checkpoint = None
+        return checkpoint
+
+    def _get_partition_queries(self) -> Optional[List[str]]:
+        """
+        Splits the query into queries over equally sized key ranges between
+        the minimum and maximum value of the partition column, followed by a
+        query over the rows without a value for the partition column.
+        Returns None if the query cannot be partitioned.
+        """
+        query: str = self._query.strip().rstrip(';')
+        column: Optional[str] = self._partition_column
+        match = SIMPLE_QUERY_PATTERN.match(self._query)
+
+        # Single table: filter the table itself, the partition column does
+        # not need to be selected by the query
+        if match is not None:
+            table: str = match.group('table')
+            if column is None:
+                column = self._get_integer_primary_key(table)
+            source: str = table
+            partition_query: str = query + ' WHERE {}'
+        # Any other query: filter its results
+        else:
+            source = f'({query}) AS partition_source'
+            partition_query = f'SELECT * FROM {source} WHERE {{}}'
+
+        if column is None:
+            warning(f'No partition column for query {self._query}, reading '
+                    'without partitions')
+            return None
+
+        bounds = self._connection.execute(f'SELECT MIN({column}), '
+                                          f'MAX({column}) FROM {source}')
+        minimum, maximum = bounds.first()
+        debug(f'Partition column {column} ranges from {minimum} to {maximum}')
+        # NULL values are not part of any key range
+        queries: List[str] = [partition_query.format(f'{column} IS NULL')]
+        # Empty result or only NULL values
+        if minimum is None or maximum is None:
+            return queries
+
+        size: int = ceil((int(maximum) - int(minimum) + 1) / self._partitions)
+        for start in range(int(minimum), int(maximum) + 1, size):
+            condition: str = f'{column} >= {start} AND ' \
+                             f'{column} < {start + size}'
+            queries.insert(-1, partition_query.format(condition))
+        debug(f'Partition queries: {queries}')
+        return queries
+
+    def _get_primary_key(self, table: str) -> Optional[str]:
+        """
+        Returns the primary key of the table if it is a single column,
+        otherwise None.
+        """
+        table = table.strip(SQL_IDENTIFIER_QUOTES)
+        inspector: Inspector = inspect(self._engine)
+        primary_key: List[str] = \
+            inspector.get_pk_constraint(table)['constrained_columns']
+        if len(primary_key) != 1:
+            return None
+        debug(f'Primary key of {table}: {primary_key[0]}')
+        return primary_key[0]
+
+    def _get_integer_primary_key(self, table: str) -> Optional[str]:
+        """
+        Returns the primary key of the table if it is a single integer
+        column, otherwise None.
+        """
+        primary_key: Optional[str] = self._get_primary_key(table)
+        if primary_key is None:
+            return None
+
+        inspector: Inspector = inspect(self._engine)
+        table = table.strip(SQL_IDENTIFIER_QUOTES)
+        for c in inspector.get_columns(table):
+            if c['name'] == primary_key and isinstance(c['type'], Integer):
+                name: str = c['name']
+                debug(f'Integer primary key of {table}: {name}')
+                return name
+        return None
+
+    def _read_partitions(self, queries: List[str]) -> Iterator:
+        """
+        Generator which reads the partitions concurrently and yields their
+        rows in order of arrival, merged into a single iterator. The readers
+        are started on the first row to support forking the Logical Source to
+        a worker process.
+        """
+        if not queries:
+            return
+
+        queue: Queue = Queue(QUEUE_SIZE)
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            try:
+                for q in queries:
+                    executor.submit(self._read_partition, q, queue)
+
+                remaining: int = len(queries)
+                while remaining > 0:
+                    batch: Union[List[Dict], Exception, None] = queue.get()
+                    # Partition completely read
+                    if batch is None:
+                        remaining -= 1
+                    elif isinstance(batch, Exception):
+                        msg = f'Unable to read partition from {self._jdbc}: ' \
+                              f'{batch}'
+                        critical(msg)
+                        raise ValueError(msg)
+                    else:
+                        yield from batch
+            finally:
+                self._closed.set()
+
+    def _read_partition(self, query: str, queue: Queue) -> None:
+        """
+        Reads a single partition on a pooled connection and puts its rows in
+        the queue in batches, followed by None.
+        Exceptions are put in the queue to raise them in the Logical Source.
+        """
+        result: Union[List[Dict], Exception, None] = None
+        try:
+            with self._engine.connect() as connection:
+                connection = connection.execution_options(stream_results=True)
+                rows = connection.execute(query)
+                while not self._closed.is_set():
+                    batch = rows.fetchmany(self._batch_size)
+                    if not batch:
+                        break
+                    self._put(queue, [dict(r) for r in batch])
+        except Exception as e:
+            result = e
+        self._put(queue, result)
+
+    def _put(self, queue: Queue, item: Union[List[Dict], Exception, None]) \
+            -> None:
+        """
+        Puts an item in the queue, unless the Logical Source is closed.
+        """
+        while not self._closed.is_set():
+            try:
+                queue.put(item, timeout=QUEUE_TIMEOUT)
+                return
+            except Full:
+                continue
+
     @property
     def mime_type(self) -> MIMEType:
         """
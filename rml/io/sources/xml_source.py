@@ -1,33 +1,73 @@
-from logging import debug, critical
+import re
+from logging import debug, info, critical
 from lxml import etree
 from lxml.etree import Element
+from typing import Any, Dict, Iterator, List, Optional, IO
 
 from rml.io.sources import LogicalSource, MIMEType
 
+# Streaming is disabled by default, the XML file is parsed at once
+DEFAULT_STREAMING: bool = False
+# Absolute XPath expressions with only element names can be streamed: /a/b
+STREAMING_PATTERN = re.compile(r'^(/[A-Za-z_][A-Za-z0-9_.\-]*)+$')
+
 
 class XMLLogicalSource(LogicalSource):
-    def __init__(self, rml_iterator: str, path: str):
+    def __init__(self, rml_iterator: str, path: str,
+                 streaming: bool = DEFAULT_STREAMING,
+                 documents: Optional[Dict[str, Any]] = None):
         """
         An XML Logical Source to iterate over XML data.
         The RML iterator is an XPath expression.
+
+        :param str rml_iterator: The XPath expression to iterate over.
+        :param str path: The file path to the XML file.
+        :param bool streaming: Parse the XML file incrementally if the RML
+        iterator is an absolute path of element names such as
+        '/root/record'. Each element is discarded with its preceding
+        siblings once the next element is requested. Other XPath
+        expressions fall back to parsing the whole XML file.
+        :param dict documents: Parsed XML files by path, shared between
+        Logical Sources. A file parsed at once is added to or taken from the
+        documents, each file is only parsed once.
         """
         super().__init__(rml_iterator)
         self._path = path
+        self._file: Optional[IO] = None
+        self._iterator: Iterator
         debug(f'Path: {self._path}')
+        debug(f'Streaming: {streaming}')
 
-        # Parse XML file
-        with open(self._path) as f:
-            self._iterator = etree.parse(f)
+        tags: Optional[List[str]] = None
+        if streaming:
+            tags = self._get_streaming_tags()
+            if tags is None:
+                info(f'XPath {self._rml_iterator} cannot be streamed, '
+                     'falling back to parsing the whole XML file')
 
-        # Apply XPath expression
-        try:
-            self._iterator = self._iterator.xpath(self._rml_iterator)
-            self._iterator = iter(self._iterator)
-        # Syntax error in XPath
-        except Exception as e:
-            msg = f'Reference {self._rml_iterator} invalid XPath: {e}'
-            critical(msg)
-            raise NameError(msg)
+        # Parse XML file incrementally
+        if tags is not None:
+            self._file = open(self._path, 'rb')
+            self._iterator = self._stream(self._file, tags)
+        # Parse XML file at once, unless it is already parsed
+        else:
+            if documents is not None and self._path in documents:
+                debug(f'Shared parsed XML file {self._path}')
+                tree = documents[self._path]
+            else:
+                with open(self._path) as f:
+                    tree = etree.parse(f)
+                if documents is not None:
+                    documents[self._path] = tree
+
+            # Apply XPath expression
+            try:
+                self._iterator = iter(tree.xpath(self._rml_iterator))
+            # Syntax error in XPath
+            except Exception as e:
+                msg = f'Reference {self._rml_iterator} invalid XPath: {e}'
+                critical(msg)
+                raise NameError(msg)
 
         debug('Source initialization complete')
 
@@ -36,9 +76,57 @@ class XMLLogicalSource(LogicalSource):
         Returns an XML element from the XML iterator.
         raises StopIteration when exhausted.
         """
-        result: Element = next(self._iterator)
-        debug(f'Iterator: {result}')
-        return result
+        try:
+            result: Element = next(self._iterator)
+            debug(f'Iterator: {result}')
+            return result
+        # Iterator exhausted
+        except StopIteration:
+            if self._file is not None:
+                self._file.close()
+                debug('File closed')
+            raise StopIteration
+
+    def _get_streaming_tags(self) -> Optional[List[str]]:
+        """
+        Returns the element names to follow from the root if the XPath
+        expression can be streamed, otherwise None.
+        """
+        if STREAMING_PATTERN.match(self._rml_iterator) is None:
+            return None
+
+        tags = self._rml_iterator.split('/')[1:]
+        debug(f'Streaming XML elements at: {tags}')
+        return tags
+
+    def _stream(self, file: IO, tags: List[str]) -> Iterator[Element]:
+        """
+        Generator which yields each XML element matching the element names
+        while the XML file is parsed.
+        Elements which are completely processed are cleared and removed from
+        the tree to keep the memory usage bounded.
+        """
+        depth = len(tags)
+        stack: List[str] = []
+        for event, element in etree.iterparse(file, events=('start', 'end')):
+            if event == 'start':
+                stack.append(element.tag)
+                continue
+
+            # Descendants of a record are kept until the record is processed
+            if len(stack) <= depth:
+                # Preceding siblings are already processed
+                parent = element.getparent()
+                if parent is not None:
+                    while element.getprevious() is not None:
+                        del parent[0]
+
+                if stack == tags:
+                    yield element
+
+                # Record is processed or cannot contain records
+                element.clear()
+            stack.pop()
 
     @property
     def mime_type(self) -> MIMEType:
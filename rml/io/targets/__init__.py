@@ -1,9 +1,82 @@
+import pickle
 from abc import ABC, abstractmethod
-from logging import debug
-from typing import List, Iterator, Tuple
+from logging import debug, critical
+from multiprocessing import get_context, active_children
+from multiprocessing.pool import AsyncResult, Pool
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import Queue
+from queue import Empty
+from typing import List, Iterator, Tuple, Optional, Any, Set
 from rdflib.term import URIRef, Identifier
 
 from rml.io.maps.triples_map import TriplesMap
+from rml.io.sources import write_checkpoint
+
+# TriplesMaps are executed sequentially by default
+DEFAULT_WORKERS: int = 1
+# Number of triples sent at once from a worker to the Logical Target
+BATCH_SIZE: int = 1000
+# Maximum number of batches waiting to be added to the Logical Target
+QUEUE_SIZE: int = 64
+# Seconds between checks whether the worker processes are still running
+# while waiting for batches
+QUEUE_TIMEOUT: float = 1.0
+
+# Worker process state, inherited from the parent process
+_worker_target: Optional['LogicalTarget'] = None
+_worker_queue: Optional[Queue] = None
+
+
+def _init_worker(target: 'LogicalTarget', queue: Queue) -> None:
+    """
+    Initializes a worker process with the Logical Target and the queue to
+    send batches of triples to.
+    """
+    global _worker_target, _worker_queue
+    _worker_target = target
+    _worker_queue = queue
+
+
+def _execute_triples_map(index: int) -> None:
+    """
+    Executes a TriplesMap in a worker process and sends its triples in
+    batches to the Logical Target. A checkpoint of the Logical Source is sent
+    as a tuple after the batches with its triples. None is sent when the
+    TriplesMap is exhausted, an exception is sent when the execution fails.
+    """
+    assert _worker_target is not None and _worker_queue is not None
+    tm: TriplesMap = _worker_target._triples_maps[index]
+    batch: List[Tuple[URIRef, URIRef, Identifier, URIRef]] = []
+    try:
+        for triples in tm:
+            batch.extend(triples)
+            checkpoint = tm.pop_checkpoint()
+            if batch and (len(batch) >= BATCH_SIZE or
+                          checkpoint is not None):
+                _worker_queue.put(_worker_target._serialize_batch(batch))
+                batch = []
+            if checkpoint is not None:
+                _worker_queue.put(checkpoint)
+        if batch:
+            _worker_queue.put(_worker_target._serialize_batch(batch))
+        checkpoint = tm.pop_checkpoint()
+        if checkpoint is not None:
+            _worker_queue.put(checkpoint)
+        _worker_queue.put(None)
+    except Exception as e:
+        critical(f'{tm} failed: {e}')
+        # Triples of records behind a checkpoint would be skipped on resume
+        if batch:
+            _worker_queue.put(_worker_target._serialize_batch(batch))
+        checkpoint = tm.pop_checkpoint()
+        if checkpoint is not None:
+            _worker_queue.put(checkpoint)
+        # Exceptions which cannot be sent would never reach the parent
+        try:
+            pickle.dumps(e)
+        except Exception:
+            e = ValueError(f'{tm} failed: {e!r}')
+        _worker_queue.put(e)
 
 
 class LogicalTarget(ABC):
@@ -20,30 +93,151 @@ class LogicalTarget(ABC):
         Write a single record of triples to target.
         """
         exhausted_counter: int = 0
-        for tm in self._triples_maps:
-            try:
-                triples = next(tm)
-                for t in triples:
-                    self._add_to_target(t)
-            except StopIteration:
-                debug(f'{tm} exhausted')
-                exhausted_counter += 1
-                continue
+        try:
+            for tm in self._triples_maps:
+                try:
+                    triples = next(tm)
+                    for t in triples:
+                        self._add_to_target(t)
+                except StopIteration:
+                    debug(f'{tm} exhausted')
+                    exhausted_counter += 1
+                    continue
+        finally:
+            self._write_checkpoints([tm.pop_checkpoint()
+                                     for tm in self._triples_maps])
 
         if exhausted_counter == self._number_of_triples_maps:
             debug('All TriplesMaps are exhausted')
             raise StopIteration
 
-    def write_all(self) -> None:
+    def write_all(self, workers: int = DEFAULT_WORKERS) -> None:
         """
         Write all records of triples to target.
+
+        :param int workers: The number of worker processes executing the
+        TriplesMaps in parallel. TriplesMaps are executed one by one in the
+        current process if 1.
         """
+        if workers > 1:
+            self._write_parallel(workers)
+            return
+
         while True:
             try:
                 self.write()
             except StopIteration:
                 return
 
+    def _write_parallel(self, workers: int) -> None:
+        """
+        Executes each TriplesMap as a whole in a pool of worker processes and
+        adds the triple streams of the workers to target as they arrive.
+        Worker processes are forked to inherit the TriplesMaps and their
+        opened Logical Sources. Workers which are killed or stop without
+        sending all triples raise a ValueError instead of blocking forever,
+        once the queue is drained.
+        """
+        workers = min(workers, self._number_of_triples_maps)
+        debug(f'Executing {self._number_of_triples_maps} TriplesMaps with '
+              f'{workers} workers')
+        context = get_context('fork')
+        queue: Queue = context.Queue(QUEUE_SIZE)
+        children = set(active_children())
+        with context.Pool(workers, initializer=_init_worker,
+                          initargs=(self, queue)) as pool:
+            processes = set(active_children()) - children
+            result = pool.map_async(_execute_triples_map,
+                                    range(self._number_of_triples_maps),
+                                    chunksize=1)
+            running: int = self._number_of_triples_maps
+            exited: bool = False
+            while running > 0:
+                try:
+                    batch = queue.get(timeout=QUEUE_TIMEOUT)
+                except Empty:
+                    # Queue drained after all workers flushed it
+                    if exited:
+                        msg = f'{running} TriplesMaps completed without ' \
+                              'sending all triples'
+                        critical(msg)
+                        raise ValueError(msg)
+                    exited = self._check_workers(pool, processes, result)
+                    continue
+                # TriplesMap exhausted
+                if batch is None:
+                    running -= 1
+                    debug(f'{running} TriplesMaps running')
+                # TriplesMap failed
+                elif isinstance(batch, Exception):
+                    raise batch
+                # Page of a Logical Source completely mapped
+                elif isinstance(batch, tuple):
+                    self._write_checkpoints([batch])
+                else:
+                    self._add_batch_to_target(batch)
+            result.get()
+        debug('All TriplesMaps are exhausted')
+
+    def _check_workers(self, pool: Pool, processes: Set[BaseProcess],
+                       result: AsyncResult) -> bool:
+        """
+        Raises the failures of worker processes which are not sent through
+        the queue: killed workers and exceptions of the pool.
+        Returns True when all TriplesMaps are completed and all workers
+        exited. Workers flush the batches buffered by the queue when they
+        exit, the queue only misses triples if it is empty afterwards.
+        """
+        if not result.ready():
+            for p in processes:
+                if not p.is_alive():
+                    msg = f'Worker process {p.pid} stopped unexpectedly ' \
+                          f'with exit code {p.exitcode}'
+                    critical(msg)
+                    raise ValueError(msg)
+            return False
+
+        # Raises the exception of the worker, if any
+        result.get()
+        pool.close()
+        return not any([p.is_alive() for p in processes])
+
+    def _write_checkpoints(self,
+                           checkpoints: List[Optional[Tuple[str, Any]]]) \
+            -> None:
+        """
+        Writes the checkpoints of Logical Sources after flushing the triples
+        of their records, a resumed run would skip them otherwise.
+        """
+        if not any(checkpoints):
+            return
+
+        self._flush()
+        for c in checkpoints:
+            if c is not None:
+                write_checkpoint(*c)
+
+    def _flush(self) -> None:
+        """
+        Flushes the triples added to target.
+        """
+
+    def _serialize_batch(self, triples: List[Tuple[URIRef, URIRef,
+                                                   Identifier, URIRef]]) \
+            -> Any:
+        """
+        Prepares a batch of triples in a worker process to be sent to the
+        Logical Target.
+        """
+        return triples
+
+    def _add_batch_to_target(self, batch: Any) -> None:
+        """
+        Adds a batch of triples from a worker process to target.
+        """
+        for t in batch:
+            self._add_to_target(t)
+
     @abstractmethod
     def _add_to_target(self, triple: Tuple[URIRef, URIRef, Identifier,
                                            URIRef]) -> None:
@@ -1,25 +1,53 @@
 from logging import debug
-from typing import List, Tuple, TextIO
+from os.path import exists
+from typing import List, Tuple, TextIO, Optional, Union
 from rdflib.term import URIRef, Identifier
 from rdflib import Graph
+from rdflib.plugins.serializers.nt import _nt_row
+from rdflib.plugins.serializers.nquads import _nq_row
 
-from rml.io.targets import LogicalTarget
+from rml.io.targets import LogicalTarget, DEFAULT_WORKERS
 from rml.io.maps.triples_map import TriplesMap
 from rml.io.sources import MIMEType
 
+# Size of the write buffer for line-based serialization formats
+BUFFER_SIZE = 1024 * 1024
+# Line-based formats which are written as a stream instead of a graph
+STREAMING_FORMATS = (MIMEType.NTRIPLES, MIMEType.NQUADS)
+
 
 class FileLogicalTarget(LogicalTarget):
     def __init__(self, triples_maps: List[TriplesMap], path: str,
-                 format: MIMEType) -> None:
+                 format: MIMEType, append: bool = False) -> None:
         """
-        Creates a Logical Target with stdout as target.
+        Creates a Logical Target with a file as target.
+        N-Triples and N-Quads are streamed to the file through a buffered,
+        append-only writer. Other formats are collected in a graph and
+        serialized when the records are written.
+
+        :param bool append: Keep the triples already in the file, e.g. to
+        resume a failed run from the checkpoints of its SQL Logical Sources.
+        The pages read before the failure are skipped by the resumed run,
+        their triples are only kept in the file of the failed run.
         """
         super().__init__(triples_maps)
         self._path: str = path
-        self._graph = Graph()
         self._format: MIMEType = format
-        debug('Path: {self._path}')
-        debug('Serialization format: {self._format}')
+        self._streaming: bool = self._format in STREAMING_FORMATS
+        self._graph: Optional[Graph] = None
+        self._file: Optional[TextIO] = None
+        debug(f'Path: {self._path}')
+        debug(f'Serialization format: {self._format}')
+        debug(f'Streaming: {self._streaming}')
+        debug(f'Append: {append}')
+
+        if self._streaming:
+            self._file = open(self._path, 'a' if append else 'w',
+                              encoding='utf-8', buffering=BUFFER_SIZE)
+        else:
+            self._graph = Graph()
+            if append and exists(self._path):
+                self._graph.parse(self._path, format=self._format.value)
         debug('Target initialization complete')
 
     def write(self) -> None:
@@ -28,20 +56,95 @@ class FileLogicalTarget(LogicalTarget):
         """
         try:
             super().write()
+            self._flush()
         except StopIteration:
+            self._close()
             debug('Wrote single record')
             raise StopIteration
 
+    def write_all(self, workers: int = DEFAULT_WORKERS) -> None:
+        """
+        Write all records of triples to the file.
+        The file is only flushed once, after all records are written.
+
+        :param int workers: The number of worker processes executing the
+        TriplesMaps in parallel.
+        The triples written before a failure are flushed to the file.
+        """
+        try:
+            if workers > 1:
+                self._write_parallel(workers)
+            else:
+                while True:
+                    try:
+                        super().write()
+                    except StopIteration:
+                        break
+        finally:
+            self._close()
+
     def _add_to_target(self, triple: Tuple[URIRef, URIRef, Identifier,
                                            URIRef]) -> None:
         """
         Adds a single triple to the file.
         """
-        self._graph.add(triple[0:3])
+        if self._file is not None:
+            self._file.write(self._serialize(triple))
+        elif self._graph is not None:
+            self._graph.add(triple[0:3])
+
+    def _serialize_batch(self, triples: List[Tuple[URIRef, URIRef,
+                                                   Identifier, URIRef]]) \
+            -> Union[str, List[Tuple[URIRef, URIRef, Identifier, URIRef]]]:
+        """
+        Serializes a batch of triples in the worker process when streaming,
+        the Logical Target only has to write the lines to the file.
+        """
+        if self._streaming:
+            return ''.join([self._serialize(t) for t in triples])
+        return triples
 
-        # When https://github.com/RDFLib/rdflib/issues/283 is fixed, use a
-        # streaming serializer to avoid writing the whole file over and over
-        # again.
-        self._graph.serialize(destination=self._path,
-                              format=self._format.value)
+    def _add_batch_to_target(self, batch: Union[str, List[Tuple[
+            URIRef, URIRef, Identifier, URIRef]]]) -> None:
+        """
+        Adds a batch of triples from a worker process to the file.
+        """
+        if isinstance(batch, str):
+            if self._file is not None:
+                self._file.write(batch)
+        else:
+            super()._add_batch_to_target(batch)
+
+    def _serialize(self, triple: Tuple[URIRef, URIRef, Identifier,
+                                       URIRef]) -> str:
+        """
+        Serializes a single triple as an N-Triples or N-Quads line.
+        """
+        row: str
+        # Named Graph is only kept for N-Quads
+        if self._format == MIMEType.NQUADS and triple[3] is not None:
+            row = _nq_row(triple[0:3], triple[3])
+        else:
+            row = _nt_row(triple[0:3])
+        return row
+
+    def _flush(self) -> None:
+        """
+        Flushes the written triples to the file.
+        """
+        if self._file is not None:
+            self._file.flush()
+        elif self._graph is not None:
+            self._graph.serialize(destination=self._path,
+                                  format=self._format.value)
         debug(f'Serialized to {self._path}')
+
+    def _close(self) -> None:
+        """
+        Flushes the remaining triples and closes the file.
+        """
+        self._flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            debug(f'Closed {self._path}')
@@ -206,12 +206,14 @@ from tests.io.sources.rdf_source import RDFLogicalSourceTests
 from tests.io.sources.dcat_source import DCATLogicalSourceTests
 from tests.io.sources.sparql_source import SPARQLXMLLogicalSourceTests, \
                                            SPARQLJSONLogicalSourceTests
+from tests.io.sources.shared_source import SharedScanTests
 
 # Tests for maps
 from tests.io.maps.term_map import TermMapTests
 from tests.io.maps.subject_map import SubjectMapTests
 from tests.io.maps.predicate_map import PredicateMapTests
 from tests.io.maps.object_map import ObjectMapTests
+from tests.io.maps.ref_object_map import RefObjectMapTests
 from tests.io.maps.triples_map import TriplesMapTests
 
 # Tests for mappings and RML test cases
@@ -0,0 +1,19 @@
+CREATE TABLE sports(
+    ID INT NOT NULL,
+    NAME TEXT NOT NULL
+);
+
+CREATE TABLE athletes(
+    ID INT PRIMARY KEY NOT NULL,
+    SPORT INT,
+    NAME TEXT NOT NULL
+);
+
+INSERT INTO sports VALUES (100, 'Tennis');
+INSERT INTO sports VALUES (200, 'Football');
+INSERT INTO sports VALUES (200, 'Soccer');
+
+INSERT INTO athletes VALUES (10, 100, 'Venus Williams');
+INSERT INTO athletes VALUES (20, NULL, 'Demi Moore');
+INSERT INTO athletes VALUES (30, 200, 'Eden Hazard');
+INSERT INTO athletes VALUES (40, 300, 'Unknown');
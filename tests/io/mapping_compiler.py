@@ -1,16 +1,21 @@
 import unittest
-from os import environ
+from os import environ, path
 from typing import List, Tuple
 from rdflib import Graph
-from rdflib.term import Literal
+from rdflib.namespace import FOAF
+from rdflib.term import Literal, URIRef
 from rdflib.compare import to_isomorphic
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from unittest.mock import patch
 
 from rml.io.mapping_compiler import MappingCompiler
 from rml.io.maps import TriplesMap
 from rml.namespace import D2RQ, RML, R2RML
 
 from rdflib.plugins.serializers.turtle import TurtleSerializer
+from sqlalchemy import inspect, event
+
+from rml.io.sources import get_engine
 
 
 class MappingCompilerTests(unittest.TestCase):
@@ -56,6 +61,116 @@ class MappingCompilerTests(unittest.TestCase):
             self.assertIsNotNone(g1.value(ls, RML.query))
             self.assertIsNone(g1.value(ls, R2RML.tableName))
 
+    def test_rewrite_rr_table_name_shared(self) -> None:
+        """
+        Test if TriplesMaps over the same table get the same merged query
+        """
+        p = 'tests/assets/io/mapping_files/mapping_shared_table.ttl'
+        m = MappingCompiler()
+        g = m.compile(Graph().parse(p, format='turtle'))
+        queries = [str(q) for q in g.objects(None, RML.query)]
+        self.assertListEqual(queries, ['SELECT AGE, ID, NAME FROM students;',
+                                       'SELECT AGE, ID, NAME FROM students;'])
+
+    def test_schema_cache(self) -> None:
+        """
+        Test if inspected SQL tables are cached within and across runs
+        """
+        p = 'tests/assets/io/mapping_files/mapping_shared_table.ttl'
+        with TemporaryDirectory() as cache_dir:
+            cache = path.join(cache_dir, 'schema.pickle')
+            with patch('rml.io.mapping_compiler.inspect',
+                       wraps=inspect) as inspector:
+                g1 = MappingCompiler(schema_cache=cache) \
+                    .compile(Graph().parse(p, format='turtle'))
+                self.assertEqual(inspector.call_count, 1)
+                g2 = MappingCompiler(schema_cache=cache) \
+                    .compile(Graph().parse(p, format='turtle'))
+                self.assertEqual(inspector.call_count, 1)
+                MappingCompiler(schema_cache=cache, schema_ttl=0) \
+                    .compile(Graph().parse(p, format='turtle'))
+                self.assertEqual(inspector.call_count, 2)
+            self.assertEqual(to_isomorphic(g1), to_isomorphic(g2))
+            # DSNs may contain credentials, only their hash is persisted
+            with open(cache, 'rb') as f:
+                self.assertNotIn(b'student.db', f.read())
+
+    def test_push_down_templates(self) -> None:
+        """
+        Test if rr:templates over SQL columns are resolved by the query,
+        unless they require percent-encoding of text.
+        """
+        p = 'tests/assets/io/mapping_files/mapping_template_pushdown.ttl'
+        m = MappingCompiler(template_pushdown=True)
+        g = m.compile(Graph().parse(p, format='turtle'))
+        query = str(next(g.objects(None, RML.query)))
+        self.assertEqual(query, 'SELECT AGE, ID, NAME, '
+                         '\'http://example.com/student/\' || '
+                         'CAST(AGE AS VARCHAR) AS rml_template_0, '
+                         '\'http://example.com/student/\' || '
+                         'CAST(ID AS VARCHAR) AS rml_template_1, '
+                         'NAME || \' (\' || CAST(AGE AS VARCHAR) || \')\' '
+                         'AS rml_template_2 FROM students;')
+        templates = [str(t) for t in g.objects(None, R2RML.template)]
+        self.assertListEqual(templates, ['http://example.com/name/{NAME}'])
+        references = sorted([str(r) for r in g.objects(None, RML.reference)])
+        self.assertListEqual(references, ['rml_template_0', 'rml_template_1',
+                                          'rml_template_2'])
+
+    def test_rewrite_sql_joins(self) -> None:
+        """
+        Test rewriting joins on the same database into a joint SQL query.
+        """
+        p = 'tests/assets/io/mapping_files/mapping_sql_join.ttl'
+        m = MappingCompiler()
+        g = m.compile(Graph().parse(p, format='turtle'))
+        self.assertNotIn((None, R2RML.parentTriplesMap, None), g)
+        queries = sorted([str(q) for q in g.objects(None, RML.query)])
+        self.assertListEqual(queries, [
+            'SELECT ID, NAME FROM sports;',
+            'SELECT ID, NAME, SPORT FROM athletes;',
+            'SELECT rml_child.*, rml_parent.NAME AS rml_parent_0 FROM '
+            '(SELECT ID, NAME, SPORT FROM athletes) AS rml_child JOIN '
+            '(SELECT ID, NAME FROM sports) AS rml_parent ON '
+            'rml_child.SPORT = rml_parent.ID'])
+        templates = sorted([str(t) for t in g.objects(None, R2RML.template)])
+        self.assertListEqual(templates, ['http://example.com/athlete/{ID}',
+                                         'http://example.com/athlete/{ID}',
+                                         'http://example.com/sport/{NAME}',
+                                         'http://example.com/sport/'
+                                         '{rml_parent_0}'])
+
+    def test_rewrite_sql_joins_rr_class(self) -> None:
+        """
+        Test rewriting joins without rr:class in the joint Subject Map.
+        """
+        p = 'tests/assets/io/mapping_files/mapping_sql_join.ttl'
+        g = Graph().parse(p, format='turtle')
+        child_sm = g.value(URIRef('http://example.com/base/TriplesMapAthlete'),
+                           R2RML.subjectMap)
+        g.add((child_sm, R2RML['class'], FOAF.Person))
+        m = MappingCompiler()
+        with patch.object(MappingCompiler, '_rewrite_rr_class',
+                          side_effect=lambda rules: rules):
+            g = m.compile(g)
+        subject_maps = list(g.objects(None, R2RML.subjectMap))
+        self.assertEqual(len(subject_maps), 3)
+        classes = [c for sm in subject_maps
+                   for c in g.objects(sm, R2RML['class'])]
+        self.assertListEqual(classes, [FOAF.Person])
+
+    def test_rewrite_sql_joins_unknown_column(self) -> None:
+        """
+        Test skipping joins with parent columns without an alias.
+        """
+        p = 'tests/assets/io/mapping_files/mapping_sql_join.ttl'
+        m = MappingCompiler()
+        with patch.object(MappingCompiler, '_get_column_names',
+                          return_value=[]):
+            g = m.compile(Graph().parse(p, format='turtle'))
+        self.assertIn((None, R2RML.parentTriplesMap, None), g)
+        self.assertEqual(len(list(g.objects(None, R2RML.subjectMap))), 2)
+
     def test_natural_sql_datatypes(self) -> None:
         """
         Test adding SQL datatypes to PredicateObjectMaps.
@@ -68,6 +183,26 @@ class MappingCompilerTests(unittest.TestCase):
         print(f.name)
         self.assertEqual(g1, g2, 'SQL datatypes not correctly added!')
 
+    def test_natural_sql_datatypes_sample(self) -> None:
+        """
+        Test if each SQL query is sampled once, limited to a single row.
+        """
+        p = 'tests/assets/io/mapping_files/mapping_sql_datatypes.ttl'
+        engine = get_engine('sqlite:///tests/assets/sql/student.db')
+        statements: List[str] = []
+
+        def count(conn, cursor, statement, *args) -> None:
+            statements.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', count)
+        try:
+            MappingCompiler().compile(Graph().parse(p, format='turtle'))
+        finally:
+            event.remove(engine, 'before_cursor_execute', count)
+        samples = [s for s in statements if 'students' in s]
+        self.assertEqual(len(samples), 1)
+        self.assertIn('LIMIT', samples[0])
+
     def test_rewrite_rr_graph_map(self) -> None:
         """
         Test rewriting rr:graphMap from SubjectMap to all PredicateObjectMaps.
@@ -1,13 +1,18 @@
+import sqlite3
 import unittest
 from parameterized import parameterized
-from tempfile import NamedTemporaryFile
-from os import environ
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from os import environ, listdir
+from unittest.mock import patch
 from typing import List, Tuple, Set
-from rdflib import ConjunctiveGraph, Graph
+from rdflib import ConjunctiveGraph, Graph, URIRef
 from rdflib.compare import to_isomorphic, graph_diff
+from lxml import etree
 
 from rml.io.mapping_reader import MappingReader
 from rml.io.maps import TriplesMap
+from rml.io.sources import SharedLogicalSource, SQLLogicalSource, MIMEType
+from rml.io.targets import FileLogicalTarget
 
 HOST = environ['HOST']
 
@@ -50,6 +55,230 @@ class MappingReaderTests(unittest.TestCase):
         mapping_reader = MappingReader(path)
         self.assertIsInstance(mapping_reader.rules, Graph)
 
+    def test_read_source_streaming(self) -> None:
+        """
+        Test if streaming the Logical Sources generates the same triples.
+        """
+        path = 'tests/assets/io/mapping_files/mapping_local_file.ttl'
+        output_path = 'tests/assets/io/output_files/output_local_file.nq'
+        expected_triples = ConjunctiveGraph().parse(output_path,
+                                                    format='nquads')
+        mapping_reader = MappingReader(path, streaming=True)
+        tm_list = mapping_reader.resolve()
+        self._process_tm_results(tm_list, expected_triples)
+
+    @parameterized.expand([
+        ('tests/assets/io/mapping_files/mapping_shared_table.ttl',
+         'tests/assets/io/output_files/output_shared_table.nq'),
+        ('tests/assets/io/mapping_files/mapping_sql_join.ttl',
+         'tests/assets/io/output_files/output_sql_join.nq'),
+    ])
+    def test_read_source_tuples(self, rules_path: str,
+                                output_path: str) -> None:
+        """
+        Test if reading SQL rows as tuples generates the same triples.
+        """
+        expected_triples = ConjunctiveGraph().parse(output_path,
+                                                    format='nquads')
+        mapping_reader = MappingReader(rules_path, tuples=True)
+        tm_list = mapping_reader.resolve()
+        self.assertIsNotNone(tm_list[0]._logical_source.columns)
+        self._process_tm_results(tm_list, expected_triples)
+
+    def test_read_shared_table(self) -> None:
+        """
+        Test if TriplesMaps over the same table share a single scan.
+        """
+        path = 'tests/assets/io/mapping_files/mapping_shared_table.ttl'
+        output_path = 'tests/assets/io/output_files/output_shared_table.nq'
+        expected_triples = ConjunctiveGraph().parse(output_path,
+                                                    format='nquads')
+        mapping_reader = MappingReader(path)
+        tm_list = mapping_reader.resolve()
+        sources = [tm._logical_source for tm in tm_list]
+        self.assertIsInstance(sources[0], SharedLogicalSource)
+        self.assertIs(sources[0]._scan, sources[1]._scan)
+        self._process_tm_results(tm_list, expected_triples)
+
+    def test_read_shared_file(self) -> None:
+        """
+        Test if TriplesMaps over the same file share a single parse and
+        TriplesMaps with the same iterator a single scan.
+        """
+        path = 'tests/assets/io/mapping_files/mapping_shared_file.ttl'
+        output_path = 'tests/assets/io/output_files/output_shared_file.nq'
+        expected_triples = ConjunctiveGraph().parse(output_path,
+                                                    format='nquads')
+        mapping_reader = MappingReader(path)
+        with patch('rml.io.sources.xml_source.etree.parse',
+                   wraps=etree.parse) as parse:
+            tm_list = mapping_reader.resolve()
+            self.assertEqual(parse.call_count, 1)
+        scans = set([tm._logical_source._scan for tm in tm_list])
+        self.assertEqual(len(scans), 2)
+        self._process_tm_results(tm_list, expected_triples)
+
+    def test_read_shared_file_streaming(self) -> None:
+        """
+        Test if TriplesMaps over the same streamed file do not share a scan
+        and generate all triples when executed one after another.
+        """
+        path = 'tests/assets/io/mapping_files/mapping_shared_file.ttl'
+        output_path = 'tests/assets/io/output_files/output_shared_file.nq'
+        expected_triples = ConjunctiveGraph().parse(output_path,
+                                                    format='nquads')
+        mapping_reader = MappingReader(path, streaming=True)
+        tm_list = mapping_reader.resolve()
+        for tm in tm_list:
+            self.assertNotIsInstance(tm._logical_source, SharedLogicalSource)
+        self._process_tm_results(tm_list, expected_triples)
+
+    @parameterized.expand([(False,), (True,)])
+    def test_read_template_pushdown(self, template_pushdown: bool) -> None:
+        """
+        Test if pushing down rr:templates into SQL queries generates the same
+        triples.
+        """
+        path = 'tests/assets/io/mapping_files/mapping_template_pushdown.ttl'
+        output_path = \
+            'tests/assets/io/output_files/output_template_pushdown.nq'
+        expected_triples = ConjunctiveGraph().parse(output_path,
+                                                    format='nquads')
+        mapping_reader = MappingReader(path,
+                                       template_pushdown=template_pushdown)
+        tm_list = mapping_reader.resolve()
+        self._process_tm_results(tm_list, expected_triples)
+
+    def test_read_template_pushdown_reserved(self) -> None:
+        """
+        Test if pushing down rr:templates generates the same IRIs for text
+        columns with reserved characters.
+        """
+        path = 'tests/assets/io/mapping_files/mapping_template_pushdown.ttl'
+        with open(path) as f:
+            rules = f.read()
+        with TemporaryDirectory() as directory:
+            db = f'{directory}/reserved.db'
+            with sqlite3.connect(db) as connection:
+                connection.execute('CREATE TABLE students (ID INTEGER '
+                                   'PRIMARY KEY, NAME TEXT, AGE INTEGER)')
+                connection.execute('INSERT INTO students VALUES '
+                                   '(0, \'Jean Luc/Picard?#%é\', 59)')
+            mapping = f'{directory}/mapping.ttl'
+            with open(mapping, 'w') as f:
+                f.write(rules.replace('tests/assets/sql/student.db', db))
+
+            outputs = []
+            for template_pushdown in [False, True]:
+                output = f'{directory}/output_{template_pushdown}.nq'
+                tm_list = MappingReader(mapping,
+                                        template_pushdown=template_pushdown) \
+                    .resolve()
+                FileLogicalTarget(tm_list, output, MIMEType.NQUADS) \
+                    .write_all()
+                outputs.append(ConjunctiveGraph().parse(output,
+                                                        format='nquads'))
+
+        self.assertIn(URIRef('http://example.com/name/'
+                             'Jean%20Luc/Picard%3F%23%25%C3%A9'),
+                      set(outputs[0].objects()))
+        self.assertEqual(to_isomorphic(outputs[0]), to_isomorphic(outputs[1]))
+
+    def test_read_source_pages(self) -> None:
+        """
+        Test if reading SQL Logical Sources in pages generates the same
+        triples.
+        """
+        path = 'tests/assets/io/mapping_files/mapping_sql_join.ttl'
+        output_path = 'tests/assets/io/output_files/output_sql_join.nq'
+        expected_triples = ConjunctiveGraph().parse(output_path,
+                                                    format='nquads')
+        with TemporaryDirectory() as checkpoint_dir:
+            mapping_reader = MappingReader(path, page_size=1,
+                                           checkpoint_dir=checkpoint_dir)
+            tm_list = mapping_reader.resolve()
+            self._process_tm_results(tm_list, expected_triples)
+            self.assertListEqual(listdir(checkpoint_dir), [])
+
+    def test_read_source_pages_resume(self) -> None:
+        """
+        Test if a failed run resumed from its checkpoints and appended to the
+        same file generates all triples.
+        """
+        path = 'tests/assets/io/mapping_files/mapping_sql.ttl'
+        output_path = 'tests/assets/io/output_files/output_sql.nq'
+        expected_triples = ConjunctiveGraph().parse(output_path,
+                                                    format='nquads')
+        read_page = SQLLogicalSource._read_page
+        calls = []
+
+        def fail_second_page(self, *args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise ValueError('Connection lost')
+            return read_page(self, *args, **kwargs)
+
+        with TemporaryDirectory() as checkpoint_dir:
+            target_path = f'{checkpoint_dir}/output.nq'
+            with patch.object(SQLLogicalSource, '_read_page', autospec=True,
+                              side_effect=fail_second_page):
+                tm_list = MappingReader(path, page_size=1,
+                                        checkpoint_dir=checkpoint_dir) \
+                    .resolve()
+                target = FileLogicalTarget(tm_list, target_path,
+                                           MIMEType.NQUADS)
+                with self.assertRaises(ValueError):
+                    target.write_all()
+            checkpoints = [f for f in listdir(checkpoint_dir)
+                           if f.endswith('.json')]
+            self.assertEqual(len(checkpoints), 1)
+
+            tm_list = MappingReader(path, page_size=1,
+                                    checkpoint_dir=checkpoint_dir).resolve()
+            FileLogicalTarget(tm_list, target_path, MIMEType.NQUADS,
+                              append=True).write_all()
+            generated_triples = ConjunctiveGraph().parse(target_path,
+                                                         format='nquads')
+            self.assertEqual(to_isomorphic(generated_triples),
+                             to_isomorphic(expected_triples))
+
+    def test_read_cached_rules(self) -> None:
+        """
+        Test if cached rules skip validation and generate the same triples.
+        """
+        path = 'tests/assets/io/mapping_files/mapping_local_file.ttl'
+        output_path = 'tests/assets/io/output_files/output_local_file.nq'
+        expected_triples = ConjunctiveGraph().parse(output_path,
+                                                    format='nquads')
+        with TemporaryDirectory() as cache_dir:
+            rules = MappingReader(path, cache_dir=cache_dir).rules
+            self.assertEqual(len(listdir(cache_dir)), 1)
+
+            with patch('rml.io.mapping_reader.MappingValidator') as validator:
+                mapping_reader = MappingReader(path, cache_dir=cache_dir)
+                validator.assert_not_called()
+            self.assertEqual(to_isomorphic(mapping_reader.rules),
+                             to_isomorphic(rules))
+            tm_list = mapping_reader.resolve()
+            self._process_tm_results(tm_list, expected_triples)
+
+    def test_read_cached_rules_changed(self) -> None:
+        """
+        Test if changed rules are not read from the cache.
+        """
+        path = 'tests/assets/io/mapping_files/mapping_local_file.ttl'
+        rules = NamedTemporaryFile(mode='w', suffix='.ttl', delete=False)
+        with open(path, 'r') as f:
+            rules.write(f.read())
+        rules.close()
+
+        with TemporaryDirectory() as cache_dir:
+            MappingReader(rules.name, cache_dir=cache_dir)
+            with open(rules.name, 'a') as f:
+                f.write('\n# Changed\n')
+            MappingReader(rules.name, cache_dir=cache_dir)
+            self.assertEqual(len(listdir(cache_dir)), 2)
+
     @parameterized.expand([
         ('tests/assets/io/mapping_files/mapping_local_file.ttl',
          'tests/assets/io/output_files/output_local_file.nq'),
@@ -64,7 +293,9 @@ class MappingReaderTests(unittest.TestCase):
         ('tests/assets/io/mapping_files/mapping_shortcuts.ttl',
          'tests/assets/io/output_files/output_shortcuts.nq'),
         ('tests/assets/io/mapping_files/mapping_class.ttl',
-         'tests/assets/io/output_files/output_class.nq')
+         'tests/assets/io/output_files/output_class.nq'),
+        ('tests/assets/io/mapping_files/mapping_sql_join.ttl',
+         'tests/assets/io/output_files/output_sql_join.nq')
     ])
     def test_read_source(self, rules_path: str, output_path: str) -> None:
         """
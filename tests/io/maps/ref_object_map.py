@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+import unittest
+from rdflib.term import URIRef, BNode
+
+from rml.io.sources import CSVLogicalSource, MIMEType
+from rml.io.maps import RefObjectMap, SubjectMap, ReferenceType
+from rml.namespace import R2RML
+
+ATHLETE_PATH = 'tests/assets/csv/athlete.csv'
+SPORT_PATH = 'tests/assets/csv/sport.csv'
+
+
+class RefObjectMapTests(unittest.TestCase):
+    def _create_ref_object_map(self, memory_limit: int = 1000,
+                               rr_reference_type: URIRef = None) \
+            -> RefObjectMap:
+        sm = SubjectMap('http://example.com/sport/{Name}',
+                        ReferenceType.TEMPLATE, MIMEType.CSV,
+                        rr_reference_type)
+        return RefObjectMap(sm, MIMEType.CSV, CSVLogicalSource(SPORT_PATH),
+                            [('Sport', 'ID')], memory_limit=memory_limit)
+
+    def _check_join(self, rom: RefObjectMap) -> None:
+        athletes = CSVLogicalSource(ATHLETE_PATH)
+        self.assertListEqual(rom.resolve(next(athletes)),
+                             [URIRef('http://example.com/sport/Tennis')])
+        self.assertListEqual(rom.resolve(next(athletes)), [])
+        self.assertListEqual(rom.resolve(next(athletes)),
+                             [URIRef('http://example.com/sport/Football'),
+                              URIRef('http://example.com/sport/Soccer')])
+        self.assertListEqual(rom.resolve(next(athletes)), [])
+
+    def test_join(self) -> None:
+        """
+        Test if child records are joined with all matching parent records
+        """
+        self._check_join(self._create_ref_object_map())
+
+    def test_join_spill_to_disk(self) -> None:
+        """
+        Test if the join index gives the same results when spilled to disk
+        """
+        rom = self._create_ref_object_map(memory_limit=0)
+        self._check_join(rom)
+        self.assertIsNotNone(rom._database)
+
+    def test_join_spill_to_disk_blank_nodes(self) -> None:
+        """
+        Test if Blank Nodes are kept when the join index is spilled to disk
+        """
+        rom = self._create_ref_object_map(memory_limit=0,
+                                          rr_reference_type=R2RML.BlankNode)
+        objects = rom.resolve(next(CSVLogicalSource(ATHLETE_PATH)))
+        self.assertListEqual(objects,
+                             [BNode('http://example.com/sport/Tennis')])
+
+    def test_multiple_join_conditions(self) -> None:
+        """
+        Test if all join conditions must match
+        """
+        sm = SubjectMap('http://example.com/sport/{Name}',
+                        ReferenceType.TEMPLATE, MIMEType.CSV, None)
+        rom = RefObjectMap(sm, MIMEType.CSV, CSVLogicalSource(SPORT_PATH),
+                           [('Sport', 'ID'), ('Name', 'Name')])
+        self.assertListEqual(rom.resolve({'Sport': '200', 'Name': 'Soccer'}),
+                             [URIRef('http://example.com/sport/Soccer')])
+        self.assertListEqual(rom.resolve({'Sport': '100', 'Name': 'Soccer'}),
+                             [])
+
+    def test_no_join_condition(self) -> None:
+        """
+        Test if the parent Subject Map is resolved with the child record
+        without join conditions
+        """
+        sm = SubjectMap('http://example.com/sport/{Sport}',
+                        ReferenceType.TEMPLATE, MIMEType.CSV, None)
+        rom = RefObjectMap(sm, MIMEType.CSV)
+        self.assertListEqual(rom.resolve(next(CSVLogicalSource(ATHLETE_PATH))),
+                             [URIRef('http://example.com/sport/100')])
+
+    def test_join_without_parent_logical_source(self) -> None:
+        """
+        Test if a ValueError is raised when the parent Logical Source is
+        missing for join conditions
+        """
+        sm = SubjectMap('http://example.com/sport/{Name}',
+                        ReferenceType.TEMPLATE, MIMEType.CSV, None)
+        with self.assertRaises(ValueError):
+            RefObjectMap(sm, MIMEType.CSV, None, [('Sport', 'ID')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,15 @@
 #!/usr/bin/env python
 
 import unittest
+from parameterized import parameterized
 from rdflib.term import URIRef, Identifier
 from lxml import etree
 from lxml.etree import Element
 from typing import Union, Dict
 
 from rml.io.sources import MIMEType
-from rml.io.maps import TermMap, ReferenceType
+from rml.io.maps import TermMap, ReferenceType, compile_jsonpath, \
+                        compile_xpath
 from rml.namespace import FOAF
 
 XML_STUDENT = """
@@ -18,6 +20,30 @@ XML_STUDENT = """
 </student>
 """
 
+JSON_STUDENT = {
+    'id': 0,
+    'name': 'Herman',
+    'age': None,
+    'active': True,
+    'grades': [1, 2],
+    'address': {'city': 'Ghent', 'zip': 9000, 'street': None,
+                'where': 'here'},
+    'first-name': 'H'
+}
+
+XML_STUDENT_DIFF = """
+<student xmlns:x="http://example.com/">
+    <id>0</id>
+    <name>Herman</name>
+    <name>Ann</name>
+    <x:age>65</x:age>
+    <empty/>
+    <blank>  </blank>
+    <nested><child>1</child></nested>
+    <first-name>H</first-name>
+</student>
+"""
+
 
 class MockTermMap(TermMap):
     def resolve(self, data: Union[Element, Dict]) -> Identifier:
@@ -56,3 +82,129 @@ class TermMapTests(unittest.TestCase):
         with self.assertRaises(ResourceWarning):
             m = MockTermMap('name', ReferenceType.REFERENCE, MIMEType.JSON)
             result = m._resolve_reference('$.name', {'id': 0, 'name': None})
+
+    def test_compile_template(self) -> None:
+        """
+        Test if templates are split into literal segments and variables
+        """
+        m = MockTermMap('http://example.com/{id}/{name}',
+                        ReferenceType.TEMPLATE, MIMEType.CSV)
+        self.assertListEqual(m._template,
+                             ['http://example.com/', 'id', '/', 'name', ''])
+
+    def test_resolve_template_repeated_variable(self) -> None:
+        """
+        Test if a variable can be used multiple times in a template and if
+        resolved values are not resolved again
+        """
+        m = MockTermMap('http://example.com/{id}/{name}/{id}',
+                        ReferenceType.TEMPLATE, MIMEType.CSV)
+        result = m._resolve_template({'id': '{name}', 'name': 'Herman'})
+        self.assertEqual(result,
+                         'http://example.com/%7Bname%7D/Herman/%7Bname%7D')
+
+    def test_compiled_references_shared(self) -> None:
+        """
+        Test if compiled references are shared between Term Maps
+        """
+        m1 = MockTermMap('name', ReferenceType.REFERENCE, MIMEType.JSON)
+        m2 = MockTermMap('name', ReferenceType.REFERENCE, MIMEType.JSON)
+        self.assertEqual(m1._resolve_reference('$.name', {'name': 'Herman'}),
+                         'Herman')
+        self.assertEqual(m2._resolve_reference('$.name', {'name': 'Ann'}),
+                         'Ann')
+        self.assertIs(compile_jsonpath('$.name'), compile_jsonpath('$.name'))
+        self.assertIs(compile_xpath('./name'), compile_xpath('./name'))
+
+    def _resolve_or_raise(self, m: TermMap, reference: str,
+                          data: Union[Element, Dict]) -> object:
+        """
+        Returns the resolved reference or the type of the raised exception.
+        """
+        try:
+            return m._resolve_reference(reference, data)
+        except Exception as e:
+            return type(e)
+
+    @parameterized.expand([
+        ('id',), ('$.id',), ('name',), ('age',), ('active',), ('grades',),
+        ('address',), ('address.city',), ('$.address.zip',),
+        ('address.street',), ('address.country',), ('name.first',),
+        ('grades.length',), ('first-name',), ('missing',),
+    ])
+    def test_simple_jsonpath_differential(self, reference: str) -> None:
+        """
+        Test if simple JSONPath references resolve the same as JSONPath
+        """
+        simple = MockTermMap(reference, ReferenceType.REFERENCE, MIMEType.JSON)
+        general = MockTermMap(reference, ReferenceType.UNKNOWN, MIMEType.JSON)
+        self.assertIn(reference, simple._simple_references)
+        self.assertNotIn(reference, general._simple_references)
+        self.assertEqual(
+            self._resolve_or_raise(simple, reference, JSON_STUDENT),
+            self._resolve_or_raise(general, reference, JSON_STUDENT))
+
+    @parameterized.expand([
+        ('id',), ('./id',), ('name',), ('age',), ('empty',), ('blank',),
+        ('nested',), ('child',), ('first-name',), ('missing',),
+    ])
+    def test_simple_xpath_differential(self, reference: str) -> None:
+        """
+        Test if simple XPath references resolve the same as XPath
+        """
+        data = etree.fromstring(XML_STUDENT_DIFF)
+        simple = MockTermMap(reference, ReferenceType.REFERENCE,
+                             MIMEType.TEXT_XML)
+        general = MockTermMap(reference, ReferenceType.UNKNOWN,
+                              MIMEType.TEXT_XML)
+        self.assertIn(reference, simple._simple_references)
+        self.assertNotIn(reference, general._simple_references)
+        self.assertEqual(self._resolve_or_raise(simple, reference, data),
+                         self._resolve_or_raise(general, reference, data))
+
+    @parameterized.expand([
+        ('$.grades[0]', MIMEType.JSON), ('address.where', MIMEType.JSON),
+        ('first name', MIMEType.JSON), ('$..city', MIMEType.JSON),
+        ('nested/child', MIMEType.TEXT_XML), ('@id', MIMEType.TEXT_XML),
+        ('x:age', MIMEType.TEXT_XML), ('name[2]', MIMEType.TEXT_XML),
+    ])
+    def test_general_references(self, reference: str,
+                                mime_type: MIMEType) -> None:
+        """
+        Test if other references are left to the JSONPath or XPath engine
+        """
+        m = MockTermMap(reference, ReferenceType.REFERENCE, mime_type)
+        self.assertNotIn(reference, m._simple_references)
+
+    def test_simple_template_references(self) -> None:
+        """
+        Test if simple references in templates are detected
+        """
+        m = MockTermMap('http://example.com/{$.id}/{grades[0]}',
+                        ReferenceType.TEMPLATE, MIMEType.JSON)
+        self.assertDictEqual(m._simple_references, {'$.id': ['id']})
+        self.assertEqual(m._resolve_template(JSON_STUDENT),
+                         'http://example.com/0/1')
+
+    @parameterized.expand([
+        ('"name"',), ('`name`',), ('[name]',), ('name',),
+    ])
+    def test_normalize_quoted_references(self, reference: str) -> None:
+        """
+        Test if quoted SQL references are normalized once
+        """
+        m = MockTermMap(reference, ReferenceType.REFERENCE, MIMEType.SQL)
+        self.assertEqual(m._reference, 'name')
+        m = MockTermMap('http://example.com/{' + reference + '}',
+                        ReferenceType.TEMPLATE, MIMEType.SQL)
+        self.assertListEqual(m._template, ['http://example.com/', 'name', ''])
+        self.assertEqual(m._resolve_template({'name': 'Herman'}),
+                         'http://example.com/Herman')
+
+    def test_unknown_mime_type(self) -> None:
+        """
+        Test if an unknown MIME type raises a ValueError when resolving
+        """
+        m = MockTermMap('name', ReferenceType.REFERENCE, MIMEType.UNKNOWN)
+        with self.assertRaises(ValueError):
+            m._resolve_reference('name', {'name': 'Herman'})
@@ -30,10 +30,7 @@ EXPECTED_TEST_FAILURES = ('RMLTC0002c-CSV',  #  Undefined column
                           'RMLTC0012c',  #  Missing rr:subjectMap
                           'RMLTC0012d',  #  2 rr:subjectMaps
                           'RMLTC0015b')  #  Invalid language tag
-UNSUPPORTED_TEST_CASES = ('RMLTC0008b',  # Lack of RefObjectMap
-                          'RMLTC0009a',  # Lack of joinCondition
-                          'RMLTC0009b',  # Lack of joinCondition
-                          'RMLTC0010c',  # RDFLib cannot parse \{
+UNSUPPORTED_TEST_CASES = ('RMLTC0010c',  # RDFLib cannot parse \{
                           'RMLTC0011a',  # rr:logicalTable is not supported
                           'RMLTC0016b-SQLServer', # SQLServer float precision
                           'RMLTC0016d-MySQL',  # MySQL boolean is casted as tinyint
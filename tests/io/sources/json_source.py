@@ -1,10 +1,11 @@
 #!/usr/bin/env python
 
 import unittest
+from io import StringIO
 from json.decoder import JSONDecodeError
 
 from rml.io.sources import JSONLogicalSource, MIMEType
-
+from rml.io.sources.json_source import JSONStream
 
 
 class JSONLogicalSourceTests(unittest.TestCase):
@@ -60,5 +61,80 @@ class JSONLogicalSourceTests(unittest.TestCase):
             source = JSONLogicalSource('$.empty', 'tests/assets/json/student.json')
             next(source)
 
+    def test_streaming_iterator(self) -> None:
+        """
+        Test if we can iterate over the results while streaming
+        """
+        source = JSONLogicalSource('$.students.[*]',
+                                   'tests/assets/json/student.json',
+                                   streaming=True)
+        self.assertDictEqual(next(source),
+                             {'id': '0', 'name': 'Herman', 'age': '65'})
+        self.assertDictEqual(next(source),
+                             {'id': '1', 'name': 'Ann', 'age': '62'})
+        self.assertDictEqual(next(source),
+                             {'id': '2', 'name': 'Simon', 'age': '23'})
+        with self.assertRaises(StopIteration):
+            next(source)
+
+    def test_streaming_root_array(self) -> None:
+        """
+        Test if we can stream an array at the root of the JSON document
+        """
+        source = JSONLogicalSource('$[*]', 'tests/assets/json/student_array.json',
+                                   streaming=True)
+        self.assertDictEqual(next(source),
+                             {'id': '0', 'name': 'Herman', 'age': 65})
+        self.assertDictEqual(next(source),
+                             {'id': '1', 'name': 'Ann', 'age': 62})
+        self.assertDictEqual(next(source),
+                             {'id': '2', 'name': 'Simon', 'age': 23})
+        with self.assertRaises(StopIteration):
+            next(source)
+
+    def test_streaming_fallback(self) -> None:
+        """
+        Test if we fall back to loading the JSON file when the JSONPath
+        expression cannot be streamed
+        """
+        source = JSONLogicalSource('$.students[1]',
+                                   'tests/assets/json/student.json',
+                                   streaming=True)
+        self.assertDictEqual(next(source),
+                             {'id': '1', 'name': 'Ann', 'age': '62'})
+        with self.assertRaises(StopIteration):
+            next(source)
+
+    def test_streaming_empty_iterator(self) -> None:
+        """
+        Test if we handle a missing array while streaming
+        """
+        source = JSONLogicalSource('$.empty[*]',
+                                   'tests/assets/json/student.json',
+                                   streaming=True)
+        with self.assertRaises(StopIteration):
+            next(source)
+
+    def test_streaming_invalid_json(self) -> None:
+        """
+        Test if we raise a JSONDecodeError when the input file cannot be parsed
+        as valid JSON while streaming
+        """
+        with self.assertRaises(JSONDecodeError):
+            source = JSONLogicalSource('$.students.[*]',
+                                       'tests/assets/json/invalid.json',
+                                       streaming=True)
+            next(source)
+
+    def test_streaming_chunks(self) -> None:
+        """
+        Test if values spread over multiple chunks are decoded correctly
+        """
+        data = '{"skip": {"a": "]}"}, "items": [1.5e-3, "a b", -12, null, ' \
+               '{"b": [true]}]}'
+        stream = JSONStream(StringIO(data), ['items'], chunk_size=1)
+        self.assertEqual(list(stream), [1.5e-3, 'a b', -12, None,
+                                        {'b': [True]}])
+
 if __name__ == '__main__':
     unittest.main()
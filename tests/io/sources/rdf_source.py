@@ -1,8 +1,15 @@
 #!/usr/bin/env python
 
+import sqlite3
 import unittest
+from parameterized import parameterized
+from rdflib import Graph, ConjunctiveGraph
 from rdflib.term import Literal, URIRef
-from os.path import abspath
+from os import listdir, utime
+from os.path import abspath, join
+from shutil import copy
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
 from rml.io.sources import LogicalSource, RDFLogicalSource, MIMEType
 
@@ -31,6 +38,21 @@ WHERE {
 ORDER BY DESC(?age)
 """
 
+SIMPLE_QUERY="""
+PREFIX foaf: <http://xmlns.com/foaf/0.1/>
+SELECT ?person ?name
+WHERE {
+    ?person foaf:name ?name .
+}
+"""
+BNODE_QUERY="""
+PREFIX foaf: <http://xmlns.com/foaf/0.1/>
+SELECT ?name
+WHERE {
+    _:person foaf:name ?name .
+}
+"""
+
 class RDFLogicalSourceTests(unittest.TestCase):
     def test_mime_type(self) -> None:
         """
@@ -249,6 +271,102 @@ class RDFLogicalSourceTests(unittest.TestCase):
         with self.assertRaises(StopIteration):
             next(source)
 
+    @parameterized.expand([
+        ('tests/assets/rdf/student.ttl', QUERY, MIMEType.TURTLE),
+        ('tests/assets/rdf/student.nquads', QUERY, MIMEType.NQUADS),
+    ])
+    def test_iterator_store(self, path: str, query: str,
+                            mime_type: MIMEType) -> None:
+        """
+        Test if a stored file is queried without parsing it again
+        """
+        with TemporaryDirectory() as store_dir:
+            source = RDFLogicalSource(path, query, mime_type,
+                                      store_dir=store_dir)
+            expected = list(RDFLogicalSource(path, query, mime_type))
+            self.assertListEqual(list(source), expected)
+            self.assertEqual(len(listdir(store_dir)), 1)
+
+            with patch.object(Graph, 'parse') as parse, \
+                    patch.object(ConjunctiveGraph, 'parse') as parse_conj:
+                source = RDFLogicalSource(path, query, mime_type,
+                                          store_dir=store_dir)
+                self.assertListEqual(list(source), expected)
+                parse.assert_not_called()
+                parse_conj.assert_not_called()
+            self.assertEqual(len(listdir(store_dir)), 1)
+
+    def test_iterator_store_changed(self) -> None:
+        """
+        Test if a changed file is stored again
+        """
+        with TemporaryDirectory() as store_dir:
+            path = join(store_dir, 'student.ttl')
+            copy('tests/assets/rdf/student.ttl', path)
+            RDFLogicalSource(path, QUERY, MIMEType.TURTLE,
+                             store_dir=store_dir)
+            utime(path, ns=(0, 0))
+            source = RDFLogicalSource(path, QUERY, MIMEType.TURTLE,
+                                      store_dir=store_dir)
+            self.assertEqual(next(source)['name'], Literal('Herman'))
+            # Store of the older version is removed
+            self.assertEqual(len(listdir(store_dir)), 2)
+
+    def test_iterator_store_index(self) -> None:
+        """
+        Test if triple patterns in the context of a file are looked up with
+        an index instead of scanning the whole store
+        """
+        with TemporaryDirectory() as store_dir:
+            RDFLogicalSource('tests/assets/rdf/student.ttl', QUERY,
+                             MIMEType.TURTLE, store_dir=store_dir)
+            store_path = join(store_dir, listdir(store_dir)[0])
+            connection = sqlite3.connect(store_path)
+            plan = ' '.join(str(row) for row in connection.execute(
+                'EXPLAIN QUERY PLAN SELECT s, p, o FROM triples '
+                'WHERE p = ? AND c = ?', ('p', 'c')))
+            connection.close()
+            self.assertIn('triples_poc', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    @parameterized.expand([
+        ('tests/assets/rdf/student.ntriples', MIMEType.NTRIPLES, 1),
+        ('tests/assets/rdf/student.ntriples', MIMEType.NTRIPLES, 3),
+        ('tests/assets/rdf/student.nquads', MIMEType.NQUADS, 1),
+        ('tests/assets/rdf/student.nquads', MIMEType.NQUADS, 3),
+    ])
+    def test_iterator_streaming(self, path: str, mime_type: MIMEType,
+                                processes: int) -> None:
+        """
+        Test if streaming a single triple pattern returns the same results
+        """
+        source = RDFLogicalSource(path, SIMPLE_QUERY, mime_type,
+                                  streaming=True, processes=processes)
+        self.assertIsNone(source.graph)
+        students = sorted([(str(s['person']), str(s['name']))
+                           for s in source])
+        self.assertListEqual(students, [('http://example.com/0', 'Herman'),
+                                        ('http://example.com/1', 'Ann'),
+                                        ('http://example.com/2', 'Simon')])
+
+        # Blank nodes in the pattern match any term and are not projected
+        parsed = RDFLogicalSource(path, BNODE_QUERY, mime_type)
+        source = RDFLogicalSource(path, BNODE_QUERY, mime_type,
+                                  streaming=True, processes=processes)
+        self.assertIsNone(source.graph)
+        names = sorted([str(s['name']) for s in source])
+        self.assertListEqual(names, ['Ann', 'Herman', 'Simon'])
+        self.assertListEqual(names, sorted([str(s['name']) for s in parsed]))
+
+    def test_iterator_streaming_fallback(self) -> None:
+        """
+        Test if other queries fall back to parsing the whole file
+        """
+        source = RDFLogicalSource('tests/assets/rdf/student.ntriples', QUERY,
+                                  MIMEType.NTRIPLES, streaming=True)
+        self.assertIsNotNone(source.graph)
+        self.assertEqual(next(source)['name'], Literal('Herman'))
+
     def test_non_existing_file(self) -> None:
         """
         Test if a FileNotFoundError exception is raised when the input file
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+import unittest
+from unittest.mock import Mock
+
+from rml.io.sources import SharedScan, SharedLogicalSource, \
+                           CSVLogicalSource, MIMEType
+
+
+class SharedScanTests(unittest.TestCase):
+    def test_iterator(self) -> None:
+        """
+        Test if every consumer iterates over every row of a single scan
+        """
+        factory = Mock(side_effect=lambda: CSVLogicalSource(
+            'tests/assets/csv/student.csv'))
+        scan = SharedScan(factory)
+        source1 = scan.view()
+        source2 = scan.view()
+        self.assertIsInstance(source1, SharedLogicalSource)
+        self.assertEqual(source1.mime_type, MIMEType.CSV)
+
+        # Consumers reading in lockstep
+        self.assertEqual(next(source1)['name'], 'Herman')
+        self.assertEqual(next(source2)['name'], 'Herman')
+        self.assertEqual(next(source1)['name'], 'Ann')
+        # Consumers reading ahead
+        self.assertEqual(next(source1)['name'], 'Simon')
+        self.assertEqual(len(source2._buffer), 2)
+        self.assertEqual(next(source2)['name'], 'Ann')
+        self.assertEqual(next(source2)['name'], 'Simon')
+        with self.assertRaises(StopIteration):
+            next(source1)
+        with self.assertRaises(StopIteration):
+            next(source2)
+        factory.assert_called_once()
+
+    def test_iterator_forked(self) -> None:
+        """
+        Test if a consumer in another process scans its own Logical Source
+        """
+        factory = Mock(side_effect=lambda: CSVLogicalSource(
+            'tests/assets/csv/student.csv'))
+        scan = SharedScan(factory)
+        source1 = scan.view()
+        source2 = scan.view()
+        scan._pid = -1
+        self.assertListEqual([r['name'] for r in source1],
+                             ['Herman', 'Ann', 'Simon'])
+        self.assertListEqual([r['name'] for r in source2],
+                             ['Herman', 'Ann', 'Simon'])
+        self.assertEqual(factory.call_count, 3)
+
+    def test_empty_iterator(self) -> None:
+        """
+        Test if we can handle an empty iterator
+        """
+        scan = SharedScan(lambda: CSVLogicalSource(
+            'tests/assets/csv/empty.csv'))
+        with self.assertRaises(StopIteration):
+            next(scan.view())
+
+
+if __name__ == '__main__':
+    unittest.main()
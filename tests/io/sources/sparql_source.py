@@ -1,10 +1,19 @@
 #!/usr/bin/env python
 
+import re
+import json
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from unittest.mock import patch
+from urllib.parse import urlparse, parse_qs
+from lxml import etree
+from parameterized import parameterized
 
 from rml.namespace.xmls import SPARQL_RESULTS_PREFIX, SPARQL_RESULTS_NS
 from rml.io.sources import SPARQLJSONLogicalSource, SPARQLXMLLogicalSource, \
                            MIMEType
+from rml.io.sources.json_source import JSONStream
 
 SPARQL_QUERY = """
     PREFIX dbo: <http://dbpedia.org/ontology/>
@@ -34,10 +43,87 @@ SPARQL_ASK_QUERY = """
     PREFIX foaf:    <http://xmlns.com/foaf/0.1/>
     ASK  { ?x foaf:name  "Alice" }
 """
+SPARQL_LIMIT_QUERY = SPARQL_QUERY + 'LIMIT 3'
 NS = { SPARQL_RESULTS_PREFIX: SPARQL_RESULTS_NS }
+ACTORS = ['Jennifer_Aniston', 'David_Schwimmer', 'Lisa_Kudrow',
+          'Matt_LeBlanc', 'Matthew_Perry', 'Courteney_Cox']
 
 
-class SPARQLJSONLogicalSourceTests(unittest.TestCase):
+class SPARQLEndpointHandler(BaseHTTPRequestHandler):
+    """
+    A stand-in SPARQL endpoint answering every query with a page of the
+    actors of Friends, selected by the LIMIT and OFFSET of the query.
+    """
+    protocol_version = 'HTTP/1.1'
+    queries = []
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path != '/sparql':
+            self.send_error(404)
+            return
+
+        query = parse_qs(url.query)['query'][0]
+        self.queries.append(query)
+        limit = re.search(r'LIMIT (\d+)', query)
+        limit = int(limit.group(1)) if limit else len(ACTORS)
+        offset = re.search(r'OFFSET (\d+)', query)
+        offset = int(offset.group(1)) if offset else 0
+        actors = [f'http://dbpedia.org/resource/{a}'
+                  for a in ACTORS[offset:offset + limit]]
+
+        if 'json' in self.headers['Accept']:
+            content_type = 'application/sparql-results+json'
+            body = json.dumps({
+                'head': {'vars': ['actor']},
+                'results': {'bindings': [{'actor': {'type': 'uri',
+                                                    'value': a}}
+                                         for a in actors]}
+            }).encode()
+        else:
+            content_type = 'application/sparql-results+xml'
+            sparql = etree.Element(f'{{{SPARQL_RESULTS_NS}}}sparql',
+                                   nsmap={None: SPARQL_RESULTS_NS})
+            results = etree.SubElement(sparql,
+                                       f'{{{SPARQL_RESULTS_NS}}}results')
+            for a in actors:
+                result = etree.SubElement(results,
+                                          f'{{{SPARQL_RESULTS_NS}}}result')
+                binding = etree.SubElement(result,
+                                           f'{{{SPARQL_RESULTS_NS}}}binding',
+                                           name='actor')
+                etree.SubElement(binding,
+                                 f'{{{SPARQL_RESULTS_NS}}}uri').text = a
+            body = etree.tostring(sparql)
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class SPARQLEndpointTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(('localhost', 0),
+                                         SPARQLEndpointHandler)
+        cls.endpoint = f'http://localhost:{cls.server.server_port}/sparql'
+        Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        SPARQLEndpointHandler.queries.clear()
+
+
+class SPARQLJSONLogicalSourceTests(SPARQLEndpointTestCase):
     def test_mime_type(self) -> None:
         """
         Test the MIME type property
@@ -136,7 +222,88 @@ class SPARQLJSONLogicalSourceTests(unittest.TestCase):
                                              SPARQL_QUERY)
             next(source)
 
-class SPARQLXMLLogicalSourceTests(unittest.TestCase):
+    def test_iterator_pages(self) -> None:
+        """
+        Test if we can iterate over the results in pages fetched concurrently
+        """
+        for page_size, workers in [(1, 1), (2, 2), (4, 3), (6, 2), (10, 4)]:
+            SPARQLEndpointHandler.queries.clear()
+            source = SPARQLJSONLogicalSource('$.results.bindings.[*].actor.value',
+                                             self.endpoint, SPARQL_QUERY,
+                                             page_size=page_size,
+                                             workers=workers)
+            self.assertListEqual(list(source),
+                                 [f'http://dbpedia.org/resource/{a}'
+                                  for a in ACTORS])
+            for query in SPARQLEndpointHandler.queries:
+                self.assertIn(f'LIMIT {page_size} OFFSET', query)
+
+    def test_iterator_pages_limit(self) -> None:
+        """
+        Test if we read the results at once when the query has a LIMIT
+        """
+        with self.assertLogs(level='WARNING'):
+            source = SPARQLJSONLogicalSource('$.results.bindings.[*]',
+                                             self.endpoint,
+                                             SPARQL_LIMIT_QUERY,
+                                             page_size=2)
+        self.assertIsNone(source._page_size)
+        self.assertEqual(len(list(source)), 3)
+        self.assertListEqual(SPARQLEndpointHandler.queries,
+                             [SPARQL_LIMIT_QUERY])
+
+    def test_non_existing_endpoint_pages(self) -> None:
+        """
+        Test if we raise a FileNotFoundError exception when the endpoint does
+        not exist while reading pages
+        """
+        source = SPARQLJSONLogicalSource('$.results.bindings.[*]',
+                                         self.endpoint.replace('sparql',
+                                                               'empty'),
+                                         SPARQL_QUERY, page_size=2)
+        with self.assertRaises(FileNotFoundError):
+            next(source)
+
+    @parameterized.expand([
+        ('$.results.bindings[*]', True,
+         [{'actor': {'type': 'uri',
+                     'value': f'http://dbpedia.org/resource/{a}'}}
+          for a in ACTORS]),
+        ('$.results.bindings.[*].actor.value', True,
+         [f'http://dbpedia.org/resource/{a}' for a in ACTORS]),
+        ('$.results.bindings[1:3].actor.value', False,
+         [f'http://dbpedia.org/resource/{a}' for a in ACTORS[1:3]]),
+        ('$.results.bindings[*]..value', False,
+         [f'http://dbpedia.org/resource/{a}' for a in ACTORS]),
+    ])
+    def test_iterator_streaming(self, rml_iterator, streamed, results) -> None:
+        """
+        Test if we parse the results incrementally when the JSONPath
+        expression can be streamed
+        """
+        with patch('rml.io.sources.sparql_source.JSONStream',
+                   wraps=JSONStream) as stream:
+            source = SPARQLJSONLogicalSource(rml_iterator, self.endpoint,
+                                             SPARQL_QUERY, streaming=True)
+            # Streamed results are only requested on the first record
+            self.assertEqual(len(SPARQLEndpointHandler.queries),
+                             0 if streamed else 1)
+            self.assertListEqual(list(source), results)
+            self.assertEqual(stream.called, streamed)
+
+    def test_non_existing_endpoint_streaming(self) -> None:
+        """
+        Test if we raise a FileNotFoundError exception when the endpoint does
+        not exist while streaming
+        """
+        source = SPARQLJSONLogicalSource('$.results.bindings[*]',
+                                         self.endpoint.replace('sparql',
+                                                               'empty'),
+                                         SPARQL_QUERY, streaming=True)
+        with self.assertRaises(FileNotFoundError):
+            next(source)
+
+class SPARQLXMLLogicalSourceTests(SPARQLEndpointTestCase):
     def test_mime_type(self) -> None:
         """
         Test the MIME type property
@@ -241,5 +408,28 @@ class SPARQLXMLLogicalSourceTests(unittest.TestCase):
                                             SPARQL_QUERY)
             next(source)
 
+    def test_iterator_pages(self) -> None:
+        """
+        Test if we can iterate over the results in pages fetched concurrently
+        """
+        source = SPARQLXMLLogicalSource('//sr:result/sr:binding[@name="actor"]',
+                                        self.endpoint, SPARQL_QUERY,
+                                        page_size=4, workers=2)
+        actors = [actor.xpath('./sr:uri', namespaces = NS)[0].text
+                  for actor in source]
+        self.assertListEqual(actors, [f'http://dbpedia.org/resource/{a}'
+                                      for a in ACTORS])
+        for query in SPARQLEndpointHandler.queries:
+            self.assertIn('LIMIT 4 OFFSET', query)
+
+    def test_invalid_xpath_pages(self) -> None:
+        """
+        Test if we raise a ValueError when the XPath expression is invalid
+        before reading pages
+        """
+        with self.assertRaises(ValueError):
+            source = SPARQLXMLLogicalSource('&$"£*W$', self.endpoint,
+                                            SPARQL_QUERY, page_size=2)
+
 if __name__ == '__main__':
     unittest.main()
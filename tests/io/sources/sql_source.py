@@ -1,9 +1,24 @@
 #!/usr/bin/env python
 
 import unittest
+from multiprocessing import get_context
+from os.path import exists
+from tempfile import TemporaryDirectory
+from unittest.mock import Mock, patch
+from sqlalchemy.dialects.sqlite.pysqlite import SQLiteDialect_pysqlite
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
 
-from rml.io.sources import SQLLogicalSource, MIMEType
+from rml.io.sources import SQLLogicalSource, MIMEType, get_engine, \
+                           write_checkpoint
+
+def _read_in_fork(jdbc: str) -> tuple:
+    """
+    Reads a table in a forked process, returns the identity of the pool of
+    the engine and the number of rows.
+    """
+    source = SQLLogicalSource(jdbc, 'SELECT ID FROM students;')
+    return id(get_engine(jdbc).pool), len(list(source))
 
 class SQLLogicalSourceTests(unittest.TestCase):
     def test_mime_type(self) -> None:
@@ -29,6 +44,272 @@ class SQLLogicalSourceTests(unittest.TestCase):
         with self.assertRaises(StopIteration):
             next(source)
 
+    def test_iterator_streaming(self) -> None:
+        """
+        Test if we can iterate over every row when streaming in batches
+        """
+        source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                  'SELECT ID, NAME, AGE FROM students;',
+                                  streaming=True, batch_size=2)
+        self.assertDictEqual(next(source),
+                             {'ID': 0, 'NAME': 'Herman', 'AGE': 65})
+        self.assertDictEqual(next(source),
+                             {'ID': 1, 'NAME': 'Ann', 'AGE': 62})
+        self.assertDictEqual(next(source),
+                             {'ID': 2, 'NAME': 'Simon', 'AGE': 23})
+        with self.assertRaises(StopIteration):
+            next(source)
+
+    def test_iterator_tuples(self) -> None:
+        """
+        Test if we can iterate over every row as tuples
+        """
+        source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                  'SELECT ID, NAME, AGE FROM students;',
+                                  tuples=True)
+        self.assertListEqual(source.columns, ['ID', 'NAME', 'AGE'])
+        row = next(source)
+        self.assertEqual(row[1], 'Herman')
+        self.assertTupleEqual(tuple(row), (0, 'Herman', 65))
+        self.assertTupleEqual(tuple(next(source)), (1, 'Ann', 62))
+        self.assertTupleEqual(tuple(next(source)), (2, 'Simon', 23))
+        with self.assertRaises(StopIteration):
+            next(source)
+
+    def test_iterator_tuples_pages(self) -> None:
+        """
+        Test if tuples fall back to dicts when reading in pages
+        """
+        source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                  'SELECT ID, NAME, AGE FROM students;',
+                                  page_size=2, tuples=True)
+        self.assertIsNone(source.columns)
+        self.assertDictEqual(next(source),
+                             {'ID': 0, 'NAME': 'Herman', 'AGE': 65})
+
+    def test_empty_iterator_streaming(self) -> None:
+        """
+        Test if we can handle an empty iterator (table) when streaming
+        """
+        with self.assertRaises(StopIteration):
+            source = SQLLogicalSource('sqlite:///tests/assets/sql/empty.db',
+                                      'SELECT ID, NAME, AGE FROM students;',
+                                      streaming=True)
+            next(source)
+
+    def test_non_existing_table_streaming(self) -> None:
+        """
+        Test if we raise an ValueError when the table does not exist when
+        streaming
+        """
+        with self.assertRaises(ValueError):
+            source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                      'SELECT ID, NAME, AGE FROM empty;',
+                                      streaming=True)
+            next(source)
+
+    def test_iterator_partitions(self) -> None:
+        """
+        Test if we can iterate over every row when reading partitions of the
+        integer primary key
+        """
+        source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                  'SELECT NAME, AGE FROM students;',
+                                  batch_size=1, partitions=2)
+        rows = sorted([r for r in source], key=lambda r: r['AGE'])
+        self.assertListEqual(rows, [{'NAME': 'Simon', 'AGE': 23},
+                                    {'NAME': 'Ann', 'AGE': 62},
+                                    {'NAME': 'Herman', 'AGE': 65}])
+        with self.assertRaises(StopIteration):
+            next(source)
+
+    def test_iterator_partitions_column(self) -> None:
+        """
+        Test if we can iterate over every row when reading partitions of a
+        column of any query
+        """
+        source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                  'SELECT ID, NAME FROM students '
+                                  'WHERE AGE > 30;',
+                                  partitions=3, partition_column='ID')
+        rows = sorted([r for r in source], key=lambda r: r['ID'])
+        self.assertListEqual(rows, [{'ID': 0, 'NAME': 'Herman'},
+                                    {'ID': 1, 'NAME': 'Ann'}])
+
+    def test_iterator_partitions_null(self) -> None:
+        """
+        Test if we can iterate over every row when the partition column
+        contains NULL values
+        """
+        for condition in ['AGE > 60', 'AGE > 100']:
+            source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                      'SELECT NAME, CASE WHEN '
+                                      f'{condition} THEN ID END AS GRP '
+                                      'FROM students WHERE AGE > 0;',
+                                      partitions=2, partition_column='GRP')
+            rows = sorted([r['NAME'] for r in source])
+            self.assertListEqual(rows, ['Ann', 'Herman', 'Simon'])
+
+    def test_iterator_partitions_fallback(self) -> None:
+        """
+        Test if we read without partitions when no partition column is found
+        """
+        source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                  'SELECT NAME FROM students WHERE AGE > 30;',
+                                  partitions=2)
+        self.assertListEqual([r for r in source],
+                             [{'NAME': 'Herman'}, {'NAME': 'Ann'}])
+
+    def test_empty_iterator_partitions(self) -> None:
+        """
+        Test if we can handle an empty iterator (table) when reading
+        partitions
+        """
+        with self.assertRaises(StopIteration):
+            source = SQLLogicalSource('sqlite:///tests/assets/sql/empty.db',
+                                      'SELECT ID, NAME, AGE FROM students;',
+                                      partitions=4)
+            next(source)
+
+    def test_non_existing_column_partitions(self) -> None:
+        """
+        Test if we raise an ValueError when the partition column does not
+        exist
+        """
+        with self.assertRaises(ValueError):
+            source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                      'SELECT ID, NAME FROM students;',
+                                      partitions=2, partition_column='empty')
+            next(source)
+
+    def test_iterator_pages(self) -> None:
+        """
+        Test if we can iterate over every row when reading in pages
+        """
+        source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                  'SELECT NAME, AGE FROM students;',
+                                  page_size=2)
+        self.assertDictEqual(next(source), {'NAME': 'Herman', 'AGE': 65})
+        self.assertEqual(source.last_key, 0)
+        self.assertDictEqual(next(source), {'NAME': 'Ann', 'AGE': 62})
+        self.assertDictEqual(next(source), {'NAME': 'Simon', 'AGE': 23})
+        self.assertEqual(source.last_key, 2)
+        with self.assertRaises(StopIteration):
+            next(source)
+
+    def test_iterator_pages_key_column(self) -> None:
+        """
+        Test if we can iterate over every row of any query when reading in
+        pages of a key column
+        """
+        source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                  'SELECT ID, NAME FROM students '
+                                  'WHERE AGE > 30;',
+                                  page_size=1, key_column='ID')
+        self.assertListEqual([r for r in source],
+                             [{'ID': 0, 'NAME': 'Herman'},
+                              {'ID': 1, 'NAME': 'Ann'}])
+
+    def test_iterator_pages_resume(self) -> None:
+        """
+        Test if a failed run resumes at the page after the checkpoint
+        """
+        with TemporaryDirectory() as directory:
+            checkpoint = f'{directory}/checkpoint.json'
+            source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                      'SELECT NAME FROM students;',
+                                      page_size=1, checkpoint=checkpoint)
+            self.assertDictEqual(next(source), {'NAME': 'Herman'})
+            self.assertDictEqual(next(source), {'NAME': 'Ann'})
+            self.assertFalse(exists(checkpoint))
+            write_checkpoint(*source.pop_checkpoint())
+            self.assertIsNone(source.pop_checkpoint())
+            self.assertTrue(exists(checkpoint))
+
+            # Resume after the completely read first page
+            source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                      'SELECT NAME FROM students;',
+                                      page_size=1, checkpoint=checkpoint)
+            self.assertListEqual([r for r in source],
+                                 [{'NAME': 'Ann'}, {'NAME': 'Simon'}])
+            self.assertTupleEqual(source.pop_checkpoint(), (checkpoint, None))
+            write_checkpoint(checkpoint, None)
+            self.assertFalse(exists(checkpoint))
+
+        source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                  'SELECT NAME FROM students;',
+                                  page_size=2, last_key=1)
+        self.assertListEqual([r for r in source], [{'NAME': 'Simon'}])
+
+    def test_iterator_pages_connection_lost(self) -> None:
+        """
+        Test if reading a page is retried when the connection is lost
+        """
+        source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                  'SELECT NAME FROM students;',
+                                  page_size=2)
+        engine = source._engine
+        lost = OperationalError('SELECT', {}, Exception('Connection lost'),
+                                connection_invalidated=True)
+        source._engine = Mock(connect=Mock(side_effect=[lost,
+                                                        engine.connect()]))
+        self.assertListEqual([r for r in source],
+                             [{'NAME': 'Herman'}, {'NAME': 'Ann'},
+                              {'NAME': 'Simon'}])
+        self.assertEqual(source._engine.connect.call_count, 2)
+
+    def test_non_existing_table_pages(self) -> None:
+        """
+        Test if we raise an ValueError when the table does not exist when
+        reading in pages
+        """
+        with self.assertRaises(ValueError):
+            source = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                                      'SELECT ID FROM students;',
+                                      page_size=2, key_column='empty')
+
+    def test_shared_engine(self) -> None:
+        """
+        Test if Logical Sources on the same database share one engine
+        """
+        jdbc = 'sqlite:///tests/assets/sql/student.db'
+        source1 = SQLLogicalSource(jdbc, 'SELECT ID FROM students;')
+        source2 = SQLLogicalSource(jdbc, 'SELECT NAME FROM students;')
+        self.assertIs(source1._engine, source2._engine)
+        self.assertIs(source1._engine, get_engine(jdbc))
+        self.assertIsNot(source1._engine,
+                         get_engine('sqlite:///tests/assets/sql/empty.db'))
+
+    def test_engine_many_sources(self) -> None:
+        """
+        Test if more Logical Sources than the size of a connection pool can
+        be read at the same time
+        """
+        jdbc = 'sqlite:///tests/assets/sql/student.db'
+        with patch.dict('rml.io.sources.sql_source._engines', clear=True), \
+                patch.object(SQLiteDialect_pysqlite, 'get_pool_class',
+                             return_value=QueuePool):
+            sources = [SQLLogicalSource(jdbc, 'SELECT ID FROM students;')
+                       for i in range(20)]
+            self.assertIsInstance(get_engine(jdbc).pool, QueuePool)
+            rows = [next(s) for s in sources]
+            self.assertEqual(len(rows), 20)
+            for s in sources:
+                self.assertEqual(len(list(s)), 2)
+
+    def test_engine_fork(self) -> None:
+        """
+        Test if a forked process does not use the pooled connections of the
+        parent process
+        """
+        jdbc = 'sqlite:///tests/assets/sql/student.db'
+        source = SQLLogicalSource(jdbc, 'SELECT ID FROM students;')
+        with get_context('fork').Pool(1) as pool:
+            pool_id, rows = pool.apply(_read_in_fork, (jdbc,))
+        self.assertNotEqual(pool_id, id(get_engine(jdbc).pool))
+        self.assertEqual(rows, 3)
+        self.assertEqual(len(list(source)), 3)
+
     def test_non_existing_database(self) -> None:
         """
         Test if a FileNotFoundError exception is raised when the input file
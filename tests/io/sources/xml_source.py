@@ -72,5 +72,77 @@ class XMLLogicalSourceTests(unittest.TestCase):
         with self.assertRaises(StopIteration):
             next(source)
 
+    def test_streaming_iterator(self) -> None:
+        """
+        Test if we can iterate over each XML element while streaming
+        """
+        source = XMLLogicalSource('/students/student',
+                                  'tests/assets/xml/student.xml',
+                                  streaming=True)
+
+        student = next(source)
+        self.assertEqual(student.xpath('./id')[0].text, '0')
+        self.assertEqual(student.xpath('./name')[0].text, 'Herman')
+        self.assertEqual(student.xpath('./age')[0].text, '65')
+
+        student = next(source)
+        self.assertEqual(student.xpath('./id')[0].text, '1')
+        self.assertEqual(student.xpath('./name')[0].text, 'Ann')
+        self.assertEqual(student.xpath('./age')[0].text, '62')
+        # Previous records are removed from the tree
+        self.assertIsNone(student.getprevious())
+
+        student = next(source)
+        self.assertEqual(student.xpath('./id')[0].text, '2')
+        self.assertEqual(student.xpath('./name')[0].text, 'Simon')
+        self.assertEqual(student.xpath('./age')[0].text, '23')
+
+        with self.assertRaises(StopIteration):
+            next(source)
+
+    def test_streaming_fallback(self) -> None:
+        """
+        Test if we fall back to parsing the XML file when the XPath expression
+        cannot be streamed
+        """
+        source = XMLLogicalSource('/students/student[id="1"]',
+                                  'tests/assets/xml/student.xml',
+                                  streaming=True)
+        student = next(source)
+        self.assertEqual(student.xpath('./name')[0].text, 'Ann')
+        with self.assertRaises(StopIteration):
+            next(source)
+
+    def test_streaming_empty_iterator(self) -> None:
+        """
+        Test if we can handle an empty iterator while streaming
+        """
+        source = XMLLogicalSource('/students/empty',
+                                  'tests/assets/xml/student.xml',
+                                  streaming=True)
+        with self.assertRaises(StopIteration):
+            next(source)
+
+    def test_streaming_non_existing_file(self) -> None:
+        """
+        Test if we raise a FileNotFoundError exception when the input file does
+        not exist while streaming
+        """
+        with self.assertRaises(FileNotFoundError):
+            source = XMLLogicalSource('/students/student',
+                                      'this/file/does/not/exist',
+                                      streaming=True)
+
+    def test_streaming_invalid_xml(self) -> None:
+        """
+        Test if we raise an XMLSyntaxError when the input file cannot be
+        parsed as valid XML while streaming
+        """
+        with self.assertRaises(XMLSyntaxError):
+            source = XMLLogicalSource('/students/student',
+                                      'tests/assets/xml/invalid.xml',
+                                      streaming=True)
+            list(source)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,19 +1,29 @@
 import unittest
+from parameterized import parameterized
 from contextlib import redirect_stdout
 from io import StringIO
-from typing import List
-from tempfile import NamedTemporaryFile
-from os import remove, chmod, chown
-from rdflib import Graph
+from typing import Any, List
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from os import remove, chmod, chown, _exit
+from os.path import exists, getsize
+from time import sleep
+from unittest.mock import patch
+from rdflib import Graph, ConjunctiveGraph
 from rdflib.term import URIRef, Literal
 from rdflib.compare import to_isomorphic
 
-from rml.io.targets import FileLogicalTarget
-from rml.io.sources import JSONLogicalSource, SPARQLJSONLogicalSource, MIMEType
+import rml.io.targets
+from rml.io.targets import FileLogicalTarget, QUEUE_TIMEOUT, \
+                           _execute_triples_map
+from rml.io.sources import JSONLogicalSource, SPARQLJSONLogicalSource, \
+                           CSVLogicalSource, XMLLogicalSource, MIMEType, \
+                           SQLLogicalSource, write_checkpoint
 from rml.io.maps import TriplesMap, SubjectMap, PredicateMap, \
                         ObjectMap, PredicateObjectMap, ReferenceType
 from rml.namespace import FOAF
 
+GRAPH = URIRef('http://example.com/Graph')
+
 SPARQL_QUERY = """
     SELECT DISTINCT ?actor ?name WHERE {
         ?tvshow rdf:type dbo:TelevisionShow.
@@ -24,7 +34,64 @@ SPARQL_QUERY = """
 """
 
 
+
+def _execute_delayed(index: int) -> None:
+    """
+    Executes a TriplesMap in a worker process of which the queue only starts
+    sending the batches after a delay, when the execution completed.
+    """
+    queue = rml.io.targets._worker_queue
+    assert queue is not None
+    # Queue not used yet by this worker process
+    if queue._thread is None:
+        send_bytes = queue._send_bytes
+        delayed: List[bool] = [True]
+
+        def send_delayed(*args: Any) -> None:
+            if delayed:
+                delayed.clear()
+                sleep(2 * QUEUE_TIMEOUT)
+            send_bytes(*args)
+        queue._send_bytes = send_delayed
+    _execute_triples_map(index)
+
+
 class FileLogicalTargetTests(unittest.TestCase):
+    def _create_triples_maps(self, rr_graph: URIRef = None) \
+            -> List[TriplesMap]:
+        ls = JSONLogicalSource('$.students.[*]',
+                               'tests/assets/json/student.json')
+        sm = SubjectMap('http://example.com/{id}', ReferenceType.TEMPLATE,
+                        MIMEType.JSON, None)
+        pm = PredicateMap('http://xmlns.com/foaf/0.1/name',
+                          ReferenceType.CONSTANT, MIMEType.JSON)
+        om = ObjectMap('name', ReferenceType.REFERENCE, MIMEType.JSON,
+                       is_iri=False)
+        pom = [PredicateObjectMap(pm, om, rr_graph=rr_graph)]
+        return [TriplesMap(ls, sm, pom)]
+
+    def _create_independent_triples_maps(self, reference: str = 'name') \
+            -> List[TriplesMap]:
+        triples_maps = []
+        sources = [
+            (JSONLogicalSource('$.students.[*]',
+                               'tests/assets/json/student.json'),
+             MIMEType.JSON),
+            (CSVLogicalSource('tests/assets/csv/student.csv'), MIMEType.CSV),
+            (XMLLogicalSource('/students/student',
+                              'tests/assets/xml/student.xml'),
+             MIMEType.TEXT_XML)
+        ]
+        for i, (ls, mime_type) in enumerate(sources):
+            sm = SubjectMap(f'http://example.com/{i}/{{id}}',
+                            ReferenceType.TEMPLATE, mime_type, None)
+            pm = PredicateMap('http://xmlns.com/foaf/0.1/name',
+                              ReferenceType.CONSTANT, mime_type)
+            om = ObjectMap(reference, ReferenceType.REFERENCE, mime_type)
+            triples_maps.append(TriplesMap(ls, sm, [PredicateObjectMap(pm,
+                                                                       om)]))
+        return triples_maps
+
     def test_non_existing_path(self) -> None:
         """
         Test if a FileNotFoundError is raised when the path does not exists.
@@ -246,6 +313,229 @@ class FileLogicalTargetTests(unittest.TestCase):
         self.assertEqual(output, expected_output)
         remove(tmp_file.name)
 
+    def test_write_all_nquads_named_graph(self) -> None:
+        """
+        Test if Named Graphs are kept when streaming N-Quads
+        """
+        tmp_file = NamedTemporaryFile(delete=False)
+        target = FileLogicalTarget(self._create_triples_maps(GRAPH),
+                                   tmp_file.name, MIMEType.NQUADS)
+        target.write_all()
+
+        # Read the generated quads from file
+        output = ConjunctiveGraph()
+        output.parse(tmp_file.name, format='nquads')
+        quads = set((s, p, o, g.identifier) for s, p, o, g in output.quads())
+
+        expected_output = set([
+            (URIRef('http://example.com/0'), FOAF.name, Literal('Herman'),
+             GRAPH),
+            (URIRef('http://example.com/1'), FOAF.name, Literal('Ann'),
+             GRAPH),
+            (URIRef('http://example.com/2'), FOAF.name, Literal('Simon'),
+             GRAPH)
+        ])
+
+        # Assert and clean up temporary file
+        self.assertEqual(quads, expected_output)
+        remove(tmp_file.name)
+
+    def test_write_all_ntriples_named_graph(self) -> None:
+        """
+        Test if Named Graphs are dropped when streaming N-Triples
+        """
+        tmp_file = NamedTemporaryFile(delete=False)
+        target = FileLogicalTarget(self._create_triples_maps(GRAPH),
+                                   tmp_file.name, MIMEType.NTRIPLES)
+        target.write_all()
+
+        # Every line must be a single triple
+        with open(tmp_file.name) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        for line in lines:
+            self.assertNotIn(str(GRAPH), line)
+
+        # Assert and clean up temporary file
+        output = Graph().parse(tmp_file.name, format=MIMEType.NTRIPLES.value)
+        self.assertEqual(len(output), 3)
+        remove(tmp_file.name)
+
+    def test_write_all_turtle(self) -> None:
+        """
+        Test writing all triples in a non line-based format
+        """
+        tmp_file = NamedTemporaryFile(delete=False)
+        target = FileLogicalTarget(self._create_triples_maps(),
+                                   tmp_file.name, MIMEType.TURTLE)
+        target.write_all()
+
+        # Read the generated triples from file
+        output = Graph().parse(tmp_file.name, format=MIMEType.TURTLE.value)
+        output = to_isomorphic(output)
+
+        # Build the expected graph
+        expected_output = Graph()
+        expected_output.add((URIRef('http://example.com/0'), FOAF.name,
+                             Literal('Herman')))
+        expected_output.add((URIRef('http://example.com/1'), FOAF.name,
+                             Literal('Ann')))
+        expected_output.add((URIRef('http://example.com/2'), FOAF.name,
+                             Literal('Simon')))
+        expected_output = to_isomorphic(expected_output)
+
+        # Assert and clean up temporary file
+        self.assertEqual(output, expected_output)
+        remove(tmp_file.name)
+
+    def test_write_all_parallel(self) -> None:
+        """
+        Test if executing the TriplesMaps in parallel writes the same triples
+        """
+        for format in [MIMEType.NTRIPLES, MIMEType.TURTLE]:
+            outputs = []
+            for workers in [1, 2]:
+                tmp_file = NamedTemporaryFile(delete=False)
+                triples_maps = self._create_independent_triples_maps()
+                target = FileLogicalTarget(triples_maps, tmp_file.name, format)
+                target.write_all(workers=workers)
+                output = Graph().parse(tmp_file.name, format=format.value)
+                outputs.append(to_isomorphic(output))
+                remove(tmp_file.name)
+
+            self.assertEqual(len(outputs[0]), 9)
+            self.assertEqual(outputs[0], outputs[1])
+
+    def test_write_all_parallel_delayed(self) -> None:
+        """
+        Test if batches arriving after the workers completed their
+        TriplesMaps are still written
+        """
+        tmp_file = NamedTemporaryFile(delete=False)
+        triples_maps = self._create_independent_triples_maps()
+        target = FileLogicalTarget(triples_maps, tmp_file.name,
+                                   MIMEType.NTRIPLES)
+        with patch('rml.io.targets._execute_triples_map',
+                   new=_execute_delayed):
+            target.write_all(workers=2)
+        output = Graph().parse(tmp_file.name, format='nt')
+        self.assertEqual(len(output), 9)
+        remove(tmp_file.name)
+
+    def test_write_all_parallel_error(self) -> None:
+        """
+        Test if errors in a worker process are raised by the Logical Target
+        """
+        tmp_file = NamedTemporaryFile(delete=False)
+        triples_maps = self._create_independent_triples_maps('missing')
+        target = FileLogicalTarget(triples_maps, tmp_file.name,
+                                   MIMEType.NTRIPLES)
+        with self.assertRaises(NameError):
+            target.write_all(workers=2)
+        remove(tmp_file.name)
+
+    def test_write_all_parallel_killed(self) -> None:
+        """
+        Test if a killed worker process is raised by the Logical Target
+        instead of blocking forever
+        """
+        tmp_file = NamedTemporaryFile(delete=False)
+        triples_maps = self._create_independent_triples_maps()
+        target = FileLogicalTarget(triples_maps, tmp_file.name,
+                                   MIMEType.NTRIPLES)
+        with patch.object(TriplesMap, '__next__',
+                          side_effect=lambda *args: _exit(1)):
+            with self.assertRaises(ValueError):
+                target.write_all(workers=2)
+        remove(tmp_file.name)
+
+    def test_write_all_parallel_unpicklable_error(self) -> None:
+        """
+        Test if errors which cannot be sent by a worker process are raised
+        by the Logical Target
+        """
+        class LocalError(Exception):
+            pass
+
+        def fail(*args):
+            raise LocalError('local')
+
+        tmp_file = NamedTemporaryFile(delete=False)
+        triples_maps = self._create_independent_triples_maps()
+        target = FileLogicalTarget(triples_maps, tmp_file.name,
+                                   MIMEType.NTRIPLES)
+        with patch.object(TriplesMap, '__next__', side_effect=fail):
+            with self.assertRaises(ValueError):
+                target.write_all(workers=2)
+        remove(tmp_file.name)
+
+    def _create_paged_triples_maps(self, checkpoint: str) \
+            -> List[TriplesMap]:
+        triples_maps = self._create_triples_maps()
+        ls = SQLLogicalSource('sqlite:///tests/assets/sql/student.db',
+                              'SELECT ID, NAME FROM students;', page_size=1,
+                              checkpoint=checkpoint)
+        sm = SubjectMap('http://example.com/sql/{ID}', ReferenceType.TEMPLATE,
+                        MIMEType.SQL, None)
+        pm = PredicateMap('http://xmlns.com/foaf/0.1/name',
+                          ReferenceType.CONSTANT, MIMEType.SQL)
+        om = ObjectMap('NAME', ReferenceType.REFERENCE, MIMEType.SQL,
+                       is_iri=False)
+        triples_maps.append(TriplesMap(ls, sm, [PredicateObjectMap(pm, om)]))
+        return triples_maps
+
+    @parameterized.expand([(1,), (2,)])
+    def test_write_all_resume(self, workers: int) -> None:
+        """
+        Test if the triples of the pages behind a checkpoint are written
+        before the checkpoint when a page fails to be read, and a resumed
+        run generates all triples
+        """
+        read_page = SQLLogicalSource._read_page
+        calls = []
+        sizes = []
+
+        def fail_second_page(self, *args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise ValueError('Connection lost')
+            return read_page(self, *args, **kwargs)
+
+        def record_size(path, last_key):
+            sizes.append(getsize(output))
+            write_checkpoint(path, last_key)
+
+        with TemporaryDirectory() as directory:
+            output = f'{directory}/output.nt'
+            checkpoint = f'{directory}/checkpoint.json'
+            with patch.object(SQLLogicalSource, '_read_page', autospec=True,
+                              side_effect=fail_second_page), \
+                    patch('rml.io.targets.write_checkpoint',
+                          side_effect=record_size):
+                target = FileLogicalTarget(
+                    self._create_paged_triples_maps(checkpoint), output,
+                    MIMEType.NTRIPLES)
+                with self.assertRaises(ValueError):
+                    target.write_all(workers=workers)
+            self.assertEqual(len(sizes), 1)
+            self.assertGreater(sizes[0], 0)
+            self.assertTrue(exists(checkpoint))
+            first_run = Graph().parse(output, format='nt')
+            self.assertIn((URIRef('http://example.com/sql/0'), FOAF.name,
+                           Literal('Herman')), first_run)
+
+            target = FileLogicalTarget(
+                self._create_paged_triples_maps(checkpoint), output,
+                MIMEType.NTRIPLES, append=True)
+            target.write_all(workers=workers)
+            self.assertFalse(exists(checkpoint))
+            output_graph = Graph().parse(output, format='nt')
+            names = [(s, o) for s, o in output_graph.subject_objects(FOAF.name)
+                     if s.startswith('http://example.com/sql/')]
+            self.assertCountEqual(names, [
+                (URIRef(f'http://example.com/sql/{i}'), Literal(n))
+                for i, n in enumerate(['Herman', 'Ann', 'Simon'])])
+
 
 if __name__ == '__main__':
     unittest.main()